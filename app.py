@@ -5,11 +5,15 @@ from dotenv import load_dotenv
 from src.data_processor import DataProcessor
 from src.drug_discovery import DrugDiscoveryAssistant
 from src.llama_model import LlamaResearchAssistant
+from src.disease_normalizer import disease_slug
 import plotly.express as px
 import plotly.graph_objs as go
 import pandas as pd
 import io
+import time
 from datetime import datetime
+from src.job_queue import ACTIVE_STATES, FAILED, JobQueue, JobQueueFullError, get_job_queue
+from src.upload_cache import get_upload_cache
 
 # Load environment variables
 load_dotenv()
@@ -25,7 +29,10 @@ def initialize_session_state():
         'clinical_trials': {
             'selected_disease': None,
             'trials_data': None,
-            'analysis_results': None
+            'analysis_results': None,
+            'summarized_source': None,
+            'report_sections': None,
+            'job_id': None
         },
         
         # Disease Prediction Section
@@ -40,14 +47,16 @@ def initialize_session_state():
         'treatment_innovation': {
             'selected_disease': None,
             'treatment_discovery': None,
-            'literature_summary': None
+            'literature_summary': None,
+            'job_id': None
         },
         
         # Literature Review Section
         'literature_review': {
             'research_topic': None,
             'generated_summary': None,
-            'download_content': None
+            'download_content': None,
+            'job_id': None
         },
         
         # Global application settings
@@ -63,6 +72,118 @@ def initialize_session_state():
         if section not in st.session_state:
             st.session_state[section] = defaults
 
+@st.cache_resource
+def get_research_assistant() -> LlamaResearchAssistant:
+    """
+    Build the research assistant once per server process
+    
+    Returns:
+        LlamaResearchAssistant: Assistant shared across all Streamlit sessions
+    """
+    load_dotenv()
+    openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
+    return LlamaResearchAssistant(api_key=openrouter_api_key)
+
+@st.cache_resource
+def get_research_jobs() -> JobQueue:
+    """
+    Register the long-running generations with the background job queue
+    
+    Jobs run on the queue's worker pool instead of the script thread, so a
+    slow provider does not block the page and a refresh does not lose the
+    work. Jobs interrupted by a server restart are resubmitted here.
+    
+    Returns:
+        JobQueue: Process-wide job queue
+    """
+    llama_assistant = get_research_assistant()
+    drug_analyzer = DrugDiscoveryAssistant(llama_assistant)
+    job_queue = get_job_queue()
+    
+    def literature_review(params, report_progress):
+        chunks = []
+        for chunk in llama_assistant.stream_literature_review(params['research_topic']):
+            chunks.append(chunk)
+            report_progress("".join(chunks))
+        return {'summary': "".join(chunks), 'research_topic': params['research_topic']}
+    
+    def treatment_discovery(params, report_progress):
+        chunks = []
+        for chunk in drug_analyzer.stream_drug_candidates(params['disease']):
+            chunks.append(chunk)
+            report_progress("".join(chunks))
+        return drug_analyzer.build_candidate_response(params['disease'], "".join(chunks))
+    
+    def clinical_summary(params, report_progress):
+        sections = []
+        with open(params['path'], 'rb') as report_file:
+            summary = llama_assistant.summarize_clinical_report(report_file, sections)
+        return {'summary': summary, 'sections': sections}
+    
+    job_queue.register('literature_review', literature_review)
+    job_queue.register('treatment_discovery', treatment_discovery)
+    job_queue.register('clinical_summary', clinical_summary)
+    job_queue.recover()
+    return job_queue
+
+def submit_job(section: str, kind: str, params: dict):
+    """
+    Start a background job for a page section and remember its id
+    
+    The id is kept in the session and in the URL, so the page finds the job
+    again after a browser refresh.
+    
+    Args:
+        section (str): Session state section owning the job
+        kind (str): Registered job kind
+        params (dict): Job parameters
+    """
+    try:
+        job_id = get_research_jobs().submit(kind, params)
+    except JobQueueFullError as e:
+        st.error(f"The server is busy: {e}")
+        return
+    st.session_state[section]['job_id'] = job_id
+    st.query_params[section] = job_id
+
+def poll_job(section: str, message: str):
+    """
+    Check on a section's background job
+    
+    While the job is queued or running, shows its partial output and reruns
+    the page after a short pause; this call does not return in that case.
+    
+    Args:
+        section (str): Session state section owning the job
+        message (str): Status text shown while the job runs
+    
+    Returns:
+        The job result once it succeeded, otherwise None
+    """
+    job_id = st.session_state[section].get('job_id') or st.query_params.get(section)
+    if not job_id:
+        return None
+    
+    job = get_research_jobs().get(job_id)
+    if job is not None and job['status'] in ACTIVE_STATES:
+        st.session_state[section]['job_id'] = job_id
+        st.info(f"{message} ({job['status']})")
+        if job['progress']:
+            st.markdown(job['progress'])
+        time.sleep(float(os.getenv('LLM_JOB_POLL_INTERVAL', 1.0)))
+        st.rerun()
+    
+    # Finished, failed or purged: stop tracking it
+    st.session_state[section]['job_id'] = None
+    if section in st.query_params:
+        del st.query_params[section]
+    if job is None:
+        return None
+    if job['status'] == FAILED:
+        st.error(f"Background job failed: {job['error']}")
+        return None
+    return job['result']
+
 def main():
     # Page Configuration
     st.set_page_config(
@@ -145,10 +266,8 @@ def main():
         algorithms and medical research insights.
         """)
 
-    # Load necessary assistants
-    load_dotenv()
-    openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
-    llama_assistant = LlamaResearchAssistant(openrouter_api_key)
+    # Load necessary assistants (shared by every session in this process)
+    llama_assistant = get_research_assistant()
     drug_analyzer = DrugDiscoveryAssistant(llama_assistant)
 
     # Ensure Home is the default page on first load
@@ -584,24 +703,45 @@ def render_clinical_trials_page(llama_assistant):
         # Save the uploaded PDF to session state
         st.session_state.clinical_trials['uploaded_file'] = uploaded_file
         
-        with st.spinner('Analyzing Clinical Trial Report...'):
-            try:
-                # Summarize the uploaded PDF
-                summary = llama_assistant.summarize_clinical_report(uploaded_file)
-                
-                # Save summary to session state and previous results
-                st.session_state.clinical_trials['analysis_results'] = summary
-                
-                # Display summary
-                st.write(summary)
+        # Keep the report on disk, named by its content, so the job survives a
+        # restart; reruns with the same file attached do nothing new
+        report_path = get_upload_cache().store_file(uploaded_file.name, uploaded_file.getvalue())
+        if report_path != st.session_state.clinical_trials['summarized_source']:
+            st.session_state.clinical_trials['summarized_source'] = report_path
             
-            except Exception as e:
-                st.error(f"Error summarizing clinical trial report: {e}")
+            # A report with identical content was summarized before, maybe by another user
+            sections = []
+            cached_summary = llama_assistant.cached_clinical_summary(uploaded_file, sections)
+            if cached_summary is not None:
+                st.session_state.clinical_trials['analysis_results'] = cached_summary
+                st.session_state.clinical_trials['report_sections'] = sections
+                st.session_state.clinical_trials['job_id'] = None
+            else:
+                submit_job('clinical_trials', 'clinical_summary', {'path': report_path, 'name': uploaded_file.name})
+    
+    result = poll_job('clinical_trials', 'Analyzing Clinical Trial Report...')
+    if result is not None:
+        # Save summary to session state and previous results
+        st.session_state.clinical_trials['analysis_results'] = result['summary']
+        st.session_state.clinical_trials['report_sections'] = result.get('sections')
+        st.write(result['summary'])
+        render_report_sections(result.get('sections'))
     
     # Display previously uploaded PDF summary if exists
     elif st.session_state.clinical_trials['analysis_results']:
         st.subheader("Previous Summary")
         st.write(st.session_state.clinical_trials['analysis_results'])
+        render_report_sections(st.session_state.clinical_trials['report_sections'])
+
+def render_report_sections(sections):
+    # Which parts of the report the summary was written from
+    if not sections:
+        return
+    sent = sum(1 for section in sections if section['status'] in ('included', 'trimmed'))
+    with st.expander(f"Report sections used ({sent} of {len(sections)})"):
+        sections_df = pd.DataFrame(sections)[['heading', 'section', 'status', 'tokens']]
+        sections_df.columns = ['Heading', 'Section', 'Status', 'Estimated Tokens']
+        st.dataframe(sections_df, hide_index=True)
 
 def render_treatment_innovation_page(drug_analyzer):
     st.header("Treatment Innovation Tracker")
@@ -628,39 +768,20 @@ def render_treatment_innovation_page(drug_analyzer):
     st.session_state.treatment_innovation['selected_disease'] = selected_disease
     
     if st.button("Explore Therapeutic Solutions"):
-        try:
-            with st.spinner(f'Exploring Innovative Treatments for {selected_disease}...'):
-                # Discover treatment candidates
-                response = drug_analyzer.discover_drug_candidates(selected_disease)
-                
-                # Save response to session state and previous results
-                st.session_state.treatment_innovation['treatment_discovery'] = response
-                
-                if response and 'narrative' in response:
-                    # Display the narrative first
-                    st.markdown(response['narrative'])
-                    
-                    # Then display structured treatment information if available
-                    if 'treatments' in response and response['treatments']:
-                        st.subheader("Detailed Treatment Analysis")
-                        for treatment in response['treatments']:
-                            with st.expander(f"Treatment Details: {treatment.get('name', 'Research-Based Treatment')}"):
-                                st.write("**Treatment Name:**", treatment.get('drug_name', 'Not specified'))
-                                st.write("**Mechanism:**", treatment.get('mechanism', 'Not specified'))
-                                st.write("**Effectiveness:**", treatment.get('effectiveness', 'Not specified'))
-                                st.write("**Research Status:**", treatment.get('research_status', 'Not specified'))
-                                st.write("**Potential Side Effects:**", treatment.get('side_effects', 'Not specified'))
-                else:
-                    st.error("No treatment information available.")
-        
-        except Exception as e:
-            st.error(f"Error exploring treatments: {str(e)}")
+        submit_job('treatment_innovation', 'treatment_discovery', {'disease': selected_disease})
+    
+    result = poll_job('treatment_innovation', f'Exploring Innovative Treatments for {selected_disease}...')
+    if result is not None:
+        # Save response to session state and previous results
+        st.session_state.treatment_innovation['treatment_discovery'] = result
+        if not result.get('narrative'):
+            st.error("No treatment information available.")
             st.info("Please try again with a different medical condition or contact support if the issue persists.")
     
-    # Display previous treatment information if exists
-    elif st.session_state.treatment_innovation['treatment_discovery']:
+    # Display the latest treatment information
+    if st.session_state.treatment_innovation['treatment_discovery']:
         response = st.session_state.treatment_innovation['treatment_discovery']
-        if 'narrative' in response:
+        if response.get('narrative'):
             st.markdown(response['narrative'])
             
             if 'treatments' in response and response['treatments']:
@@ -696,26 +817,30 @@ def render_literature_review_page(llama_assistant):
     st.session_state.literature_review['research_topic'] = research_topic
     
     if st.button("Generate Review"):
-        with st.spinner('Analyzing Research Literature...'):
-            literature_summary = llama_assistant.generate_literature_review(research_topic)
-            
-            # Save literature review to session state and previous results
-            st.session_state.literature_review['generated_summary'] = literature_summary
-            
-            st.markdown(literature_summary)
-            
-            # Generate downloadable literature review
-            literature_download = generate_downloadable_literature_review(research_topic, literature_summary)
-            st.session_state.literature_review['download_content'] = literature_download
-            
-            # Download button
-            st.download_button(
-                label="Download Full Literature Review",
-                data=literature_download['content'],
-                file_name=literature_download['filename'],
-                mime='text/plain',
-                key='download_full_literature_review'
-            )
+        submit_job('literature_review', 'literature_review', {'research_topic': research_topic})
+    
+    result = poll_job('literature_review', 'Analyzing Research Literature...')
+    if result is not None:
+        # Save literature review to session state and previous results
+        st.session_state.literature_review['generated_summary'] = result['summary']
+        
+        # Generate downloadable literature review
+        literature_download = generate_downloadable_literature_review(result['research_topic'], result['summary'])
+        st.session_state.literature_review['download_content'] = literature_download
+    
+    if st.session_state.literature_review['generated_summary']:
+        st.markdown(st.session_state.literature_review['generated_summary'])
+    
+    literature_download = st.session_state.literature_review['download_content']
+    if literature_download:
+        # Download button
+        st.download_button(
+            label="Download Full Literature Review",
+            data=literature_download['content'],
+            file_name=literature_download['filename'],
+            mime='text/plain',
+            key='download_full_literature_review'
+        )
 
 def generate_downloadable_literature_review(research_topic: str, literature_summary: str) -> dict:
     """
@@ -757,7 +882,7 @@ Generated using Advanced Medical Research Assistant
         
         # Generate a unique, descriptive filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{research_topic.lower().replace(' ', '_')}_literature_review_{timestamp}.txt"
+        filename = f"{disease_slug(research_topic)}_literature_review_{timestamp}.txt"
         
         return {
             'content': literature_content,
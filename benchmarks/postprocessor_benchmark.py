@@ -0,0 +1,95 @@
+"""
+Microbenchmark: single-pass response post-processor vs. the previous
+nine-pass re.sub clean-up.
+
+Run from the repository root:
+
+    python benchmarks/postprocessor_benchmark.py [--lines 20000] [--repeat 5]
+"""
+import os
+import re
+import sys
+import random
+import argparse
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.response_postprocessor import StreamingResponseCleaner, clean_response
+
+
+def legacy_clean(generated_text: str) -> str:
+    """Clean-up as previously inlined in _generate_llama_response"""
+    generated_text = generated_text.strip()
+
+    patterns_to_remove = [
+        r'^Solution \d+:.*$',
+        r'^Solution:.*$',
+        r'^Treatment Name:.*$',
+        r'^Mechanism of Action:.*$',
+        r'^Potential Effectiveness:.*$',
+        r'^Research Status:.*$',
+        r'^Potential Side Effects:.*$',
+        r'^\d+\.\s*',
+        r'^[A-Za-z]+\s*\d+:.*$'
+    ]
+
+    for pattern in patterns_to_remove:
+        generated_text = re.sub(pattern, '', generated_text, flags=re.MULTILINE)
+
+    lines = [line.strip() for line in generated_text.split('\n') if line.strip()]
+    return '\n\n'.join(lines)
+
+
+def stream_clean(text: str, chunk_size: int = 24) -> str:
+    """Clean-up through StreamingResponseCleaner, fed in provider-sized chunks"""
+    cleaner = StreamingResponseCleaner()
+    output = [cleaner.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    output.append(cleaner.finish())
+    return ''.join(output)
+
+
+def generate_text(lines: int, seed: int = 7) -> str:
+    """Build a large response mixing narrative lines with removable artifacts"""
+    rng = random.Random(seed)
+    narrative = [
+        "Recent phase 2 trials of monoclonal antibodies show slowed cognitive decline in early disease.",
+        "Gene therapy approaches targeting dopaminergic neurons continue to mature in preclinical models.",
+        "Combination regimens are being evaluated to reduce resistance and improve long-term outcomes.",
+    ]
+    artifacts = [
+        "Solution 3: Novel kinase inhibitor",
+        "Treatment Name: Experimental compound",
+        "Mechanism of Action: Receptor antagonism",
+        "Research Status: Phase 1",
+        "Step 4: Monitor biomarkers",
+        "2. Lifestyle interventions remain foundational.",
+        "",
+    ]
+    return '\n'.join(rng.choice(narrative) if rng.random() < 0.7 else rng.choice(artifacts)
+                     for _ in range(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=20000, help='Lines in the generated text')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    text = generate_text(args.lines)
+    expected = legacy_clean(text)
+    assert clean_response(text) == expected, "single-pass output differs from legacy clean-up"
+    assert stream_clean(text) == expected, "streaming output differs from legacy clean-up"
+
+    print(f"Input: {args.lines} lines, {len(text) / 1024:.0f} KiB")
+    baseline = None
+    for name, func in (("legacy nine-pass re.sub", legacy_clean),
+                       ("single-pass clean_response", clean_response),
+                       ("StreamingResponseCleaner", stream_clean)):
+        best = min(timeit.repeat(lambda: func(text), number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:<30} {best * 1000:8.2f} ms  ({baseline / best:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
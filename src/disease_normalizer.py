@@ -0,0 +1,157 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+# Canonical disease names (display form) and the aliases users type for them.
+# Aliases go through the same normalization as user input when the lookup
+# table is compiled, so they only need to be listed once in any spelling.
+DISEASE_SYNONYMS: Dict[str, List[str]] = {
+    "Alzheimer's disease": ["alzheimer", "alzheimers", "alzheimer disease", "alzheimer's dementia",
+                            "senile dementia of the alzheimer type"],
+    "Parkinson's disease": ["parkinson", "parkinsons", "parkinson disease"],
+    "chronic kidney disease": ["ckd", "chronic renal disease", "chronic renal insufficiency"],
+    "chronic obstructive pulmonary disease": ["copd", "chronic obstructive lung disease"],
+    "type 2 diabetes": ["t2d", "t2dm", "type ii diabetes", "type 2 diabetes mellitus",
+                        "diabetes mellitus type 2", "adult onset diabetes"],
+    "type 1 diabetes": ["t1d", "t1dm", "type i diabetes", "type 1 diabetes mellitus",
+                        "diabetes mellitus type 1", "juvenile diabetes"],
+    "hypertension": ["htn", "high blood pressure", "arterial hypertension"],
+    "myocardial infarction": ["mi", "heart attack", "acute myocardial infarction"],
+    "coronary artery disease": ["cad", "coronary heart disease", "ischemic heart disease"],
+    "congestive heart failure": ["chf", "heart failure"],
+    "amyotrophic lateral sclerosis": ["als", "lou gehrig disease", "motor neuron disease"],
+    "multiple sclerosis": ["ms"],
+    "rheumatoid arthritis": ["ra"],
+    "COVID-19": ["covid", "covid 19", "covid19", "coronavirus disease 2019", "sars cov 2 infection"],
+    "HIV/AIDS": ["hiv", "aids", "hiv aids", "human immunodeficiency virus infection"],
+    "pneumonia": ["lung infection", "community acquired pneumonia"],
+    "tuberculosis": ["tb"],
+    "attention deficit hyperactivity disorder": ["adhd"],
+    "gastroesophageal reflux disease": ["gerd", "acid reflux"],
+}
+
+# Trailing words that do not change which condition is meant
+_GENERIC_SUFFIXES = ("disease", "disorder", "condition")
+
+# Words ending in "s" that are not plurals
+_SINGULAR_EXCEPTIONS = frozenset({
+    "diabetes", "measles", "mumps", "rabies", "herpes", "rickets", "scabies", "shingles",
+    "arthritis", "sclerosis", "tuberculosis", "psoriasis", "fibrosis", "cirrhosis",
+    "aids", "sepsis", "lupus", "syphilis", "meningitis", "hepatitis", "virus", "fungus",
+    "status", "series", "species", "pancreas", "uterus", "bronchus", "stenosis",
+})
+
+_APOSTROPHES = re.compile(r"[’‘`']")
+_POSSESSIVE = re.compile(r"(\w)'s\b")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _singularize(token: str) -> str:
+    if len(token) <= 3 or token in _SINGULAR_EXCEPTIONS:
+        return token
+    if token.endswith(("ss", "us", "is", "os")):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def _tokenize(name: str) -> List[str]:
+    """
+    Reduce free text to normalized tokens
+
+    Case, accents, apostrophes, punctuation and plural endings are folded so
+    that "Alzheimer's", "ALZHEIMERS" and "alzheimer" produce the same tokens.
+    """
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = _APOSTROPHES.sub("'", text)
+    text = _POSSESSIVE.sub(r"\1", text)
+    text = text.replace("'", "")
+    return [_singularize(token) for token in _NON_WORD.split(text) if token]
+
+
+def _compile_lookup() -> Dict[str, str]:
+    """
+    Compile the synonym table into a flat normalized-phrase lookup
+    """
+    lookup: Dict[str, str] = {}
+    for canonical, aliases in DISEASE_SYNONYMS.items():
+        for alias in [canonical] + aliases:
+            tokens = _tokenize(alias)
+            lookup[' '.join(tokens)] = canonical
+            while tokens and tokens[-1] in _GENERIC_SUFFIXES:
+                tokens = tokens[:-1]
+                if tokens:
+                    lookup.setdefault(' '.join(tokens), canonical)
+    return lookup
+
+
+_LOOKUP = _compile_lookup()
+
+
+def _match(tokens: List[str]) -> Optional[str]:
+    phrase = ' '.join(tokens)
+    if phrase in _LOOKUP:
+        return _LOOKUP[phrase]
+    while tokens and tokens[-1] in _GENERIC_SUFFIXES:
+        tokens = tokens[:-1]
+        if ' '.join(tokens) in _LOOKUP:
+            return _LOOKUP[' '.join(tokens)]
+    return None
+
+
+def normalize_disease_name(name: str) -> str:
+    """
+    Normalize a free-text disease name to its canonical lookup key
+
+    Args:
+        name (str): Disease name as entered by a user or stored in data
+
+    Returns:
+        str: Lowercase canonical key, e.g. "alzheimer's disease" for
+             "Alzheimer's", "alzheimers disease" or "Alzheimer Disease"
+    """
+    if not name:
+        return ""
+    tokens = _tokenize(name)
+    canonical = _match(tokens)
+    if canonical is not None:
+        return canonical.lower()
+    return ' '.join(tokens)
+
+
+def canonical_disease_name(name: str) -> str:
+    """
+    Resolve a disease name to the form used in prompts
+
+    Known diseases resolve to the synonym table entry. Anything else keeps
+    the user's wording with surrounding and repeated whitespace removed:
+    folded tokens would turn "Graves' disease" into "grave disease". Use
+    normalize_disease_name for cache keys and lookups.
+
+    Args:
+        name (str): Disease name as entered by a user
+
+    Returns:
+        str: Canonical display name for prompts
+    """
+    if not name:
+        return ""
+    canonical = _match(_tokenize(name))
+    return canonical if canonical is not None else ' '.join(name.split())
+
+
+def disease_slug(name: str) -> str:
+    """
+    Build a filesystem-safe slug from a disease name
+
+    Args:
+        name (str): Disease name as entered by a user
+
+    Returns:
+        str: Lowercase slug such as "alzheimer_disease"
+    """
+    return '_'.join(_tokenize(normalize_disease_name(name))) or "unknown"
@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 import io
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Iterator, Union
 from .llama_model import LlamaResearchAssistant
 from .medical_knowledge_base import MedicalKnowledgeBase
+from .disease_normalizer import canonical_disease_name, disease_slug
+from .token_budget import fit_prompt_content
 import json
 import re
 import os
@@ -29,40 +31,16 @@ class DrugDiscoveryAssistant:
         Returns:
             Dict[str, Any]: Dictionary containing narrative and treatment information
         """
+        # Canonical name keeps spelling variants on one cached prompt
+        disease = canonical_disease_name(disease)
+        
         try:
             # Prepare a comprehensive treatment discovery prompt
-            prompt = f"""Provide an in-depth analysis of innovative treatment approaches for {disease}, covering:
-
-1. Current Medical Understanding
-- Pathophysiology of {disease}
-- Latest research breakthroughs
-- Emerging therapeutic strategies
-
-2. Treatment Modalities
-- Pharmacological interventions
-- Targeted therapies
-- Potential breakthrough treatments
-- Personalized medicine approaches
-
-3. Detailed Treatment Insights
-For each potential treatment, provide:
-- Specific drug/therapy name
-- Mechanism of action
-- Clinical trial status
-- Potential effectiveness
-- Unique therapeutic approach
-- Potential side effects and considerations
-
-CRITICAL REQUIREMENTS:
-- Use professional medical terminology
-- Provide evidence-based information
-- Focus on cutting-edge research
-- Maximum length: 750 words
-- Highlight most promising treatments"""
+            prompt = self._treatment_discovery_prompt(disease)
 
             try:
                 # Generate treatment discovery response
-                treatment_narrative = self.llama_assistant._generate_llama_response(prompt)
+                treatment_narrative = self.llama_assistant._generate_llama_response(prompt, task="treatment_innovations")
                 
                 # Parse and structure treatment information
                 treatments = self._parse_treatment_details(treatment_narrative, disease)
@@ -106,6 +84,91 @@ Note: This information is generated for research purposes and should not replace
                 }]
             }
     
+    def _treatment_discovery_prompt(self, disease: str) -> str:
+        """
+        Build the treatment discovery prompt for a disease
+        
+        Args:
+            disease (str): Canonical disease name
+        
+        Returns:
+            str: Treatment discovery prompt
+        """
+        return f"""Provide an in-depth analysis of innovative treatment approaches for {disease}, covering:
+
+1. Current Medical Understanding
+- Pathophysiology of {disease}
+- Latest research breakthroughs
+- Emerging therapeutic strategies
+
+2. Treatment Modalities
+- Pharmacological interventions
+- Targeted therapies
+- Potential breakthrough treatments
+- Personalized medicine approaches
+
+3. Detailed Treatment Insights
+For each potential treatment, provide:
+- Specific drug/therapy name
+- Mechanism of action
+- Clinical trial status
+- Potential effectiveness
+- Unique therapeutic approach
+- Potential side effects and considerations
+
+CRITICAL REQUIREMENTS:
+- Use professional medical terminology
+- Provide evidence-based information
+- Focus on cutting-edge research
+- Maximum length: 750 words
+- Highlight most promising treatments"""
+
+    def stream_drug_candidates(self, disease: str) -> Iterator[str]:
+        """
+        Stream the treatment discovery narrative as it is generated
+        
+        Falls back to the knowledge base narrative when the model fails before
+        producing any text. Pass the joined chunks to build_candidate_response
+        to get the structured result.
+        
+        Args:
+            disease (str): Target disease or condition
+        
+        Returns:
+            Iterator[str]: Narrative text chunks
+        """
+        disease = canonical_disease_name(disease)
+        emitted = False
+        
+        try:
+            for chunk in self.llama_assistant.stream_llama_response(self._treatment_discovery_prompt(disease),
+                                                                    task="treatment_innovations"):
+                emitted = True
+                yield chunk
+        
+        except Exception as ai_error:
+            print(f"AI treatment discovery streaming failed: {ai_error}")
+            if not emitted:
+                kb_response = self.knowledge_base.get_treatments(disease)
+                yield kb_response.get('narrative', f"Treatment research for {disease} is ongoing.")
+    
+    def build_candidate_response(self, disease: str, narrative: str) -> Dict[str, Any]:
+        """
+        Structure a streamed treatment narrative like discover_drug_candidates
+        
+        Args:
+            disease (str): Target disease or condition
+            narrative (str): Full narrative text
+        
+        Returns:
+            Dict[str, Any]: Dictionary containing narrative and treatment information
+        """
+        disease = canonical_disease_name(disease)
+        return {
+            'narrative': narrative,
+            'treatments': self._parse_treatment_details(narrative, disease)
+        }
+    
     def _parse_treatment_details(self, narrative: str, disease: str) -> List[Dict[str, Any]]:
         """
         Parse treatment details from generated narrative
@@ -192,7 +255,7 @@ Note: This information is generated for research purposes and should not replace
         Prioritize novel approaches and potential repurposing of existing drugs.
         """
         
-        drug_candidates_text = self.llama_assistant._generate_llama_response(prompt)
+        drug_candidates_text = self.llama_assistant._generate_llama_response(prompt, task="drug_candidates")
         
         # Basic parsing of drug candidates
         candidates = []
@@ -218,9 +281,10 @@ Note: This information is generated for research purposes and should not replace
             # Convert molecular data to dictionary for Llama processing
             molecular_dict = molecular_data.to_dict(orient='records')
             
-            prompt = f"""
+            def build_prompt(molecular_text: str) -> str:
+                return f"""
             Analyze the following molecular interaction data:
-            {molecular_dict}
+            {molecular_text}
             
             Provide insights on:
             1. Potential drug-target interactions
@@ -229,7 +293,8 @@ Note: This information is generated for research purposes and should not replace
             4. Potential side effects or conflicts
             """
             
-            return self.llama_assistant._generate_llama_response(prompt)
+            prompt = fit_prompt_content(build_prompt, str(molecular_dict), "molecular_analysis", "molecular_data")
+            return self.llama_assistant._generate_llama_response(prompt, task="molecular_analysis")
         except Exception as e:
             print(f"Error analyzing molecular interactions: {e}")
             return {"error": str(e)}
@@ -636,7 +701,7 @@ This temporary technical limitation does not reflect on the availability or qual
         os.makedirs(output_dir, exist_ok=True)
         
         # Create filename with .txt extension
-        filename = f"{disease.lower().replace(' ', '_')}_literature_review.txt"
+        filename = f"{disease_slug(disease)}_literature_review.txt"
         file_path = os.path.join(output_dir, filename)
         
         # Write content to file in plain text format
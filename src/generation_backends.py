@@ -0,0 +1,319 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import importlib.util
+import concurrent.futures
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUnavailableError(RuntimeError):
+    """
+    Raised when a generation backend cannot serve requests in this environment
+    """
+
+
+class GenerationBackend:
+    """
+    Interface for text generation backends other than the remote provider
+
+    LlamaResearchAssistant sends a task to a backend when the BackendPolicy
+    assigns it one; everything else goes to the remote provider with its
+    retry, failover and routing logic.
+    """
+
+    name = "backend"
+
+    def available(self) -> bool:
+        """
+        Check whether the backend can run here
+
+        Returns:
+            bool: True if generate can be called
+        """
+        return True
+
+    async def generate(self, prompt: str, max_tokens: int) -> str:
+        """
+        Generate a completion
+
+        Args:
+            prompt (str): Full prompt text
+            max_tokens (int): Completion token cap
+
+        Returns:
+            str: Generated text
+        """
+        raise NotImplementedError
+
+
+class LocalTransformersBackend(GenerationBackend):
+    """
+    Small Hugging Face model running on the local CPU
+
+    The model is loaded once, on first use. Requests from every thread and
+    event loop are queued to a single inference thread, which groups those
+    arriving within batch_wait seconds into one batched generate call;
+    torch is capped at max_threads so inference cannot starve the web
+    server. With local_files_only the model is read from the local cache or
+    a directory path and never downloaded, for air-gapped hosts.
+    """
+
+    name = "transformers"
+
+    def __init__(self,
+                 model_name: str = "google/flan-t5-small",
+                 max_threads: int = 2,
+                 max_batch_size: int = 8,
+                 batch_wait: float = 0.02,
+                 max_new_tokens: int = 256,
+                 max_input_tokens: int = 1024,
+                 local_files_only: bool = False):
+        """
+        Initialize the backend
+
+        Args:
+            model_name (str): Hub model id or local directory
+            max_threads (int): torch intra-op threads used for inference
+            max_batch_size (int): Most prompts generated in one batch
+            batch_wait (float): Seconds to wait for more prompts before running a batch
+            max_new_tokens (int): Upper bound on generated tokens, whatever the task budget
+            max_input_tokens (int): Prompts are truncated to this many model tokens
+            local_files_only (bool): Never download the model
+        """
+        self.model_name = model_name
+        self.max_threads = max_threads
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait
+        self.max_new_tokens = max_new_tokens
+        self.max_input_tokens = max_input_tokens
+        self.local_files_only = local_files_only
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._load_error: Optional[Exception] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._tokenizer = None
+        self._model = None
+        self._encoder_decoder = False
+
+    @classmethod
+    def from_env(cls) -> "LocalTransformersBackend":
+        """
+        Build the backend from LOCAL_MODEL_* settings
+
+        Returns:
+            LocalTransformersBackend: Configured backend
+        """
+        load_dotenv()
+        offline = os.getenv('HF_HUB_OFFLINE', '') in ('1', 'true', 'True')
+        return cls(
+            model_name=os.getenv('LOCAL_MODEL_NAME', 'google/flan-t5-small'),
+            max_threads=int(os.getenv('LOCAL_MODEL_THREADS', 2)),
+            max_batch_size=int(os.getenv('LOCAL_MODEL_BATCH_SIZE', 8)),
+            batch_wait=float(os.getenv('LOCAL_MODEL_BATCH_WAIT', 0.02)),
+            max_new_tokens=int(os.getenv('LOCAL_MODEL_MAX_NEW_TOKENS', 256)),
+            local_files_only=offline or os.getenv('LOCAL_MODEL_OFFLINE', 'False').lower() in ('1', 'true', 'yes')
+        )
+
+    def available(self) -> bool:
+        return (importlib.util.find_spec("transformers") is not None and
+                importlib.util.find_spec("torch") is not None)
+
+    def _load(self):
+        """
+        Load the tokenizer and model; called once on the inference thread
+        """
+        import torch
+        from transformers import AutoConfig, AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer
+
+        torch.set_num_threads(self.max_threads)
+        started = time.monotonic()
+        config = AutoConfig.from_pretrained(self.model_name, local_files_only=self.local_files_only)
+        self._encoder_decoder = bool(getattr(config, "is_encoder_decoder", False))
+        model_class = AutoModelForSeq2SeqLM if self._encoder_decoder else AutoModelForCausalLM
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, local_files_only=self.local_files_only)
+        if not self._encoder_decoder:
+            # Decoder-only models continue the prompt, so pad on the left
+            self._tokenizer.padding_side = "left"
+            if self._tokenizer.pad_token is None:
+                self._tokenizer.pad_token = self._tokenizer.eos_token
+        self._model = model_class.from_pretrained(self.model_name, local_files_only=self.local_files_only)
+        self._model.eval()
+        logger.info(f"Loaded local model {self.model_name} in {time.monotonic() - started:.1f}s "
+                    f"({self.max_threads} threads)")
+
+    def _infer(self, prompts: List[str], max_new_tokens: int) -> List[str]:
+        """
+        Run one batched generate call
+
+        Args:
+            prompts (List[str]): Prompts in the batch
+            max_new_tokens (int): Generated token cap for the batch
+
+        Returns:
+            List[str]: Completions in prompt order
+        """
+        import torch
+
+        encoded = self._tokenizer(prompts, return_tensors="pt", padding=True, truncation=True,
+                                  max_length=self.max_input_tokens)
+        with torch.inference_mode():
+            output = self._model.generate(**encoded, max_new_tokens=max_new_tokens, do_sample=False)
+        if not self._encoder_decoder:
+            output = output[:, encoded["input_ids"].shape[1]:]
+        return [text.strip() for text in self._tokenizer.batch_decode(output, skip_special_tokens=True)]
+
+    def _next_batch(self) -> List[Tuple[str, int, concurrent.futures.Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._next_batch() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                if self._load_error is not None:
+                    raise BackendUnavailableError(f"Local model failed to load: {self._load_error}")
+                if not self._loaded:
+                    try:
+                        self._load()
+                    except Exception as e:
+                        # A missing model will not appear by retrying; fail fast from now on
+                        self._load_error = e
+                        raise
+                    self._loaded = True
+                max_new_tokens = min(self.max_new_tokens, max(tokens for _, tokens, _ in batch))
+                started = time.monotonic()
+                results = self._infer([prompt for prompt, _, _ in batch], max_new_tokens)
+                get_metrics().observe("llm_local_batch_seconds", time.monotonic() - started,
+                                      {"model": self.model_name})
+                get_metrics().increment("llm_local_prompts_total", len(batch), {"model": self.model_name})
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def submit(self, prompt: str, max_tokens: int) -> concurrent.futures.Future:
+        """
+        Queue a prompt for the inference thread
+
+        Args:
+            prompt (str): Full prompt text
+            max_tokens (int): Completion token cap
+
+        Returns:
+            concurrent.futures.Future: Resolves to the completion
+        """
+        if not self.available():
+            raise BackendUnavailableError("transformers and torch are required for the local backend")
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="local-model-inference", daemon=True)
+                self._worker.start()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put((prompt, max_tokens, future))
+        return future
+
+    async def generate(self, prompt: str, max_tokens: int) -> str:
+        return await asyncio.wrap_future(self.submit(prompt, max_tokens))
+
+
+# Backend factories by name; add entries to plug in other implementations
+BACKEND_FACTORIES: Dict[str, Callable[[], GenerationBackend]] = {
+    "transformers": LocalTransformersBackend.from_env,
+}
+
+
+class BackendPolicy:
+    """
+    Decide per task whether generation runs locally or on the remote provider
+    """
+
+    def __init__(self, local_tasks: Optional[Set[str]] = None, backend: Optional[GenerationBackend] = None):
+        """
+        Initialize the policy
+
+        Args:
+            local_tasks (Set[str], optional): Tasks served by the local backend
+            backend (GenerationBackend, optional): Local backend; None keeps every task remote
+        """
+        self.local_tasks = set(local_tasks or ())
+        self.backend = backend
+        self._warned = False
+
+    @classmethod
+    def from_env(cls) -> "BackendPolicy":
+        """
+        Build the policy from LLM_LOCAL_BACKEND and LLM_LOCAL_TASKS
+
+        Returns:
+            BackendPolicy: Configured policy
+        """
+        load_dotenv()
+        backend_name = os.getenv('LLM_LOCAL_BACKEND', 'transformers').strip().lower()
+        local_tasks = {task.strip() for task in os.getenv('LLM_LOCAL_TASKS', '').split(',') if task.strip()}
+        if backend_name in ('', 'none') or not local_tasks:
+            return cls()
+        if backend_name not in BACKEND_FACTORIES:
+            raise ValueError(f"Unknown local backend: {backend_name}")
+        return cls(local_tasks, BACKEND_FACTORIES[backend_name]())
+
+    def backend_for(self, task: str) -> Optional[GenerationBackend]:
+        """
+        Get the backend that should serve a task
+
+        Args:
+            task (str): Task name
+
+        Returns:
+            Optional[GenerationBackend]: Local backend, or None for the remote provider
+        """
+        if self.backend is None or task not in self.local_tasks:
+            return None
+        if not self.backend.available():
+            if not self._warned:
+                self._warned = True
+                logger.warning(f"Local backend '{self.backend.name}' is unavailable; using the remote provider")
+            return None
+        return self.backend
+
+
+_policy: Optional[BackendPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_backend_policy() -> BackendPolicy:
+    """
+    Get the process-wide backend policy
+
+    Returns:
+        BackendPolicy: Shared policy configured from the environment
+    """
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = BackendPolicy.from_env()
+        return _policy
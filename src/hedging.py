@@ -0,0 +1,141 @@
+import os
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+
+class LatencyHistory:
+    """
+    Rolling window of successful request latencies for one model
+    """
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the latency history
+
+        Args:
+            window (int): Number of most recent samples kept
+        """
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        """
+        Add a latency sample
+
+        Args:
+            seconds (float): Duration of a successful request
+        """
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Compute a latency percentile over the window (nearest-rank)
+
+        Args:
+            percentile (float): Percentile between 0 and 100
+
+        Returns:
+            Optional[float]: Latency in seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+
+class HedgePolicy:
+    """
+    When to send a backup request to the fallback model
+
+    A request that has not finished within the primary model's latency
+    percentile is duplicated to the fallback model; the first answer wins.
+    """
+
+    def __init__(self,
+                 enabled: bool = False,
+                 percentile: float = 95.0,
+                 min_samples: int = 20,
+                 min_delay: float = 0.5,
+                 max_delay: float = 30.0):
+        """
+        Initialize the hedge policy
+
+        Args:
+            enabled (bool): Hedging is opt-in
+            percentile (float): Primary latency percentile that triggers the hedge
+            min_samples (int): Samples needed before the percentile is trusted
+            min_delay (float): Lower bound on the hedge delay in seconds
+            max_delay (float): Upper bound on the hedge delay in seconds
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        """
+        Build a hedge policy from LLM_HEDGE_* environment variables
+
+        Returns:
+            HedgePolicy: Configured policy
+        """
+        load_dotenv()
+        return cls(
+            enabled=os.getenv('LLM_HEDGE_ENABLED', 'False').lower() in ('1', 'true', 'yes'),
+            percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', 95.0)),
+            min_samples=int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20)),
+            min_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', 0.5)),
+            max_delay=float(os.getenv('LLM_HEDGE_MAX_DELAY', 30.0))
+        )
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """
+        Seconds to wait on the primary model before hedging
+
+        Args:
+            model (str): Primary model
+
+        Returns:
+            Optional[float]: Delay, or None when hedging is off or history is too short
+        """
+        if not self.enabled:
+            return None
+        history = get_latency_history(model)
+        if len(history) < self.min_samples:
+            return None
+        threshold = history.percentile(self.percentile)
+        return min(self.max_delay, max(self.min_delay, threshold))
+
+
+_histories: Dict[str, LatencyHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_latency_history(model: str) -> LatencyHistory:
+    """
+    Get the process-wide latency history for a model
+
+    Args:
+        model (str): Model identifier
+
+    Returns:
+        LatencyHistory: History shared by every assistant using the model
+    """
+    with _histories_lock:
+        if model not in _histories:
+            load_dotenv()
+            _histories[model] = LatencyHistory(window=int(os.getenv('LLM_LATENCY_WINDOW', 200)))
+        return _histories[model]
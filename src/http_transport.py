@@ -0,0 +1,477 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import logging
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class TransportStatusError(Exception):
+    """
+    Raised when a provider answers with a non-success HTTP status
+    """
+
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None, body: str = ""):
+        """
+        Initialize the status error
+
+        Args:
+            status_code (int): HTTP status code returned by the provider
+            headers (Dict[str, str], optional): Response headers
+            body (str): Response body, truncated for logging
+        """
+        super().__init__(f"API request failed with status code {status_code}")
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.body = body[:500]
+
+
+class RequestTimings:
+    """
+    Phase timings of one HTTP request, filled in by the async transport
+
+    Times are in seconds from the moment the request got a concurrency slot.
+    connect is 0 when a pooled keep-alive connection was reused; ttfb is the
+    time until the response headers arrived; total ends when the body has
+    been read (or the stream closed).
+    """
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.total: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self._connect_started: Optional[float] = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self.connect = 0.0
+
+    def finish(self):
+        if self.started is not None and self.total is None:
+            self.total = time.monotonic() - self.started
+
+    async def trace(self, event: str, info: Dict[str, Any]):
+        """
+        httpcore trace hook passed as the "trace" request extension
+        """
+        if self.started is None:
+            return
+        now = time.monotonic()
+        if event == "connection.connect_tcp.started":
+            self._connect_started = now
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if self._connect_started is not None:
+                self.connect = now - self._connect_started
+        elif event.endswith("receive_response_headers.complete") and self.ttfb is None:
+            self.ttfb = now - self.started
+
+
+class TransportConfig:
+    """
+    Connection pool and timeout settings for the shared HTTP transport
+    """
+
+    def __init__(self,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 32,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 max_concurrency: int = 32):
+        """
+        Initialize transport configuration
+
+        Args:
+            pool_connections (int): Number of distinct hosts to keep pools for
+            pool_maxsize (int): Maximum keep-alive connections per host
+            connect_timeout (float): Seconds allowed to establish a connection
+            read_timeout (float): Seconds allowed between bytes of the response
+            max_concurrency (int): Maximum async requests in flight at once
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """
+        Build configuration from environment variables
+
+        Returns:
+            TransportConfig: Configuration with environment overrides applied
+        """
+        load_dotenv()
+        return cls(
+            pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+            pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', 32)),
+            connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', 5.0)),
+            read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', 30.0)),
+            max_concurrency=int(os.getenv('HTTP_MAX_CONCURRENCY', 32))
+        )
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple accepted by requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+
+_session: Optional[requests.Session] = None
+_config: Optional[TransportConfig] = None
+_lock = threading.Lock()
+
+# Async transport state; every coroutine that touches the async client runs
+# on this one loop so the client, its pool and the semaphore are shared
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def configure_transport(config: TransportConfig) -> None:
+    """
+    Replace the process-wide transport configuration
+
+    The current sync session and async client are closed; the next request
+    builds new pools with the supplied settings.
+
+    Args:
+        config (TransportConfig): New transport configuration
+    """
+    global _session, _config, _async_client, _semaphore
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        client, _async_client, _semaphore = _async_client, None, None
+        _config = config
+    if client is not None and _loop is not None:
+        asyncio.run_coroutine_threadsafe(client.aclose(), _loop)
+
+
+def get_transport_config() -> TransportConfig:
+    """
+    Get the active transport configuration
+
+    Returns:
+        TransportConfig: Process-wide transport configuration
+    """
+    global _config
+    with _lock:
+        if _config is None:
+            _config = TransportConfig.from_env()
+        return _config
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide pooled HTTP session
+
+    The session keeps connections alive between calls so repeated requests
+    to the same host skip the TCP and TLS handshake. The underlying urllib3
+    pool is thread-safe and is shared by every caller in the process.
+
+    Returns:
+        requests.Session: Shared session with pooled adapters mounted
+    """
+    global _session
+    config = get_transport_config()
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=config.pool_connections,
+                pool_maxsize=config.pool_maxsize,
+                pool_block=False
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            logger.info(f"Initialized shared HTTP transport (pool_maxsize={config.pool_maxsize})")
+        return _session
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """
+    POST through the shared session using the configured timeouts
+
+    Args:
+        url (str): Target URL
+        **kwargs: Extra arguments forwarded to requests.Session.post
+
+    Returns:
+        requests.Response: HTTP response
+    """
+    kwargs.setdefault('timeout', get_transport_config().timeout)
+    return get_session().post(url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    GET through the shared session using the configured timeouts
+
+    Args:
+        url (str): Target URL
+        **kwargs: Extra arguments forwarded to requests.Session.get
+
+    Returns:
+        requests.Response: HTTP response
+    """
+    kwargs.setdefault('timeout', get_transport_config().timeout)
+    return get_session().get(url, **kwargs)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the process-wide transport event loop, starting it on first use
+
+    Returns:
+        asyncio.AbstractEventLoop: Loop running in a daemon thread
+    """
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name="http-transport-loop",
+                daemon=True
+            )
+            thread.start()
+            _loop, _loop_thread = loop, thread
+        return _loop
+
+
+def _on_transport_loop() -> bool:
+    return _loop_thread is not None and threading.current_thread() is _loop_thread
+
+
+def _get_async_resources() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """
+    Get the shared async client and concurrency semaphore
+
+    Must be called from the transport loop.
+
+    Returns:
+        Tuple[httpx.AsyncClient, asyncio.Semaphore]: Shared client and semaphore
+    """
+    global _async_client, _semaphore
+    config = get_transport_config()
+    with _lock:
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.pool_maxsize,
+                    max_keepalive_connections=config.pool_maxsize
+                ),
+                timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout)
+            )
+            _semaphore = asyncio.Semaphore(config.max_concurrency)
+            logger.info(f"Initialized async HTTP transport (max_concurrency={config.max_concurrency})")
+        return _async_client, _semaphore
+
+
+async def submit(coro: Awaitable[T]) -> T:
+    """
+    Await a coroutine on the transport loop from any event loop
+
+    Args:
+        coro (Awaitable[T]): Coroutine to run
+
+    Returns:
+        T: Result of the coroutine
+    """
+    if _on_transport_loop():
+        return await coro
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    return await asyncio.wrap_future(future)
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Run a coroutine on the transport loop and block until it finishes
+
+    This is what lets the synchronous API stay a thin wrapper over the async
+    one without starting a new event loop (and connection pool) per call.
+
+    Args:
+        coro (Awaitable[T]): Coroutine to run
+        timeout (float, optional): Seconds to wait before giving up
+
+    Returns:
+        T: Result of the coroutine
+    """
+    if _on_transport_loop():
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the transport loop; await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    return future.result(timeout)
+
+
+async def apost(url: str, timings: Optional[RequestTimings] = None, **kwargs: Any) -> httpx.Response:
+    """
+    POST through the shared async client, bounded by the concurrency semaphore
+
+    Args:
+        url (str): Target URL
+        timings (RequestTimings, optional): Filled in with connect, TTFB and total time
+        **kwargs: Extra arguments forwarded to httpx.AsyncClient.post
+
+    Returns:
+        httpx.Response: HTTP response
+    """
+    if timings is not None:
+        kwargs['extensions'] = {**kwargs.get('extensions', {}), "trace": timings.trace}
+
+    async def _post() -> httpx.Response:
+        client, semaphore = _get_async_resources()
+        async with semaphore:
+            if timings is None:
+                return await client.post(url, **kwargs)
+            timings.start()
+            try:
+                response = await client.post(url, **kwargs)
+                timings.status_code = response.status_code
+                return response
+            finally:
+                timings.finish()
+
+    return await submit(_post())
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Consume an async iterator on the transport loop from synchronous code
+
+    Items are handed over through a thread-safe queue as they are produced.
+    Closing the returned generator early cancels the underlying iteration.
+
+    Args:
+        agen (AsyncIterator[T]): Async iterator to drive on the transport loop
+
+    Returns:
+        Iterator[T]: Blocking iterator over the same items
+    """
+    if _on_transport_loop():
+        raise RuntimeError("iterate_sync() cannot be called from the transport loop; use async for instead")
+
+    items: queue.Queue = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            items.put((done, e))
+        else:
+            items.put((done, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
+
+
+async def iterate_async(agen: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Consume an async iterator on the transport loop from any event loop
+
+    Args:
+        agen (AsyncIterator[T]): Async iterator to drive on the transport loop
+
+    Returns:
+        AsyncIterator[T]: Async iterator usable on the caller's loop
+    """
+    if _on_transport_loop():
+        async for item in agen:
+            yield item
+        return
+
+    caller_loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                caller_loop.call_soon_threadsafe(items.put_nowait, (item, None))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            caller_loop.call_soon_threadsafe(items.put_nowait, (done, e))
+        else:
+            caller_loop.call_soon_threadsafe(items.put_nowait, (done, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item, error = await items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
+
+
+async def _stream_lines(url: str, kwargs: Dict[str, Any],
+                        timings: Optional[RequestTimings]) -> AsyncIterator[str]:
+    client, semaphore = _get_async_resources()
+    async with semaphore:
+        if timings is not None:
+            timings.start()
+        try:
+            async with client.stream("POST", url, **kwargs) as response:
+                if timings is not None:
+                    timings.status_code = response.status_code
+                if response.status_code != 200:
+                    body = (await response.aread()).decode('utf-8', errors='ignore')
+                    raise TransportStatusError(response.status_code, response.headers, body)
+                async for line in response.aiter_lines():
+                    yield line
+        finally:
+            if timings is not None:
+                timings.finish()
+
+
+def astream_post_lines(url: str, timings: Optional[RequestTimings] = None, **kwargs: Any) -> AsyncIterator[str]:
+    """
+    POST through the shared async client and iterate the response line by line
+
+    Used for server-sent event streams; the request holds a concurrency
+    slot until the stream is exhausted or closed.
+
+    Args:
+        url (str): Target URL
+        timings (RequestTimings, optional): Filled in with connect, TTFB and total time
+        **kwargs: Extra arguments forwarded to httpx.AsyncClient.stream
+
+    Returns:
+        AsyncIterator[str]: Response body lines as they arrive
+    """
+    if timings is not None:
+        kwargs['extensions'] = {**kwargs.get('extensions', {}), "trace": timings.trace}
+    return iterate_async(_stream_lines(url, kwargs, timings))
@@ -0,0 +1,526 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Job states; queued and running jobs are "active"
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# A handler gets the job parameters and a callback for partial output, and
+# returns a JSON-serializable result
+JobHandler = Callable[[Dict[str, Any], Callable[[str], None]], Any]
+
+
+class JobQueueFullError(RuntimeError):
+    """
+    Raised when a job is submitted while max_pending jobs are already waiting
+    """
+
+
+class JobStore:
+    """
+    Persistent job records in a local SQLite database
+
+    Parameters, partial output, results and errors are stored as the job
+    moves through its states, so a page can find its job again after a
+    rerun, a browser refresh or a server restart. The database runs in WAL
+    mode so several server processes on one host can share it.
+
+    Active jobs belong to the store instance that queued or claimed them,
+    identified by a random owner id rather than the PID, which a restarted
+    container often reuses. The owner renews a lease on its jobs; jobs whose
+    lease has expired are orphans that any other instance may take over.
+    """
+
+    def __init__(self, path: str, retention_seconds: float = 7 * 86400, lease_seconds: float = 30):
+        """
+        Initialize the store
+
+        Args:
+            path (str): SQLite database file path
+            retention_seconds (float): Seconds finished jobs are kept
+            lease_seconds (float): Seconds an active job stays owned without renew_leases
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _initialize_schema(self):
+        connection = self._connect()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                pid INTEGER NOT NULL,
+                owner TEXT NOT NULL DEFAULT '',
+                lease_expires REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        # Databases from before leases: their active jobs start out expired
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            connection.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL NOT NULL DEFAULT 0")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_fingerprint ON jobs(fingerprint, status)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @staticmethod
+    def fingerprint(kind: str, params: Dict[str, Any]) -> str:
+        """
+        Identify a job by its kind and parameters
+
+        Args:
+            kind (str): Job kind
+            params (Dict[str, Any]): Job parameters
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        material = json.dumps({"kind": kind, "params": params}, sort_keys=True, ensure_ascii=False,
+                              separators=(',', ':'))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        """
+        Record a new queued job owned by this store
+
+        Args:
+            kind (str): Job kind
+            params (Dict[str, Any]): JSON-serializable job parameters
+
+        Returns:
+            str: New job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, params, fingerprint, status, pid, owner, lease_expires, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params, ensure_ascii=False), self.fingerprint(kind, params),
+             QUEUED, os.getpid(), self.owner, now + self.lease_seconds, now)
+        )
+        return job_id
+
+    def create_or_join(self, kind: str, params: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        Join an identical live job, or queue one, in a single transaction
+
+        The write lock is taken before the lookup, so concurrent submits from
+        any thread or process create at most one job. An identical job whose
+        owner's lease has expired is taken over rather than joined.
+
+        Args:
+            kind (str): Job kind
+            params (Dict[str, Any]): JSON-serializable job parameters
+
+        Returns:
+            Tuple[str, bool]: Job id, and whether the caller now owns it and must run it
+        """
+        connection = self._connect()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, owner, lease_expires FROM jobs WHERE fingerprint = ? AND status IN (?, ?) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (self.fingerprint(kind, params), *ACTIVE_STATES)
+            ).fetchone()
+            if row is None:
+                job_id, owned = self.create(kind, params), True
+            elif row[1] == self.owner or row[2] >= now:
+                job_id, owned = row[0], False
+            else:
+                job_id, owned = row[0], True
+                connection.execute(
+                    "UPDATE jobs SET status = ?, pid = ?, owner = ?, lease_expires = ?, started_at = NULL "
+                    "WHERE id = ?", (QUEUED, os.getpid(), self.owner, now + self.lease_seconds, job_id)
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return job_id, owned
+
+    def find_active(self, kind: str, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Find a live queued or running job with the same kind and parameters
+
+        Args:
+            kind (str): Job kind
+            params (Dict[str, Any]): Job parameters
+
+        Returns:
+            Optional[str]: Job id, or None; jobs whose owner's lease expired are ignored
+        """
+        row = self._connect().execute(
+            "SELECT id FROM jobs WHERE fingerprint = ? AND status IN (?, ?) AND (owner = ? OR lease_expires >= ?) "
+            "ORDER BY created_at DESC LIMIT 1",
+            (self.fingerprint(kind, params), *ACTIVE_STATES, self.owner, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def renew_leases(self):
+        """
+        Extend the lease on every active job owned by this store
+        """
+        self._connect().execute("UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status IN (?, ?)",
+                                (time.time() + self.lease_seconds, self.owner, *ACTIVE_STATES))
+
+    def mark_running(self, job_id: str):
+        self._connect().execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                                (RUNNING, time.time(), job_id))
+
+    def set_progress(self, job_id: str, progress: str):
+        self._connect().execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+
+    def finish(self, job_id: str, result: Any):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+            (SUCCEEDED, json.dumps(result, ensure_ascii=False), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._connect().execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                                (FAILED, error, time.time(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Dict[str, Any]]: Job record with decoded params and result, or None
+        """
+        row = self._connect().execute(
+            "SELECT id, kind, params, status, progress, result, error, pid, owner, lease_expires, created_at, "
+            "started_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "params": json.loads(row[2]),
+            "status": row[3],
+            "progress": row[4],
+            "result": json.loads(row[5]) if row[5] is not None else None,
+            "error": row[6],
+            "pid": row[7],
+            "owner": row[8],
+            "lease_expires": row[9],
+            "created_at": row[10],
+            "started_at": row[11],
+            "finished_at": row[12]
+        }
+
+    def list_jobs(self, kind: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        List the most recent jobs
+
+        Args:
+            kind (str, optional): Only jobs of this kind
+            limit (int): Most jobs returned
+
+        Returns:
+            List[Dict[str, Any]]: Job records, newest first
+        """
+        if kind is None:
+            rows = self._connect().execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?",
+                                           (limit,)).fetchall()
+        else:
+            rows = self._connect().execute("SELECT id FROM jobs WHERE kind = ? ORDER BY created_at DESC LIMIT ?",
+                                           (kind, limit)).fetchall()
+        return [job for job in (self.get(row[0]) for row in rows) if job is not None]
+
+    def claim_orphans(self) -> List[Dict[str, Any]]:
+        """
+        Take over active jobs of other owners whose lease has expired
+
+        Returns:
+            List[Dict[str, Any]]: Claimed jobs, now queued and owned by this store
+        """
+        connection = self._connect()
+        now = time.time()
+        rows = connection.execute(
+            "SELECT id, owner FROM jobs WHERE status IN (?, ?) AND owner != ? AND lease_expires < ? "
+            "ORDER BY created_at", (*ACTIVE_STATES, self.owner, now)
+        ).fetchall()
+        claimed = []
+        for job_id, owner in rows:
+            # Compare-and-set on the owner so only one restarted process claims the job
+            updated = connection.execute(
+                "UPDATE jobs SET status = ?, pid = ?, owner = ?, lease_expires = ?, started_at = NULL "
+                "WHERE id = ? AND owner = ? AND lease_expires < ? AND status IN (?, ?)",
+                (QUEUED, os.getpid(), self.owner, now + self.lease_seconds, job_id, owner, now, *ACTIVE_STATES)
+            ).rowcount
+            if updated:
+                claimed.append(self.get(job_id))
+        return claimed
+
+    def purge(self):
+        """
+        Delete finished jobs older than the retention period
+        """
+        self._connect().execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                (SUCCEEDED, FAILED, time.time() - self.retention_seconds))
+
+
+class JobQueue:
+    """
+    Run long generations on a bounded worker pool outside the request thread
+
+    Pages submit a job, keep its id and poll get() on each rerun. Submitting
+    a job identical to one still queued or running returns the existing id,
+    so double clicks and refreshes do not start duplicate generations. A
+    heartbeat thread renews the leases of this queue's jobs; jobs whose
+    owner stopped renewing are resubmitted by recover(), or taken over by an
+    identical submit. Generations are cached, so finished LLM calls are not
+    paid for twice.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 max_workers: int = 4,
+                 max_pending: int = 32,
+                 progress_interval: float = 0.5):
+        """
+        Initialize the queue
+
+        Args:
+            store (JobStore): Persistent job records
+            max_workers (int): Jobs run at the same time
+            max_pending (int): Queued and running jobs allowed before submit refuses new ones
+            progress_interval (float): Minimum seconds between partial output writes per job
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.progress_interval = progress_interval
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._recovered = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="llm-job")
+        self._stopped = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_leases, name="llm-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        """
+        Build the queue from LLM_JOB_* settings
+
+        Returns:
+            JobQueue: Configured queue
+        """
+        load_dotenv()
+        data_dir = os.getenv('DATA_DIR', './data')
+        store = JobStore(
+            path=os.getenv('LLM_JOB_DB_PATH', os.path.join(data_dir, 'cache', 'jobs.sqlite3')),
+            retention_seconds=float(os.getenv('LLM_JOB_RETENTION', 7 * 86400)),
+            lease_seconds=float(os.getenv('LLM_JOB_LEASE_SECONDS', 30))
+        )
+        return cls(
+            store,
+            max_workers=int(os.getenv('LLM_JOB_WORKERS', 4)),
+            max_pending=int(os.getenv('LLM_JOB_MAX_PENDING', 32))
+        )
+
+    def register(self, kind: str, handler: JobHandler):
+        """
+        Set the handler for a job kind
+
+        Args:
+            kind (str): Job kind
+            handler (JobHandler): Called as handler(params, report_progress)
+        """
+        with self._lock:
+            self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        """
+        Queue a job, or join an identical active one
+
+        Args:
+            kind (str): Registered job kind
+            params (Dict[str, Any]): JSON-serializable parameters
+
+        Returns:
+            str: Job id to poll
+
+        Raises:
+            KeyError: No handler is registered for the kind
+            JobQueueFullError: max_pending jobs are already waiting
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind: {kind}")
+        with self._lock:
+            reserved = self._pending < self.max_pending
+            if reserved:
+                self._pending += 1
+        if not reserved:
+            # Joining an identical job needs no worker slot
+            existing = self.store.find_active(kind, params)
+            if existing is not None:
+                return existing
+            get_metrics().increment("llm_jobs_total", labels={"kind": kind, "status": "rejected"})
+            raise JobQueueFullError(f"{self.max_pending} jobs are already waiting; try again shortly")
+        try:
+            job_id, owned = self.store.create_or_join(kind, params)
+        except BaseException:
+            owned = False
+            raise
+        finally:
+            if not owned:
+                with self._lock:
+                    self._pending -= 1
+        if not owned:
+            return job_id
+        self._executor.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job
+
+        Args:
+            job_id (str): Job id from submit
+
+        Returns:
+            Optional[Dict[str, Any]]: Job record, or None if unknown or purged
+        """
+        return self.store.get(job_id)
+
+    def recover(self) -> int:
+        """
+        Resubmit jobs orphaned by a process that exited; runs once per queue
+
+        Call after registering handlers.
+
+        Returns:
+            int: Number of jobs resubmitted
+        """
+        with self._lock:
+            if self._recovered:
+                return 0
+            self._recovered = True
+        self.store.purge()
+        resubmitted = 0
+        for job in self.store.claim_orphans():
+            if job["kind"] not in self._handlers:
+                self.store.fail(job["id"], f"No handler for job kind {job['kind']}")
+                continue
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._run, job["id"], job["kind"], job["params"])
+            resubmitted += 1
+        if resubmitted:
+            logger.info(f"Resubmitted {resubmitted} interrupted jobs")
+        return resubmitted
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]):
+        metrics = get_metrics()
+        started = time.monotonic()
+        last_write = [0.0]
+
+        def report_progress(progress: str):
+            now = time.monotonic()
+            if now - last_write[0] >= self.progress_interval:
+                last_write[0] = now
+                self.store.set_progress(job_id, progress)
+
+        try:
+            self.store.mark_running(job_id)
+            metrics.observe("llm_job_wait_seconds", time.time() - self.store.get(job_id)["created_at"],
+                            {"kind": kind})
+            result = self._handlers[kind](params, report_progress)
+            self.store.finish(job_id, result)
+            status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self.store.fail(job_id, str(e))
+            status = FAILED
+        finally:
+            with self._lock:
+                self._pending -= 1
+        metrics.observe("llm_job_run_seconds", time.monotonic() - started, {"kind": kind})
+        metrics.increment("llm_jobs_total", labels={"kind": kind, "status": status})
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker pool
+
+        Args:
+            wait (bool): Wait for running jobs to finish
+        """
+        self._executor.shutdown(wait=wait)
+        self._stopped.set()
+
+    def _renew_leases(self):
+        while not self._stopped.wait(self.store.lease_seconds / 3):
+            try:
+                self.store.renew_leases()
+            except sqlite3.Error as e:
+                logger.warning(f"Job lease renewal failed: {e}")
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the process-wide job queue
+
+    Returns:
+        JobQueue: Shared queue configured from the environment
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue.from_env()
+        return _queue
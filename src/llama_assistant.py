@@ -1,10 +1,15 @@
 import os
 from typing import Dict, List, Any
 import json
-import requests
+import threading
 from dotenv import load_dotenv
 import logging
-from llama_model import LlamaResearchAssistant
+from . import http_transport
+from .llama_model import LlamaResearchAssistant
+from .response_postprocessor import clean_response
+from .disease_normalizer import normalize_disease_name, canonical_disease_name
+from .generation_backends import get_backend_policy
+from .prompt_templates import DISEASE_EXTRACTION
 
 class LlamaAssistant:
     def __init__(self, api_key: str = None):
@@ -22,6 +27,10 @@ class LlamaAssistant:
                             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
+        # Research assistant is built on first use and reused afterwards
+        self._research_assistant = None
+        self._research_assistant_lock = threading.Lock()
+
         # Fallback medical knowledge base
         self.medical_knowledge = {
             "pneumonia": {
@@ -48,6 +57,21 @@ class LlamaAssistant:
             }
         }
     
+    def _get_research_assistant(self) -> LlamaResearchAssistant:
+        """
+        Get the shared treatment innovation research assistant
+        
+        Returns:
+            LlamaResearchAssistant: Lazily created assistant reused across calls
+        """
+        with self._research_assistant_lock:
+            if self._research_assistant is None:
+                self._research_assistant = LlamaResearchAssistant(
+                    section='treatment_innovation',
+                    model_name='google/gemini-2.0-flash-exp'
+                )
+            return self._research_assistant
+
     def generate_medical_insights(self, prompt: str) -> str:
         """
         Generate medical insights using a combination of AI and predefined knowledge
@@ -63,8 +87,9 @@ class LlamaAssistant:
             disease = self._extract_disease(prompt)
             
             # Check predefined knowledge base first
-            if disease.lower() in self.medical_knowledge:
-                return self._format_medical_knowledge(self.medical_knowledge[disease.lower()])
+            disease_key = normalize_disease_name(disease)
+            if disease_key in self.medical_knowledge:
+                return self._format_medical_knowledge(self.medical_knowledge[disease_key])
             
             # If no predefined knowledge, use external API or fallback
             insights = self._call_medical_api(prompt)
@@ -84,6 +109,18 @@ class LlamaAssistant:
         Returns:
             str: Extracted disease name
         """
+        # A local model, when configured for this task, reads the whole question
+        backend = get_backend_policy().backend_for("disease_extraction")
+        if backend is not None:
+            try:
+                extracted = http_transport.run_sync(
+                    backend.generate(DISEASE_EXTRACTION.render(question=prompt), 16)
+                ).strip()
+                if extracted:
+                    return extracted
+            except Exception as e:
+                self.logger.warning(f"Local disease extraction failed: {e}")
+        
         # Simple extraction logic
         words = prompt.split()
         for word in words:
@@ -105,7 +142,7 @@ class LlamaAssistant:
             return None
         
         try:
-            response = requests.post(
+            response = http_transport.post(
                 "https://medical-insights-api.example.com/generate",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
@@ -189,12 +226,12 @@ class LlamaAssistant:
         Returns:
             Dict[str, Any]: Dictionary containing narrative and treatments
         """
+        # Canonical name keeps spelling variants on one cached prompt
+        disease = canonical_disease_name(disease)
+        
         try:
-            # Initialize the research assistant
-            research_assistant = LlamaResearchAssistant(
-                section='treatment_innovation',
-                model_name='google/gemini-2.0-flash-exp'
-            )
+            # Reuse the shared research assistant
+            research_assistant = self._get_research_assistant()
 
             # Construct a narrative-focused prompt
             prompt = f"""Generate a comprehensive medical narrative about innovative treatments for {disease}.
@@ -225,7 +262,7 @@ Example style:
 Generate a cohesive, hopeful narrative about treating {disease}."""
 
             # Generate the narrative
-            treatment_narrative = research_assistant._generate_llama_response(prompt)
+            treatment_narrative = research_assistant._generate_llama_response(prompt, task="treatment_innovations")
 
             # Post-process to ensure narrative format
             if "Solution" in treatment_narrative or "Treatment Name:" in treatment_narrative:
@@ -243,13 +280,12 @@ Instead, write a cohesive story about how new medical innovations are transformi
 
 Remember: This must be ONE CONTINUOUS NARRATIVE with no sections or breaks."""
 
-                treatment_narrative = research_assistant._generate_llama_response(strict_prompt)
+                treatment_narrative = research_assistant._generate_llama_response(
+                    strict_prompt, task="treatment_innovations"
+                )
 
-            # Clean up the text
-            import re
             # Remove any remaining headers or labels
-            treatment_narrative = re.sub(r'^[A-Za-z\s]+:', '', treatment_narrative, flags=re.MULTILINE)
-            treatment_narrative = re.sub(r'^\d+\.', '', treatment_narrative, flags=re.MULTILINE)
+            treatment_narrative = clean_response(treatment_narrative, strip_labels=True)
             
             # Ensure proper title
             if not treatment_narrative.startswith(f"Innovative Treatments for {disease}"):
@@ -304,12 +340,12 @@ Disclaimer: This information is generated by an AI research assistant and should
         Returns:
             str: Detailed narrative of innovative treatments
         """
+        # Canonical name keeps spelling variants on one cached prompt
+        disease_name = canonical_disease_name(disease_name)
+        
         try:
-            # Initialize Gemini-based research assistant for treatment innovation
-            gemini_assistant = LlamaResearchAssistant(
-                section='treatment_innovation', 
-                model_name='google/gemini-2.0-flash-exp'
-            )
+            # Reuse the shared Gemini-based research assistant
+            gemini_assistant = self._get_research_assistant()
             
             # Comprehensive prompt for innovative treatments narrative
             prompt = f"""
@@ -328,7 +364,7 @@ Disclaimer: This information is generated by an AI research assistant and should
             """
             
             # Generate response using Gemini model
-            response = gemini_assistant._generate_llama_response(prompt)
+            response = gemini_assistant._generate_llama_response(prompt, task="treatment_innovations")
             
             return response
         
@@ -346,12 +382,12 @@ Disclaimer: This information is generated by an AI research assistant and should
         Returns:
             str: Detailed yet concise disease overview
         """
+        # Canonical name keeps spelling variants on one cached prompt
+        disease_name = canonical_disease_name(disease_name)
+        
         try:
-            # Initialize Gemini-based research assistant 
-            gemini_assistant = LlamaResearchAssistant(
-                section='treatment_innovation', 
-                model_name='google/gemini-2.0-flash-exp'
-            )
+            # Reuse the shared Gemini-based research assistant
+            gemini_assistant = self._get_research_assistant()
             
             # Predefined comprehensive disease overview prompt
             prompt = f"""
@@ -370,7 +406,7 @@ Disclaimer: This information is generated by an AI research assistant and should
             """
             
             # Generate response using Gemini model
-            response = gemini_assistant._generate_llama_response(prompt)
+            response = gemini_assistant._generate_llama_response(prompt, task="disease_overview")
             
             return response
         
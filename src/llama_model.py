@@ -1,19 +1,78 @@
 import os
 import json
+import asyncio
 import logging
-import requests
-from typing import Dict, Any, List, Optional
+import threading
+from collections import deque
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 import datetime
 import uuid
 import time
+from . import http_transport
+from .response_postprocessor import StreamingResponseCleaner, clean_response
+from .response_cache import ResponseCache, get_response_cache, make_cache_key
+from .disease_normalizer import canonical_disease_name
+from .llm_metrics import get_metrics, start_snapshot_writer
+from .single_flight import get_single_flight
+from .rate_limiter import RateLimit, api_key_bucket, get_rate_limiter
+from .hedging import HedgePolicy, get_latency_history
+from .model_router import get_model_router
+from .generation_backends import GenerationBackend, get_backend_policy
+from .report_extraction import extract_report_text
+from .report_sections import SECTION_INDEX_VERSION, select_report_sections
+from .upload_cache import UploadCache, content_digest, get_upload_cache
+from .token_budget import estimate_tokens, fit_to_budget, get_task_budget, split_to_budget
+from .prompt_templates import (CLINICAL_CHUNK_SUMMARY, CLINICAL_SUMMARY, CLINICAL_SUMMARY_REDUCE, LITERATURE_REVIEW,
+                               LITERATURE_REVIEW_SECTION, LITERATURE_REVIEW_SECTIONS, NARRATIVE_SYSTEM,
+                               OUTCOME_PREDICTION, STRUCTURED_SHAPE, STRUCTURED_SYSTEM, TREATMENT_INNOVATION,
+                               VALIDATION)
+from .structured_output import (TREATMENT_INNOVATION_SCHEMA, StructuredOutputError, conform,
+                                parse_structured, response_format_for, schema_template)
+from .resilience import (CircuitOpenError, RetryPolicy, circuit_breaker_snapshot,
+                         get_circuit_breaker, is_retryable, parse_retry_after)
+
+class GenerationResult:
+    """
+    Outcome of a single prompt in a batch generation
+    """
+    
+    def __init__(self, index: int, prompt: str, text: Optional[str] = None,
+                 error: Optional[BaseException] = None, elapsed: float = 0.0):
+        """
+        Initialize a batch generation result
+        
+        Args:
+            index (int): Position of the prompt in the input list
+            prompt (str): Prompt that was generated
+            text (str, optional): Generated text on success
+            error (BaseException, optional): Exception raised on failure
+            elapsed (float): Seconds spent on this prompt
+        """
+        self.index = index
+        self.prompt = prompt
+        self.text = text
+        self.error = error
+        self.elapsed = elapsed
+    
+    @property
+    def ok(self) -> bool:
+        """True when the prompt generated without raising"""
+        return self.error is None
+    
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={type(self.error).__name__}"
+        return f"GenerationResult(index={self.index}, {status}, elapsed={self.elapsed:.2f}s)"
+
 
 class LlamaResearchAssistant:
     def __init__(self, 
                  section: Optional[str] = None,
                  model_name: Optional[str] = None, 
                  api_key: Optional[str] = None,
-                 api_provider: str = "openrouter"):
+                 api_provider: str = "openrouter",
+                 response_cache: Optional[ResponseCache] = None,
+                 upload_cache: Optional[UploadCache] = None):
         """
         Initialize Research Assistant with section-specific model configuration
         
@@ -22,6 +81,8 @@ class LlamaResearchAssistant:
             model_name (str, optional): Explicit model override
             api_key (str, optional): Explicit API key if not in environment
             api_provider (str): API provider for model access
+            response_cache (ResponseCache, optional): Cache override; defaults to the shared on-disk cache
+            upload_cache (UploadCache, optional): Uploaded report cache override; defaults to the shared one
         """
         # Load environment variables
         load_dotenv()
@@ -34,19 +95,23 @@ class LlamaResearchAssistant:
         SECTION_CONFIGS = {
             "clinical_trial": {
                 "model": os.getenv('CLINICAL_TRIAL_MODEL', 'meta-llama/llama-3.1-8b-instruct'),
-                "api_key": os.getenv('OPENROUTER_API_KEY')
+                "api_key": os.getenv('OPENROUTER_API_KEY'),
+                "api_key_env": 'OPENROUTER_API_KEY'
             },
             "disease_prediction": {
                 "model": os.getenv('DISEASE_PREDICTION_MODEL', 'meta-llama/llama-3.1-8b-instruct'),
-                "api_key": os.getenv('OPENROUTER_API_KEY')
+                "api_key": os.getenv('OPENROUTER_API_KEY'),
+                "api_key_env": 'OPENROUTER_API_KEY'
             },
             "literature_review": {
                 "model": os.getenv('LITERATURE_REVIEW_MODEL', 'meta-llama/llama-3.1-8b-instruct'),
-                "api_key": os.getenv('OPENROUTER_API_KEY')
+                "api_key": os.getenv('OPENROUTER_API_KEY'),
+                "api_key_env": 'OPENROUTER_API_KEY'
             },
             "treatment_innovation": {
                 "model": os.getenv('TREATMENT_INNOVATION_MODEL', 'google/gemini-2.0-flash-exp:free'),
-                "api_key": os.getenv('OPENROUTER_GEMINI_KEY')
+                "api_key": os.getenv('OPENROUTER_GEMINI_KEY'),
+                "api_key_env": 'OPENROUTER_GEMINI_KEY'
             }
         }
         
@@ -56,17 +121,28 @@ class LlamaResearchAssistant:
             section_config = SECTION_CONFIGS[section.lower()]
             self.current_model = model_name or section_config['model']
             self.api_key = api_key or section_config['api_key']
+            api_key_env = None if api_key else section_config['api_key_env']
         else:
             # Fallback to default configuration
             self.current_model = model_name or os.getenv('DEFAULT_MODEL', 'meta-llama/llama-3.1-8b-instruct')
             self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
+            api_key_env = None if api_key else 'OPENROUTER_API_KEY'
+        self.section = section.lower() if section else None
+        
+        # Adaptive routing over the section's candidate models, unless a model was forced
+        self.router = get_model_router()
+        if model_name:
+            self.route_section = None
+        else:
+            self.route_section = self.section if self.section in SECTION_CONFIGS else "default"
         
         # Validate API key
         if not self.api_key:
             raise ValueError(f"No API key found for section: {section}")
         
-        # API Configuration
-        self.api_base_url = "https://openrouter.ai/api/v1/chat/completions"
+        # API Configuration; OPENROUTER_BASE_URL can point at a local stand-in server
+        base_url = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1').rstrip('/')
+        self.api_base_url = f"{base_url}/chat/completions"
         
         # Model-specific configurations
         self.model_config = {
@@ -90,29 +166,133 @@ Your mission is to provide cutting-edge, scientifically rigorous insights into m
             }
         }
         
-        # Ensure model is configured
-        if self.current_model not in self.model_config:
-            # Dynamically add basic configuration for unknown models
-            self.model_config[self.current_model] = {
-                "medical_system_prompt": "You are an advanced medical research AI assistant.",
-                "temperature": 0.3,
-                "max_tokens": 2048,
-                "top_p": 0.7,
-                "frequency_penalty": 0.2,
-                "presence_penalty": 0.1
-            }
+        # Ensure the model and any routing candidates are configured
+        routed_models = []
+        if self.route_section:
+            routed_models = self.router.route_for(self.route_section, self.current_model).models
+        for configured_model in [self.current_model] + routed_models:
+            if configured_model not in self.model_config:
+                # Dynamically add basic configuration for unknown models
+                self.model_config[configured_model] = {
+                    "medical_system_prompt": "You are an advanced medical research AI assistant.",
+                    "temperature": 0.3,
+                    "max_tokens": 2048,
+                    "top_p": 0.7,
+                    "frequency_penalty": 0.2,
+                    "presence_penalty": 0.1
+                }
         
         # Logging configuration details
         self.logger.info(f"Initialized with Model: {self.current_model}")
         self.logger.info(f"Section: {section or 'General'}")
         
-        # Initialize error tracking
-        self.error_log = []
+        # Retry policy for transient provider failures
+        self.retry_policy = RetryPolicy.from_env()
+        
+        # Opt-in hedging to the fallback model on slow tails
+        self.hedge_policy = HedgePolicy.from_env()
+        
+        # Persistent response cache shared by every instance on this host
+        self.response_cache = response_cache or get_response_cache()
+        
+        # Extracted text and summaries of uploaded reports, keyed by file content
+        self.upload_cache = upload_cache or get_upload_cache()
+        
+        # Coalescing of identical in-flight requests
+        self.single_flight = get_single_flight()
+        
+        # Cheap tasks can run on a local CPU model instead of the remote provider
+        self.backend_policy = get_backend_policy()
+        
+        # Host-wide rate limits shared by every process using this key
+        self.rate_limiter = get_rate_limiter()
+        self.rate_limit_buckets = self._rate_limit_buckets(api_key_env)
+        
+        # "sectioned" generates each literature review component as its own concurrent request
+        self.literature_review_mode = os.getenv('LITERATURE_REVIEW_MODE', 'single').lower()
+        
+        # "map_reduce" summarizes whole clinical reports chunk by chunk, then merges the summaries
+        self.clinical_summary_mode = os.getenv('CLINICAL_SUMMARY_MODE', 'single').lower()
+        self.clinical_map_concurrency = int(os.getenv('CLINICAL_SUMMARY_MAP_CONCURRENCY', 4))
+        self.clinical_report_max_chars = int(os.getenv('CLINICAL_REPORT_MAX_CHARS', 200000))
+        
+        # Text scanned for the most relevant sections when the summary is a single call
+        self.clinical_report_scan_chars = int(os.getenv('CLINICAL_REPORT_SCAN_CHARS', 60000))
+        
+        # How structured replies are requested: "json_schema", "json_object" or "prompt"
+        self.structured_output_mode = os.getenv('LLM_STRUCTURED_OUTPUT_MODE', 'json_schema').lower()
+        
+        # Periodic JSON/Prometheus metrics snapshots, when configured
+        start_snapshot_writer()
+        
+        # Initialize error tracking; bounded and lock-guarded because one
+        # instance may be shared by every Streamlit session in the process
+        self.error_log = deque(maxlen=int(os.getenv('ERROR_LOG_SIZE', 100)))
+        self._state_lock = threading.Lock()
+
+    def _record_error(self, method_name: str, error: Exception):
+        """
+        Append an error entry to the shared error log
+        
+        Args:
+            method_name (str): Name of the method that failed
+            error (Exception): Error encountered
+        """
+        with self._state_lock:
+            self.error_log.append({
+                "timestamp": datetime.datetime.now().isoformat(),
+                "method": method_name,
+                "model": self.current_model,
+                "error_type": type(error).__name__,
+                "details": str(error)
+            })
+
+    def _rate_limit_buckets(self, api_key_env: Optional[str]) -> List[Tuple[str, RateLimit]]:
+        """
+        Resolve the rate-limit buckets this assistant draws from
+        
+        The API key bucket uses <KEY_ENV>_RPS / _TPM (e.g. OPENROUTER_API_KEY_RPS)
+        and falls back to LLM_RATE_LIMIT_RPS / _TPM. A section can add its own
+        bucket with <SECTION>_RPS / _TPM (e.g. LITERATURE_REVIEW_TPM).
+        
+        Args:
+            api_key_env (str, optional): Environment variable holding the API key
+        
+        Returns:
+            List[Tuple[str, RateLimit]]: Bucket names and limits
+        """
+        default_limit = RateLimit.from_env('LLM_RATE_LIMIT')
+        key_limit = RateLimit.from_env(api_key_env, default_limit) if api_key_env else default_limit
+        
+        buckets = []
+        if key_limit:
+            buckets.append((api_key_bucket(self.api_key), key_limit))
+        if self.section:
+            section_limit = RateLimit.from_env(self.section.upper())
+            if section_limit:
+                buckets.append((f"section:{self.section}", section_limit))
+        return buckets
+
+    def _estimate_request_tokens(self, payload: Dict[str, Any]) -> int:
+        """
+        Estimate prompt plus completion tokens a request can consume
+        
+        Args:
+            payload (Dict[str, Any]): Request payload
+        
+        Returns:
+            int: Estimated tokens, counting the full completion cap
+        """
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in payload['messages'])
+        return prompt_tokens + payload.get('max_tokens', 0)
 
     def _select_fallback_model(self, current_model: str) -> str:
         """
         Intelligently select a fallback model based on current model's failure
         
+        Walks model_config from the entry after current_model, wrapping around,
+        and skips models whose circuit breaker is open.
+        
         Args:
             current_model (str): Model that failed
         
@@ -120,14 +300,19 @@ Your mission is to provide cutting-edge, scientifically rigorous insights into m
             str: Alternative model to use
         """
         try:
+            models = list(self.model_config.keys())
+            
             # Find index of current model
-            current_index = list(self.model_config.keys()).index(current_model) if current_model in self.model_config else -1
+            current_index = models.index(current_model) if current_model in models else -1
             
             # Select next available model
-            for i in range(current_index + 1, len(self.model_config)):
-                fallback_model = list(self.model_config.keys())[i]
-                self.logger.warning(f"Switching from {current_model} to fallback model: {fallback_model}")
-                return fallback_model
+            for offset in range(1, len(models) + 1):
+                fallback_model = models[(current_index + offset) % len(models)]
+                if fallback_model == current_model:
+                    break
+                if get_circuit_breaker(fallback_model).state != "open":
+                    self.logger.warning(f"Switching from {current_model} to fallback model: {fallback_model}")
+                    return fallback_model
             
             # If no fallback found, return original model
             return current_model
@@ -136,6 +321,43 @@ Your mission is to provide cutting-edge, scientifically rigorous insights into m
             self.logger.error(f"Fallback model selection failed: {e}")
             return current_model
 
+    def _route(self) -> List[str]:
+        """
+        Pick the models for one request from the section's routing candidates
+        
+        Returns:
+            List[str]: Model to use first, then the other candidates in failover order
+        """
+        if self.route_section is None:
+            return [self.current_model]
+        return self.router.ranked(self.route_section, self.current_model)
+
+    def _failover_chain(self, primary_model: str, candidates: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Yield the models to try for one request, primary first
+        
+        Fallbacks are only selected when the caller asks for the next model,
+        so a request that succeeds on the primary never consults them.
+        
+        Args:
+            primary_model (str): Model configured for this assistant
+            candidates (List[str], optional): Routed candidates, tried in order before other fallbacks
+        
+        Returns:
+            Iterator[str]: Primary model and candidates, then fallbacks from _select_fallback_model
+        """
+        tried = []
+        for model in candidates or [primary_model]:
+            if model not in tried:
+                tried.append(model)
+                yield model
+        model = tried[-1]
+        for _ in range(len(self.model_config)):
+            model = self._select_fallback_model(model)
+            if model not in tried:
+                tried.append(model)
+                yield model
+
     def _handle_api_failure(self, 
                            method_name: str, 
                            error: Exception, 
@@ -185,7 +407,7 @@ RECOMMENDED MITIGATION STRATEGIES:
 - Verify internet connectivity
 - Regenerate API authentication token
 - Switch to alternative research model
-- Implement exponential backoff retry mechanism
+- Automatic retries and model failover were exhausted
 - Consult multiple medical research databases
 
 CRITICAL ADVISORY:
@@ -199,6 +421,9 @@ SYSTEM RECOMMENDATIONS:
 - Check system logs for detailed error trace
 - Contact technical support if issue persists
 
+CIRCUIT BREAKER STATE:
+{json.dumps(circuit_breaker_snapshot(), indent=2)}
+
 Timestamp: {datetime.datetime.now().isoformat()}
 Error Tracking ID: {uuid.uuid4()}"""
 
@@ -208,99 +433,755 @@ Error Tracking ID: {uuid.uuid4()}"""
         
         return error_report
 
-    def _generate_llama_response(self, prompt: str) -> str:
+    def _build_request(self, prompt: str, model: str, max_tokens: int = 2000,
+                       response_format: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Build headers and payload for a chat completion request
+        
+        Args:
+            prompt (str): Input prompt for the model
+            model (str): Model to address
+            max_tokens (int): Completion token cap for the task
+            response_format (Dict[str, Any], optional): Requests structured JSON output
+                instead of a narrative
+        
+        Returns:
+            Tuple[Dict[str, str], Dict[str, Any]]: Request headers and JSON payload
+        """
+        # Prepare headers for API request
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/Codeium/ai-healthcare-research",
+            "X-Title": "AI Healthcare Research Assistant"
+        }
+        
+        # Construct payload with extremely strict instructions
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": NARRATIVE_SYSTEM.render()
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,  # Extremely low for consistency
+            "max_tokens": max_tokens,
+            "top_p": 0.7,
+            "frequency_penalty": 0.9,  # Extremely high to prevent repetition
+            "presence_penalty": 0.9,
+            "stop": ["Solution", "Solution:", "Treatment Name:", "Mechanism of Action:"]
+        }
+        
+        if response_format is not None:
+            # Narrative rules, stop words and repetition penalties would break JSON
+            payload["messages"][0]["content"] = STRUCTURED_SYSTEM.render()
+            for key in ("stop", "frequency_penalty", "presence_penalty"):
+                del payload[key]
+            payload["response_format"] = response_format
+        
+        return headers, payload
+
+    def _request_cache_key(self, prompt: str, payload: Dict[str, Any], prompt_version: Optional[str] = None) -> str:
+        """
+        Build the response cache key for a prepared request
+        
+        Args:
+            prompt (str): Input prompt for the model
+            payload (Dict[str, Any]): Request payload from _build_request
+            prompt_version (str, optional): Version hash of the prompt template
+        
+        Returns:
+            str: Cache key covering model, system prompt, sampling parameters,
+                template versions and prompt
+        """
+        params = {key: value for key, value in payload.items() if key not in ('model', 'messages', 'stream')}
+        params["templates"] = [NARRATIVE_SYSTEM.version if 'response_format' not in payload
+                               else STRUCTURED_SYSTEM.version, prompt_version]
+        return make_cache_key(payload['model'], payload['messages'][0]['content'], params, prompt)
+
+    async def _invalidate_cached(self, prompt: str, task: str, prompt_version: Optional[str] = None):
+        """
+        Drop cached answers to a prompt for every configured model
+        
+        The next request for the prompt is generated fresh and cached again.
+        
+        Args:
+            prompt (str): Prompt as passed to _generate_llama_response_async
+            task (str): Task name
+            prompt_version (str, optional): Version hash of the prompt template
+        """
+        prompt = self._fit_prompt(prompt, task)
+        max_tokens = get_task_budget(task).completion_tokens
+        for model in list(self.model_config):
+            _, payload = self._build_request(prompt, model, max_tokens)
+            await asyncio.to_thread(self.response_cache.delete,
+                                    self._request_cache_key(prompt, payload, prompt_version))
+
+    def _fit_prompt(self, prompt: str, task: str) -> str:
+        """
+        Trim a prompt that exceeds its task's prompt budget
+        
+        The middle of the prompt is dropped so both the opening context and
+        the trailing output instructions survive.
+        
+        Args:
+            prompt (str): Input prompt for the model
+            task (str): Task name used to look up the budget
+        
+        Returns:
+            str: Prompt within the budget
+        """
+        budget = get_task_budget(task)
+        if estimate_tokens(prompt) <= budget.prompt_tokens:
+            return prompt
+        self.logger.warning(f"Prompt for task '{task}' exceeds {budget.prompt_tokens} tokens; trimming")
+        return fit_to_budget(prompt, budget.prompt_tokens, task, part="prompt", tail_fraction=0.3)
+
+    def _record_call(self, model: str, task: str, mode: str,
+                     timings: http_transport.RequestTimings, usage: Optional[Dict[str, Any]],
+                     failed: Optional[bool] = None):
+        """
+        Record latency, status and token metrics for one provider attempt
+        
+        Attempts that never reached the transport (rate-limit overflow,
+        cancellation while queued) are not recorded.
+        
+        Args:
+            model (str): Model addressed by the request
+            task (str): Calling task
+            mode (str): "complete", "stream" or "local"
+            timings (RequestTimings): Timings filled in by the transport
+            usage (Dict[str, Any], optional): Provider "usage" block
+            failed (bool, optional): Health outcome for the router; None when the
+                attempt says nothing about the model (cancelled, client error)
+        """
+        if timings.started is None:
+            return
+        if failed is not None and self.route_section is not None:
+            # Streams are timed to the end of generation, which the latency SLO does not cover
+            latency = timings.total if mode == "complete" and not failed else None
+            self.router.record(self.route_section, model, latency, failed)
+        # A stream closed early is finalized by the transport loop later; stop the clock now
+        timings.finish()
+        
+        metrics = get_metrics()
+        labels = {"model": model, "section": self.section or "default", "task": task, "mode": mode}
+        metrics.increment("llm_requests_total",
+                          labels=dict(labels, status=timings.status_code or "error"))
+        metrics.observe("llm_request_duration_seconds", timings.total, labels)
+        if timings.ttfb is not None:
+            metrics.observe("llm_request_ttfb_seconds", timings.ttfb, labels)
+            metrics.observe("llm_request_connect_seconds", timings.connect, labels)
+        
+        if usage:
+            token_labels = {"model": model, "section": self.section or "default", "task": task}
+            metrics.increment("llm_prompt_tokens_total", usage.get('prompt_tokens') or 0, token_labels)
+            metrics.increment("llm_completion_tokens_total", usage.get('completion_tokens') or 0, token_labels)
+
+    def _generate_llama_response(self, prompt: str, use_cache: bool = True, task: str = "default",
+                                 response_format: Optional[Dict[str, Any]] = None,
+                                 prompt_version: Optional[str] = None) -> str:
         """
         Generate a response using the current model with enhanced error handling
         
         Args:
             prompt (str): Input prompt for the model
+            use_cache (bool): Set False to bypass the response cache
+            task (str): Task name selecting the prompt and completion token budget
+            response_format (Dict[str, Any], optional): Structured output request; the
+                raw JSON text is returned without narrative clean-up
+            prompt_version (str, optional): Version hash of the prompt template, part of the cache key
+        
+        Returns:
+            str: Generated response text
+        """
+        return http_transport.run_sync(self._generate_llama_response_async(
+            prompt, use_cache=use_cache, task=task, response_format=response_format, prompt_version=prompt_version
+        ))
+
+    async def _generate_llama_response_async(self, prompt: str, use_cache: bool = True, task: str = "default",
+                                             response_format: Optional[Dict[str, Any]] = None,
+                                             prompt_version: Optional[str] = None) -> str:
+        """
+        Async counterpart of _generate_llama_response
+        
+        The request is awaited on the shared transport loop and counts against
+        the process-wide concurrency semaphore, so one event loop can keep many
+        generations in flight without tying up a thread per call. Transient
+        failures are retried with backoff, then failed over along
+        _failover_chain; client errors such as 401 are raised immediately.
+        With hedging enabled, a slow primary is raced against its fallback.
+        Concurrent identical requests are coalesced into one provider call.
+        
+        Args:
+            prompt (str): Input prompt for the model
+            use_cache (bool): Set False to bypass the response cache
+            task (str): Task name selecting the prompt and completion token budget
+            response_format (Dict[str, Any], optional): Structured output request
+            prompt_version (str, optional): Version hash of the prompt template
+        
+        Returns:
+            str: Generated response text
+        """
+        # Route once so a concurrent change cannot split one request
+        candidates = self._route()
+        primary_model = candidates[0]
+        prompt = self._fit_prompt(prompt, task)
+        
+        backend = self.backend_policy.backend_for(task)
+        if backend is not None:
+            try:
+                return await self._generate_local(backend, prompt, use_cache, task, response_format, prompt_version)
+            except Exception as e:
+                self.logger.warning(f"Local backend failed for task '{task}', using remote provider: {e}")
+        
+        def generate():
+            return self._generate_with_failover(prompt, primary_model, use_cache, task, response_format,
+                                                prompt_version, candidates)
+        
+        if not use_cache:
+            return await generate()
+        
+        # Identical concurrent requests share one provider call
+        _, payload = self._build_request(prompt, primary_model, get_task_budget(task).completion_tokens,
+                                         response_format)
+        cache_key = self._request_cache_key(prompt, payload, prompt_version)
+        
+        async def lookup():
+            return await asyncio.to_thread(self.response_cache.get, cache_key)
+        
+        return await self.single_flight.do(cache_key, generate,
+                                           lookup if self.response_cache.enabled else None)
+
+    async def _generate_local(self, backend: GenerationBackend, prompt: str, use_cache: bool, task: str,
+                              response_format: Optional[Dict[str, Any]] = None,
+                              prompt_version: Optional[str] = None) -> str:
+        """
+        Generate a response with a local backend, skipping the network entirely
+        
+        Args:
+            backend (GenerationBackend): Local backend chosen by the policy
+            prompt (str): Input prompt, already fitted to the task budget
+            use_cache (bool): Set False to bypass the response cache
+            task (str): Task name selecting the completion token budget
+            response_format (Dict[str, Any], optional): Structured output request
+            prompt_version (str, optional): Version hash of the prompt template
         
         Returns:
             str: Generated response text
         """
+        model = f"local/{getattr(backend, 'model_name', backend.name)}"
+        max_tokens = get_task_budget(task).completion_tokens
+        
+        cache_key = None
+        if use_cache and self.response_cache.enabled:
+            _, payload = self._build_request(prompt, model, max_tokens, response_format)
+            cache_key = self._request_cache_key(prompt, payload, prompt_version)
+            cached_text = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached_text is not None:
+                return cached_text
+        
+        timings = http_transport.RequestTimings()
+        timings.start()
         try:
-            # Prepare headers for API request
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://github.com/Codeium/ai-healthcare-research",
-                "X-Title": "AI Healthcare Research Assistant"
-            }
-            
-            # Construct payload with extremely strict instructions
-            payload = {
-                "model": self.current_model,
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": """You are an advanced medical research AI assistant.
-                        
-ABSOLUTE REQUIREMENTS:
-- Generate ONLY single, flowing narratives
-- NO numbered solutions or lists
-- NO sections starting with "Treatment Name:", "Mechanism:", etc.
-- Professional medical language
-- Integrated treatment descriptions
-- Maximum 500 words"""
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.1,  # Extremely low for consistency
-                "max_tokens": 2000,
-                "top_p": 0.7,
-                "frequency_penalty": 0.9,  # Extremely high to prevent repetition
-                "presence_penalty": 0.9,
-                "stop": ["Solution", "Solution:", "Treatment Name:", "Mechanism of Action:"]
-            }
-            
-            # Make API request
-            response = requests.post(
-                self.api_base_url, 
-                headers=headers, 
-                json=payload,
-                timeout=30
-            )
+            generated_text = await backend.generate(prompt, max_tokens)
+            timings.status_code = 200
+        finally:
+            self._record_call(model, task, "local", timings, None)
+        
+        generated_text = clean_response(generated_text) if response_format is None else generated_text.strip()
+        if cache_key is not None:
+            await asyncio.to_thread(self.response_cache.set, cache_key, generated_text)
+        return generated_text
+
+    async def _generate_with_failover(self, prompt: str, primary_model: str, use_cache: bool, task: str,
+                                      response_format: Optional[Dict[str, Any]] = None,
+                                      prompt_version: Optional[str] = None,
+                                      candidates: Optional[List[str]] = None) -> str:
+        """
+        Generate a response, failing over from primary_model on transient errors
+        
+        Args:
+            prompt (str): Input prompt, already fitted to the task budget
+            primary_model (str): First model to try
+            use_cache (bool): Set False to bypass the response cache
+            task (str): Task name selecting the completion token budget
+            response_format (Dict[str, Any], optional): Structured output request
+            prompt_version (str, optional): Version hash of the prompt template
+            candidates (List[str], optional): Routed candidates, primary first
+        
+        Returns:
+            str: Generated response text
+        """
+        max_tokens = get_task_budget(task).completion_tokens
+        
+        try:
+            # An answer cached for another candidate of the section is as good as a new one
+            if use_cache and self.response_cache.enabled:
+                for model in (candidates or [])[1:]:
+                    _, payload = self._build_request(prompt, model, max_tokens, response_format)
+                    cached_text = await asyncio.to_thread(self.response_cache.get,
+                                                          self._request_cache_key(prompt, payload, prompt_version))
+                    if cached_text is not None:
+                        return cached_text
             
-            if response.status_code == 200:
-                response_data = response.json()
-                generated_text = response_data['choices'][0]['message']['content'].strip()
+            last_error: Optional[Exception] = None
+            for model in self._failover_chain(primary_model, candidates):
+                headers, payload = self._build_request(prompt, model, max_tokens, response_format)
+                
+                # Serve identical requests from the persistent response cache
+                cache_key = None
+                if use_cache and self.response_cache.enabled:
+                    cache_key = self._request_cache_key(prompt, payload, prompt_version)
+                    cached_text = await asyncio.to_thread(self.response_cache.get, cache_key)
+                    if cached_text is not None:
+                        return cached_text
+                
+                if model != primary_model:
+                    get_metrics().increment("llm_failovers_total",
+                                            labels={"from_model": primary_model, "to_model": model})
                 
-                # Remove any remaining solution-like patterns
-                import re
-                patterns_to_remove = [
-                    r'^Solution \d+:.*$',
-                    r'^Solution:.*$',
-                    r'^Treatment Name:.*$',
-                    r'^Mechanism of Action:.*$',
-                    r'^Potential Effectiveness:.*$',
-                    r'^Research Status:.*$',
-                    r'^Potential Side Effects:.*$',
-                    r'^\d+\.\s*',
-                    r'^[A-Za-z]+\s*\d+:.*$'
-                ]
+                try:
+                    if model == primary_model and self.hedge_policy.enabled:
+                        answered_by, response_data = await self._post_hedged(model, headers, payload, task)
+                    else:
+                        answered_by, response_data = model, await self._post_with_retries(model, headers, payload,
+                                                                                          task)
+                except Exception as e:
+                    # Only transient failures justify trying the next model
+                    if not (isinstance(e, CircuitOpenError) or is_retryable(e)):
+                        raise
+                    last_error = e
+                    continue
                 
-                for pattern in patterns_to_remove:
-                    generated_text = re.sub(pattern, '', generated_text, flags=re.MULTILINE)
+                generated_text = response_data['choices'][0]['message']['content'] or ""
+                generated_text = clean_response(generated_text) if response_format is None else generated_text.strip()
                 
-                # Clean up the text
-                lines = [line.strip() for line in generated_text.split('\n') if line.strip()]
-                generated_text = '\n\n'.join(lines)
+                # A hedged answer is cached under the request that produced it
+                if cache_key is not None and answered_by != model:
+                    cache_key = self._request_cache_key(prompt, dict(payload, model=answered_by), prompt_version)
+                if cache_key is not None:
+                    await asyncio.to_thread(self.response_cache.set, cache_key, generated_text)
                 
                 return generated_text
             
-            raise Exception(f"API request failed with status code {response.status_code}")
+            raise last_error or CircuitOpenError(f"No model available for {primary_model}")
             
         except Exception as e:
             self.logger.error(f"Error in generating response: {e}")
+            self._record_error('_generate_llama_response_async', e)
+            raise
+
+    async def _post_with_retries(self, model: str, headers: Dict[str, str], payload: Dict[str, Any],
+                                 task: str = "default") -> Dict[str, Any]:
+        """
+        Send a completion request, retrying transient failures with backoff
+        
+        Rate limits and 5xx responses are retried with jittered exponential
+        backoff that honors Retry-After. Every outcome is reported to the
+        model's circuit breaker, and every attempt to _record_call.
+        
+        Args:
+            model (str): Model addressed by the payload
+            headers (Dict[str, str]): Request headers
+            payload (Dict[str, Any]): Request payload
+            task (str): Calling task, used as a metrics label
+        
+        Returns:
+            Dict[str, Any]: Parsed JSON response body
+        """
+        breaker = get_circuit_breaker(model)
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit breaker open for {model}")
+            
+            try:
+                # Queue for host-wide rate-limit capacity instead of drawing a 429
+                estimated_tokens = self._estimate_request_tokens(payload)
+                await self.rate_limiter.acquire(self.rate_limit_buckets, estimated_tokens, self.section or "default")
+                
+                # Make API request over the shared keep-alive connection pool
+                timings = http_transport.RequestTimings()
+                usage = None
+                failed = None
+                try:
+                    response = await http_transport.apost(self.api_base_url, timings=timings,
+                                                          headers=headers, json=payload)
+                    if response.status_code != 200:
+                        raise http_transport.TransportStatusError(response.status_code, response.headers,
+                                                                  response.text)
+                    response_data = response.json()
+                    usage = response_data.get('usage')
+                    failed = False
+                except Exception as e:
+                    failed = True if is_retryable(e) else None
+                    raise
+                finally:
+                    self._record_call(model, task, "complete", timings, usage, failed)
+                get_latency_history(model).record(timings.total)
+                
+                # Give back what the completion cap over-reserved
+                used_tokens = (usage or {}).get('total_tokens')
+                if used_tokens:
+                    await asyncio.to_thread(self.rate_limiter.refund, self.rate_limit_buckets,
+                                            estimated_tokens - used_tokens)
+            
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                
+                delay = self.retry_policy.backoff(attempt, parse_retry_after(e))
+                if delay is None:
+                    raise
+                self.logger.warning(f"Retrying {model} in {delay:.2f}s after attempt {attempt} failed: {e}")
+                get_metrics().increment("llm_retries_total", labels={"model": model})
+                await asyncio.sleep(delay)
+                continue
+            
+            breaker.record_success()
+            return response_data
+
+    async def _post_hedged(self, model: str, headers: Dict[str, str], payload: Dict[str, Any],
+                           task: str = "default") -> Tuple[str, Dict[str, Any]]:
+        """
+        Send a request and hedge it to the fallback model on a slow tail
+        
+        If the primary has not answered within the hedge delay derived from
+        its latency history, the same prompt goes to the fallback model. The
+        first successful answer wins and the other request is cancelled.
+        
+        Args:
+            model (str): Primary model
+            headers (Dict[str, str]): Request headers for the primary
+            payload (Dict[str, Any]): Request payload for the primary
+            task (str): Calling task, used as a metrics label
+        
+        Returns:
+            Tuple[str, Dict[str, Any]]: Model that answered and its parsed response
+        """
+        primary = asyncio.ensure_future(self._post_with_retries(model, headers, payload, task))
+        tasks = {primary: model}
+        
+        try:
+            delay = self.hedge_policy.hedge_delay(model)
+            if delay is not None:
+                await asyncio.wait([primary], timeout=delay)
+                fallback_model = self._select_fallback_model(model) if not primary.done() else model
+                if fallback_model != model:
+                    self.logger.info(f"Hedging {model} after {delay:.2f}s with {fallback_model}")
+                    get_metrics().increment("llm_hedges_total", labels={"model": model})
+                    tasks[asyncio.ensure_future(
+                        self._post_with_retries(fallback_model, headers, dict(payload, model=fallback_model), task)
+                    )] = fallback_model
+            
+            pending = set(tasks)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        if tasks[finished] != model:
+                            get_metrics().increment("llm_hedge_wins_total", labels={"model": tasks[finished]})
+                        return tasks[finished], finished.result()
+                    last_error = finished.exception()
+            raise last_error
+        
+        finally:
+            for attempt in tasks:
+                if not attempt.done():
+                    attempt.cancel()
+
+    def stream_llama_response(self, prompt: str, use_cache: bool = True, task: str = "default",
+                              prompt_version: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a response as cleaned text chunks
+        
+        Synchronous wrapper over stream_llama_response_async
+        """
+        return http_transport.iterate_sync(self.stream_llama_response_async(
+            prompt, use_cache=use_cache, task=task, prompt_version=prompt_version
+        ))
+
+    async def stream_llama_response_async(self, prompt: str, use_cache: bool = True, task: str = "default",
+                                          prompt_version: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a response from the provider using server-sent events
+        
+        Chunks go through StreamingResponseCleaner, so the concatenated chunks
+        equal the cleaned text _generate_llama_response would return. The full
+        text is stored in the response cache once the stream completes, and a
+        cache hit is yielded as a single chunk. Transient failures are retried
+        and failed over to other models only before the first chunk is yielded.
+        
+        Args:
+            prompt (str): Input prompt for the model
+            use_cache (bool): Set False to bypass the response cache
+            task (str): Task name selecting the prompt and completion token budget
+            prompt_version (str, optional): Version hash of the prompt template
+        
+        Returns:
+            AsyncIterator[str]: Cleaned text chunks as they arrive
+        """
+        candidates = self._route()
+        primary_model = candidates[0]
+        max_tokens = get_task_budget(task).completion_tokens
+        prompt = self._fit_prompt(prompt, task)
+        last_error: Optional[Exception] = None
+        
+        for model in self._failover_chain(primary_model, candidates):
+            headers, payload = self._build_request(prompt, model, max_tokens)
+            
+            cache_key = None
+            if use_cache and self.response_cache.enabled:
+                cache_key = self._request_cache_key(prompt, payload, prompt_version)
+                cached_text = await asyncio.to_thread(self.response_cache.get, cache_key)
+                if cached_text is not None:
+                    yield cached_text
+                    return
+            
+            if model != primary_model:
+                get_metrics().increment("llm_failovers_total",
+                                        labels={"from_model": primary_model, "to_model": model})
+            
+            payload["stream"] = True
+            breaker = get_circuit_breaker(model)
+            attempt = 0
+            
+            while True:
+                attempt += 1
+                if not breaker.allow_request():
+                    last_error = CircuitOpenError(f"Circuit breaker open for {model}")
+                    break
+                
+                cleaner = StreamingResponseCleaner()
+                chunks = []
+                timings = http_transport.RequestTimings()
+                usage = None
+                failed = None
+                
+                try:
+                    await self.rate_limiter.acquire(self.rate_limit_buckets, self._estimate_request_tokens(payload),
+                                                    self.section or "default")
+                    async for line in http_transport.astream_post_lines(self.api_base_url, timings=timings,
+                                                                        headers=headers, json=payload):
+                        # Skip SSE comments and keep-alive blank lines
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        event = json.loads(data)
+                        if event.get("error"):
+                            raise Exception(f"Provider stream error: {event['error']}")
+                        # The final event carries token usage when the provider reports it
+                        usage = event.get("usage") or usage
+                        choices = event.get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content") or ""
+                        
+                        text = cleaner.feed(delta)
+                        if text:
+                            chunks.append(text)
+                            yield text
+                    
+                    text = cleaner.finish()
+                    if text:
+                        chunks.append(text)
+                        yield text
+                    failed = False
+                
+                except Exception as e:
+                    retryable = is_retryable(e)
+                    failed = True if retryable else None
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        breaker.release()
+                    
+                    # Text already reached the reader, so the stream cannot be replayed
+                    delay = self.retry_policy.backoff(attempt, parse_retry_after(e)) if retryable else None
+                    if chunks or not retryable:
+                        self.logger.error(f"Error in streaming response: {e}")
+                        self._record_error('stream_llama_response_async', e)
+                        raise
+                    
+                    last_error = e
+                    if delay is None:
+                        break
+                    self.logger.warning(f"Retrying stream from {model} in {delay:.2f}s after attempt {attempt} failed: {e}")
+                    get_metrics().increment("llm_retries_total", labels={"model": model})
+                    await asyncio.sleep(delay)
+                    continue
+                
+                except BaseException:
+                    # Reader closed the stream or the task was cancelled
+                    breaker.release()
+                    raise
+                
+                finally:
+                    self._record_call(model, task, "stream", timings, usage, failed)
+                
+                breaker.record_success()
+                if cache_key is not None:
+                    await asyncio.to_thread(self.response_cache.set, cache_key, ''.join(chunks))
+                return
+        
+        error = last_error or CircuitOpenError(f"No model available for {primary_model}")
+        self.logger.error(f"Error in streaming response: {error}")
+        self._record_error('stream_llama_response_async', error)
+        raise error
+
+    def generate_many(self, prompts: List[str], max_concurrency: int = 8) -> List[GenerationResult]:
+        """
+        Generate responses for a list of prompts over a bounded worker pool
+        
+        Synchronous wrapper over generate_many_async
+        """
+        return http_transport.run_sync(self.generate_many_async(prompts, max_concurrency=max_concurrency))
+
+    async def generate_many_async(self, prompts: List[str], max_concurrency: int = 8) -> List[GenerationResult]:
+        """
+        Generate responses for a list of prompts over a bounded worker pool
+        
+        A failing prompt is recorded on its own result instead of failing the
+        batch, and results are returned in input order.
+        
+        Args:
+            prompts (List[str]): Prompts to generate
+            max_concurrency (int): Maximum prompts in flight for this batch
+        
+        Returns:
+            List[GenerationResult]: One result per prompt, in input order
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        results: List[Optional[GenerationResult]] = [None] * len(prompts)
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, prompt in enumerate(prompts):
+            queue.put_nowait((index, prompt))
+        
+        async def worker():
+            while True:
+                try:
+                    index, prompt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    text = await self._generate_llama_response_async(prompt)
+                    results[index] = GenerationResult(index, prompt, text=text,
+                                                      elapsed=time.perf_counter() - started)
+                except Exception as e:
+                    results[index] = GenerationResult(index, prompt, error=e,
+                                                      elapsed=time.perf_counter() - started)
+        
+        workers = min(max_concurrency, len(prompts))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        
+        failures = sum(1 for result in results if not result.ok)
+        if failures:
+            self.logger.warning(f"Batch generation finished with {failures}/{len(prompts)} failures")
+        return results
+
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], name: str,
+                            task: str = "default", prompt_version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a JSON document that satisfies a schema in one model call
+        
+        Synchronous wrapper over generate_structured_async
+        """
+        return http_transport.run_sync(self.generate_structured_async(
+            prompt, schema, name, task=task, prompt_version=prompt_version
+        ))
+
+    async def generate_structured_async(self, prompt: str, schema: Dict[str, Any], name: str,
+                                        task: str = "default", prompt_version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a JSON document that satisfies a schema in one model call
+        
+        The schema is requested through response_format (see
+        structured_output_mode) and also shown in the prompt for models
+        that ignore it. The reply is repaired locally if it is malformed or
+        cut off by the token limit, then checked against the schema with
+        defaults filled in, so no second call is needed to structure it.
+        
+        Args:
+            prompt (str): Instructions for the content of the document
+            schema (Dict[str, Any]): JSON schema the document must satisfy
+            name (str): Schema name reported to the provider
+            task (str): Task name selecting the prompt and completion token budget
+            prompt_version (str, optional): Version hash of the prompt template
+        
+        Returns:
+            Dict[str, Any]: Schema-conforming document
+        
+        Raises:
+            StructuredOutputError: The reply could not be recovered or lacks required fields
+        """
+        # The shape depends only on the schema, so it leads the cacheable prefix
+        structured_prompt = self._structured_shape(schema) + prompt
+        
+        response_text = await self._generate_llama_response_async(
+            structured_prompt, task=task, response_format=response_format_for(schema, name, self.structured_output_mode),
+            prompt_version=f"{STRUCTURED_SHAPE.version}:{prompt_version}"
+        )
+        
+        try:
+            document, problems = parse_structured(response_text, schema)
+        except StructuredOutputError:
+            get_metrics().increment("llm_structured_output_total", labels={"task": task, "outcome": "invalid"})
             raise
+        
+        outcome = "repaired" if problems else "valid"
+        if problems:
+            self.logger.info(f"Structured output for '{task}' needed fixes: {'; '.join(problems[:5])}")
+        get_metrics().increment("llm_structured_output_total", labels={"task": task, "outcome": outcome})
+        return document
+
+    @staticmethod
+    def _structured_shape(schema: Dict[str, Any]) -> str:
+        """
+        Render the shape prefix generate_structured_async puts before the prompt
+        """
+        return STRUCTURED_SHAPE.render(shape=json.dumps(schema_template(schema), indent=2))
+
+    def _treatment_fallback(self) -> Dict[str, Any]:
+        """
+        Placeholder treatment record built from the schema defaults
+        """
+        document, _ = conform({"treatment_name": "Comprehensive Medical Analysis"}, TREATMENT_INNOVATION_SCHEMA)
+        return document
 
     def validate_medical_response(self, response: str) -> Dict[str, Any]:
         """
         Advanced validation and structuring of medical treatment response
         
+        Synchronous wrapper over validate_medical_response_async
+        """
+        return http_transport.run_sync(self.validate_medical_response_async(response))
+
+    async def validate_medical_response_async(self, response: str) -> Dict[str, Any]:
+        """
+        Advanced validation and structuring of medical treatment response
+        
+        Structures text that was already generated. New code should request
+        the structure directly with generate_structured_async instead of
+        generating free text first.
+        
         Args:
             response (str): Raw model-generated response
         
@@ -308,99 +1189,19 @@ ABSOLUTE REQUIREMENTS:
             Dict[str, Any]: Structured and validated medical treatment information
         """
         try:
-            # Use another Llama call for advanced validation and structuring
-            validation_prompt = f"""ADVANCED MEDICAL RESPONSE VALIDATION
-
-Analyze the following medical treatment description and STRICTLY STRUCTURE it:
-
-{response}
-
-MANDATORY VALIDATION CRITERIA:
-1. Verify scientific accuracy
-2. Confirm research-based claims
-3. Ensure comprehensive medical insights
-4. Validate statistical claims
-5. Check for recent research references
-
-REQUIRED STRUCTURED OUTPUT FORMAT (JSON):
-{{
-    "treatment_name": "Precise Medical Intervention Name",
-    "mechanism_of_action": "Detailed Molecular/Physiological Explanation",
-    "research_status": {{
-        "clinical_phase": "Exact Trial Phase",
-        "publication_details": "Journal Name, Year, DOI",
-        "current_research_stage": "Ongoing/Completed/Approved"
-    }},
-    "potential_effectiveness": {{
-        "statistical_evidence": "Percentage Improvement",
-        "comparative_analysis": "Comparison with Standard Treatments",
-        "patient_response_rate": "Quantitative Success Rate"
-    }},
-    "patient_populations": {{
-        "target_demographics": "Specific Age, Gender, Condition Criteria",
-        "inclusion_criteria": "Detailed Patient Selection Parameters",
-        "exclusion_criteria": "Conditions Preventing Treatment"
-    }},
-    "clinical_evidence": [
-        {{
-            "research_paper": "Full Citation",
-            "key_findings": "Summarized Research Outcomes"
-        }}
-    ],
-    "emerging_innovations": "Cutting-Edge Technological Advancements",
-    "safety_profile": {{
-        "common_side_effects": "Documented Adverse Reactions",
-        "rare_side_effects": "Uncommon but Potential Risks",
-        "long_term_implications": "Projected Health Impacts"
-    }}
-}}
-
-Ensure MAXIMUM scientific rigor and precision!"""
-            
-            # Generate structured response
-            structured_response = self._generate_llama_response(validation_prompt)
+            # Leave room for the shape prefix, so the description is trimmed once, here
+            shape_tokens = estimate_tokens(self._structured_shape(TREATMENT_INNOVATION_SCHEMA))
+            validation_prompt = VALIDATION.render_within_budget("validation", "description", response,
+                                                                reserved_tokens=shape_tokens)
             
-            # Parse the structured response
             try:
-                # Attempt to parse as JSON
-                parsed_response = json.loads(structured_response)
-                
-                # Additional validation
-                if not parsed_response.get('treatment_name'):
-                    raise ValueError("Invalid or incomplete medical response")
-                
-                return parsed_response
-            
-            except (json.JSONDecodeError, ValueError) as parse_error:
+                return await self.generate_structured_async(
+                    validation_prompt, TREATMENT_INNOVATION_SCHEMA, "treatment_innovation", task="validation",
+                    prompt_version=VALIDATION.version
+                )
+            except StructuredOutputError as parse_error:
                 self.logger.warning(f"Response parsing error: {parse_error}")
-                
-                # Fallback structured response
-                return {
-                    "treatment_name": "Comprehensive Medical Analysis",
-                    "mechanism_of_action": "Advanced research-based medical evaluation",
-                    "research_status": {
-                        "clinical_phase": "Preliminary",
-                        "publication_details": "Ongoing research",
-                        "current_research_stage": "Investigation"
-                    },
-                    "potential_effectiveness": {
-                        "statistical_evidence": "Requires further investigation",
-                        "comparative_analysis": "Insufficient current data",
-                        "patient_response_rate": "Not yet determined"
-                    },
-                    "patient_populations": {
-                        "target_demographics": "Broad medical research context",
-                        "inclusion_criteria": "Comprehensive medical assessment needed",
-                        "exclusion_criteria": "To be defined through further research"
-                    },
-                    "clinical_evidence": [],
-                    "emerging_innovations": "Continuous medical research exploration",
-                    "safety_profile": {
-                        "common_side_effects": "Not yet comprehensively documented",
-                        "rare_side_effects": "Requires extensive clinical trials",
-                        "long_term_implications": "Ongoing medical investigation"
-                    }
-                }
+                return self._treatment_fallback()
         
         except Exception as e:
             self.logger.error(f"Comprehensive medical response validation failed: {e}")
@@ -416,56 +1217,36 @@ Ensure MAXIMUM scientific rigor and precision!"""
         """
         Advanced Treatment Innovation Tracking using Gemini model
         
+        Synchronous wrapper over track_treatment_innovations_async
+        """
+        return http_transport.run_sync(self.track_treatment_innovations_async(disease))
+
+    async def track_treatment_innovations_async(self, disease: str) -> List[Dict[str, Any]]:
+        """
+        Advanced Treatment Innovation Tracking using Gemini model
+        
         Args:
             disease (str): Target medical condition for innovation analysis
         
         Returns:
             List[Dict[str, Any]]: Comprehensive treatment innovation insights
         """
+        # Canonical name keeps spelling variants on one cached prompt
+        disease = canonical_disease_name(disease)
+        
         try:
-            # Comprehensive treatment innovation tracking prompt
-            innovation_tracking_prompt = f"""ADVANCED TREATMENT INNOVATION TRACKER: {disease}
-
-COMPREHENSIVE INNOVATION ANALYSIS FRAMEWORK:
-
-1. EMERGING TREATMENT TECHNOLOGIES
-- Identify breakthrough medical interventions
-- Analyze cutting-edge technological approaches
-- Assess potential paradigm-shifting methodologies
-
-2. RESEARCH LANDSCAPE
-- Map current research ecosystem
-- Highlight leading research institutions
-- Identify key research methodologies
-
-3. TECHNOLOGICAL INNOVATIONS
-- Breakthrough medical technologies
-- Advanced diagnostic techniques
-- Precision medicine approaches
-
-4. CLINICAL IMPACT ASSESSMENT
-- Potential patient outcome improvements
-- Comparative effectiveness analysis
-- Risk-benefit evaluation
-
-5. FUTURE TREND PREDICTIONS
-- Anticipated medical technology developments
-- Potential long-term clinical implications
-- Emerging research directions
-
-SPECIFIC FOCUS: {disease}
-
-MANDATORY REQUIREMENTS:
-- Provide scientifically validated information
-- Reference recent clinical research (last 3-5 years)
-- Quantify potential medical advancements
-- Maintain highest standards of medical research integrity"""
+            # Static tracker framework first, disease last
+            innovation_tracking_prompt = TREATMENT_INNOVATION.render(disease=disease)
             
-            # Generate comprehensive treatment innovation insights
-            innovation_text = self._generate_llama_response(innovation_tracking_prompt)
-            
-            # Validate and structure the response
-            structured_innovations = self.validate_medical_response(innovation_text)
+            # Generate the structured innovation record in a single call
+            try:
+                structured_innovations = await self.generate_structured_async(
+                    innovation_tracking_prompt, TREATMENT_INNOVATION_SCHEMA, "treatment_innovation",
+                    task="treatment_innovations", prompt_version=TREATMENT_INNOVATION.version
+                )
+            except StructuredOutputError as parse_error:
+                self.logger.warning(f"Response parsing error: {parse_error}")
+                structured_innovations = self._treatment_fallback()
             
             return [structured_innovations]
         
@@ -478,114 +1259,351 @@ MANDATORY REQUIREMENTS:
                 "recommendation": "Conduct comprehensive manual medical research review"
             }]
     
+    def _literature_review_prompt(self, research_topic: str) -> str:
+        """
+        Build the literature review prompt for a topic
+        
+        Args:
+            research_topic (str): Canonical research topic
+        
+        Returns:
+            str: Literature review prompt
+        """
+        return LITERATURE_REVIEW.render(research_topic=research_topic)
+
+    def _literature_review_error(self, research_topic: str, error: Exception) -> str:
+        """
+        Build the fallback text shown when a literature review fails
+        
+        Args:
+            research_topic (str): Research topic
+            error (Exception): Error encountered
+        
+        Returns:
+            str: Error report for the user
+        """
+        return f"""Literature Review Generation Error
+
+Research Topic: {research_topic}
+
+Unable to generate a comprehensive literature review due to the following error:
+{str(error)}
+
+Recommendations:
+- Verify the research topic specificity
+- Try a more focused or narrower research query
+- Check system connectivity and API availability
+- Consult with a research professional for manual review"""
+
     def generate_literature_review(self, research_topic: str) -> str:
         """
         Generate a comprehensive literature review with advanced medical insights
         
+        Synchronous wrapper over generate_literature_review_async
+        """
+        return http_transport.run_sync(self.generate_literature_review_async(research_topic))
+
+    async def generate_literature_review_async(self, research_topic: str) -> str:
+        """
+        Generate a comprehensive literature review with advanced medical insights
+        
         Args:
             research_topic (str): Topic for in-depth medical literature review
         
         Returns:
             str: Comprehensive literature review as plain text
         """
+        # Topics are free text, not disease names: only whitespace is normalized
+        research_topic = ' '.join(research_topic.split())
+        
+        if self.literature_review_mode == "sectioned":
+            return "".join([chunk async for chunk in self.stream_sectioned_literature_review_async(research_topic)])
+        
         try:
-            # Comprehensive literature review prompt
-            literature_review_prompt = f"""ADVANCED MEDICAL LITERATURE REVIEW
-
-Conduct an exhaustive literature review on the research topic: {research_topic}
-
-MANDATORY REVIEW COMPONENTS:
-1. Current State of Research
-2. Key Breakthrough Findings
-3. Methodological Approaches
-4. Conflicting Research Perspectives
-5. Emerging Research Trends
-6. Future Research Recommendations
-
-REVIEW GUIDELINES:
-- Reference minimum 5 peer-reviewed sources
-- Cover research from last 5-7 years
-- Provide critical analysis
-- Highlight scientific significance
-- Identify research gaps
-
-DETAILED OUTPUT REQUIREMENTS:
-- Comprehensive summary of existing research
-- Critical evaluation of methodologies
-- Identification of potential future research directions
-- Quantitative analysis of research trends"""
-            
             # Generate comprehensive literature review
-            literature_review_text = self._generate_llama_response(literature_review_prompt)
+            literature_review_text = await self._generate_llama_response_async(
+                self._literature_review_prompt(research_topic), task="literature_review",
+                prompt_version=LITERATURE_REVIEW.version
+            )
             
             return literature_review_text
         
         except Exception as e:
             self.logger.error(f"Literature review generation failed: {e}")
-            return f"""Literature Review Generation Error
+            return self._literature_review_error(research_topic, e)
 
-Research Topic: {research_topic}
+    def stream_literature_review(self, research_topic: str) -> Iterator[str]:
+        """
+        Stream a literature review as it is generated
+        
+        Synchronous wrapper over stream_literature_review_async
+        """
+        return http_transport.iterate_sync(self.stream_literature_review_async(research_topic))
 
-Unable to generate a comprehensive literature review due to the following error:
-{str(e)}
+    async def stream_literature_review_async(self, research_topic: str) -> AsyncIterator[str]:
+        """
+        Stream a literature review as it is generated
+        
+        Args:
+            research_topic (str): Topic for in-depth medical literature review
+        
+        Returns:
+            AsyncIterator[str]: Review text chunks; the error report if nothing was generated
+        """
+        research_topic = ' '.join(research_topic.split())
+        emitted = False
+        
+        if self.literature_review_mode == "sectioned":
+            async for chunk in self.stream_sectioned_literature_review_async(research_topic):
+                yield chunk
+            return
+        
+        try:
+            async for chunk in self.stream_llama_response_async(self._literature_review_prompt(research_topic),
+                                                                task="literature_review",
+                                                                prompt_version=LITERATURE_REVIEW.version):
+                emitted = True
+                yield chunk
+        
+        except Exception as e:
+            self.logger.error(f"Literature review streaming failed: {e}")
+            if not emitted:
+                yield self._literature_review_error(research_topic, e)
 
-Recommendations:
-- Verify the research topic specificity
-- Try a more focused or narrower research query
-- Check system connectivity and API availability
-- Consult with a research professional for manual review"""
+    def generate_sectioned_literature_review(self, research_topic: str,
+                                             refresh_sections: Iterable[str] = ()) -> str:
+        """
+        Generate a literature review one concurrent request per section
+        
+        Synchronous wrapper over stream_sectioned_literature_review_async
+        """
+        async def collect():
+            return "".join([chunk async for chunk in
+                            self.stream_sectioned_literature_review_async(research_topic, refresh_sections)])
+        return http_transport.run_sync(collect())
+
+    async def stream_sectioned_literature_review_async(self, research_topic: str,
+                                                       refresh_sections: Iterable[str] = ()) -> AsyncIterator[str]:
+        """
+        Generate every review section as its own request and yield them in order
+        
+        All sections start at once, so the review takes about as long as its
+        slowest section. Each section is cached under its own prompt: a
+        section that failed is left out of the cache and is the only one
+        generated again on the next request, and refresh_sections regenerates
+        named sections while the rest come from the cache.
+        
+        Args:
+            research_topic (str): Topic for in-depth medical literature review
+            refresh_sections (Iterable[str]): Section titles to regenerate despite cached answers
+        
+        Returns:
+            AsyncIterator[str]: Numbered sections, each yielded once it and the ones before it are done
+        """
+        research_topic = ' '.join(research_topic.split())
+        refresh = set(refresh_sections)
+        
+        async def generate_section(title: str, focus: str) -> str:
+            prompt = LITERATURE_REVIEW_SECTION.render(section=title, focus=focus, research_topic=research_topic)
+            if title in refresh:
+                await self._invalidate_cached(prompt, "literature_review_section", LITERATURE_REVIEW_SECTION.version)
+            return await self._generate_llama_response_async(prompt, task="literature_review_section",
+                                                             prompt_version=LITERATURE_REVIEW_SECTION.version)
+        
+        tasks = [asyncio.ensure_future(generate_section(title, focus))
+                 for title, focus in LITERATURE_REVIEW_SECTIONS]
+        # Failed sections are held back until some section succeeds, so a
+        # review that failed entirely is reported like the single-request one
+        held: List[str] = []
+        last_error: Optional[Exception] = None
+        succeeded = False
+        try:
+            for index, ((title, _), task) in enumerate(zip(LITERATURE_REVIEW_SECTIONS, tasks), start=1):
+                try:
+                    text = (await task).strip()
+                except Exception as e:
+                    self.logger.error(f"Literature review section '{title}' failed: {e}")
+                    last_error = e
+                    held.append(f"{index}. {title}\n\nThis section could not be generated ({e}). "
+                                f"Generating the review again retries only the missing sections.\n\n")
+                    if succeeded:
+                        yield held.pop()
+                    continue
+                succeeded = True
+                for chunk in held:
+                    yield chunk
+                held = []
+                yield f"{index}. {title}\n\n{text}\n\n"
+            if not succeeded:
+                yield self._literature_review_error(research_topic, last_error)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _extract_report_text(self, report_file: Any, max_chars: int = 15000,
+                             max_tokens: Optional[int] = None) -> str:
+        """
+        Extract plain text from an uploaded clinical report
+        
+        Args:
+            report_file (Any): Uploaded clinical report file
+            max_chars (int): Longest text returned
+            max_tokens (int, optional): Stop extracting PDF pages once this many tokens are read
+        
+        Returns:
+            str: Extracted report text
+        """
+        return extract_report_text(report_file, max_chars=max_chars, max_tokens=max_tokens)
+
+    def summarize_clinical_report(self, report_file: Any, sections: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Concise clinical report summarization with key insights
+        
+        Synchronous wrapper over summarize_clinical_report_async
+        """
+        return http_transport.run_sync(self.summarize_clinical_report_async(report_file, sections))
+
+    def _report_summary_key(self) -> str:
+        """
+        Describe how clinical summaries are currently produced
+        
+        Returns:
+            str: Upload cache key; changes with the mode, model and prompt templates
+        """
+        if self.clinical_summary_mode == "map_reduce":
+            versions = [CLINICAL_SUMMARY.version, CLINICAL_CHUNK_SUMMARY.version, CLINICAL_SUMMARY_REDUCE.version]
+        else:
+            versions = [CLINICAL_SUMMARY.version]
+        return ":".join(["summary", self.clinical_summary_mode, self.current_model,
+                         NARRATIVE_SYSTEM.version, SECTION_INDEX_VERSION] + versions)
+
+    def _report_text_key(self) -> str:
+        """
+        Describe how much report text the current mode extracts
+        
+        Returns:
+            str: Upload cache key for the extracted text
+        """
+        if self.clinical_summary_mode == "map_reduce":
+            return f"text:{self.clinical_report_max_chars}"
+        return f"text:{self.clinical_report_scan_chars}"
+
+    def cached_clinical_summary(self, report_file: Any,
+                                sections: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """
+        Get the stored summary of an identical report, without generating one
+        
+        Args:
+            report_file (Any): Uploaded clinical report file
+            sections (List[Dict[str, Any]], optional): Receives the report sections and
+                whether each was sent to the model
+        
+        Returns:
+            Optional[str]: Summary, or None if this content was not summarized yet
+        """
+        digest = content_digest(report_file)
+        summary_text = self.upload_cache.get(digest, self._report_summary_key())
+        if summary_text is not None and sections is not None:
+            full_text = self.upload_cache.get(digest, self._report_text_key())
+            if full_text is not None:
+                sections.extend(self._select_report_sections(full_text)[1])
+        return summary_text
+
+    async def _report_text(self, report_file: Any, digest: str) -> str:
+        """
+        Extract a report's text, reusing the text stored for identical content
+        
+        Args:
+            report_file (Any): Uploaded clinical report file
+            digest (str): Content digest of the file
+        
+        Returns:
+            str: Report text within the current mode's extraction budget
+        """
+        if self.clinical_summary_mode == "map_reduce":
+            max_chars = self.clinical_report_max_chars
+        else:
+            max_chars = self.clinical_report_scan_chars
+        key = self._report_text_key()
+        
+        full_text = await asyncio.to_thread(self.upload_cache.get, digest, key)
+        get_metrics().increment("report_cache_lookups_total",
+                                labels={"kind": "text", "result": "miss" if full_text is None else "hit"})
+        if full_text is None:
+            # PDF parsing is CPU-bound; keep it off the event loop
+            full_text = await asyncio.to_thread(self._extract_report_text, report_file, max_chars)
+            await asyncio.to_thread(self.upload_cache.set, digest, key, full_text)
+        return full_text
 
-    def summarize_clinical_report(self, report_file: Any) -> str:
+    def _select_report_sections(self, full_text: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Choose the report sections sent to the model
+        
+        A single-call summary gets the most valuable sections that fit its
+        prompt budget; map-reduce gets every section except boilerplate such
+        as references.
+        
+        Args:
+            full_text (str): Extracted report text
+        
+        Returns:
+            Tuple[str, List[Dict[str, Any]]]: Selected text and the per-section report
+        """
+        if self.clinical_summary_mode == "map_reduce":
+            return select_report_sections(full_text)
+        budget = get_task_budget("clinical_summary").prompt_tokens
+        return select_report_sections(full_text, budget - estimate_tokens(CLINICAL_SUMMARY.render(report="")))
+
+    async def summarize_clinical_report_async(self, report_file: Any,
+                                              sections: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Concise clinical report summarization with key insights
         
+        The report is indexed by section heading and the most relevant
+        sections are sent rather than its leading text. Summaries and
+        extracted text are stored under the file's content hash, so a rerun
+        or another upload of the same report is answered from the upload cache.
+        
         Args:
             report_file (Any): Uploaded clinical report file
+            sections (List[Dict[str, Any]], optional): Receives the report sections and
+                whether each was sent to the model
         
         Returns:
             str: Streamlined clinical report summary
         """
         try:
-            # Import PDF extraction library
-            import PyPDF2
-            import io
+            digest = await asyncio.to_thread(content_digest, report_file)
+            summary_key = self._report_summary_key()
+            summary_text = await asyncio.to_thread(self.upload_cache.get, digest, summary_key)
+            get_metrics().increment("report_cache_lookups_total",
+                                    labels={"kind": "summary", "result": "miss" if summary_text is None else "hit"})
+            if summary_text is not None and sections is None:
+                return summary_text
             
-            # Check if it's a PDF file
-            if report_file.name.lower().endswith('.pdf'):
-                # Create a PDF reader object
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(report_file.read()))
-                
-                # Extract text from all pages
-                full_text = ""
-                for page in pdf_reader.pages:
-                    full_text += page.extract_text() + "\n"
-                
-                # Truncate text if too long
-                full_text = full_text[:15000]  # Limit to first 15000 characters
-            else:
-                # For non-PDF files, try to decode
-                full_text = report_file.read().decode('utf-8', errors='ignore')
-            
-            # Concise clinical report summarization prompt
-            summarization_prompt = f"""CLINICAL REPORT SUMMARY
-
-Report Context: {full_text[:2000]}
-
-SUMMARY REQUIREMENTS:
-- Extract core medical findings
-- Highlight key patient insights
-- Provide actionable medical recommendations
-- Use clear, concise language
-
-OUTPUT FORMAT:
-1. Key Findings
-2. Critical Observations
-3. Recommended Actions
-4. Potential Implications"""
+            full_text = await self._report_text(report_file, digest)
+            selected_text, section_report = self._select_report_sections(full_text)
+            if sections is not None:
+                sections.extend(section_report)
+            if summary_text is not None:
+                return summary_text
             
-            # Generate clinical report summary
-            summary_text = self._generate_llama_response(summarization_prompt)
+            if self.clinical_summary_mode == "map_reduce":
+                summary_text, complete = await self._summarize_report_map_reduce(selected_text)
+            else:
+                # Concise clinical report summarization prompt, report text last
+                summarization_prompt = CLINICAL_SUMMARY.render_within_budget("clinical_summary", "report",
+                                                                             selected_text)
+                
+                # Generate clinical report summary
+                summary_text = await self._generate_llama_response_async(summarization_prompt,
+                                                                         task="clinical_summary",
+                                                                         prompt_version=CLINICAL_SUMMARY.version)
+                complete = True
             
+            # A summary missing failed chunks is returned but not kept
+            if complete:
+                await asyncio.to_thread(self.upload_cache.set, digest, summary_key, summary_text)
             return summary_text
         
         except Exception as e:
@@ -600,10 +1618,81 @@ Recommendation:
 - Ensure the document is readable
 - Check for any file corruption"""
 
+    async def _summarize_report_map_reduce(self, full_text: str) -> Tuple[str, bool]:
+        """
+        Summarize a whole report: chunk summaries in parallel, then one merge call
+        
+        Chunk summaries go through the response cache, keyed on the chunk
+        text, and split_to_budget keeps unchanged parts of an edited report
+        in identical chunks, so re-uploading it only summarizes what changed.
+        A chunk that fails is left out of the merge rather than failing the
+        report, and is retried on the next upload. Summaries too long for one
+        merge call are summarized again first, up to three rounds.
+        
+        Args:
+            full_text (str): Extracted report text
+        
+        Returns:
+            Tuple[str, bool]: Clinical report summary, and whether every chunk made it in
+        """
+        chunk_budget = get_task_budget("clinical_chunk_summary").prompt_tokens
+        chunk_tokens = chunk_budget - estimate_tokens(CLINICAL_CHUNK_SUMMARY.render(excerpt=""))
+        chunks = split_to_budget(full_text, chunk_tokens)
+        
+        if len(chunks) <= 1:
+            # Short report: one call does the whole job
+            prompt = CLINICAL_SUMMARY.render_within_budget("clinical_summary", "report", full_text)
+            return await self._generate_llama_response_async(prompt, task="clinical_summary",
+                                                             prompt_version=CLINICAL_SUMMARY.version), True
+        
+        semaphore = asyncio.Semaphore(self.clinical_map_concurrency)
+        
+        async def summarize_chunk(chunk: str) -> str:
+            async with semaphore:
+                return await self._generate_llama_response_async(
+                    CLINICAL_CHUNK_SUMMARY.render(excerpt=chunk), task="clinical_chunk_summary",
+                    prompt_version=CLINICAL_CHUNK_SUMMARY.version
+                )
+        
+        reduce_tokens = (get_task_budget("clinical_summary_reduce").prompt_tokens -
+                         estimate_tokens(CLINICAL_SUMMARY_REDUCE.render(summaries="")))
+        complete = True
+        for _ in range(3):
+            results = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks), return_exceptions=True)
+            summaries = []
+            for index, result in enumerate(results, start=1):
+                if isinstance(result, Exception):
+                    self.logger.warning(f"Clinical report chunk {index}/{len(chunks)} failed: {result}")
+                    continue
+                summaries.append(result.strip())
+            get_metrics().increment("llm_report_chunks_total", len(summaries), {"status": "ok"})
+            get_metrics().increment("llm_report_chunks_total", len(chunks) - len(summaries), {"status": "failed"})
+            if not summaries:
+                raise next(result for result in results if isinstance(result, Exception))
+            complete = complete and len(summaries) == len(chunks)
+            
+            combined = "\n\n".join(summaries)
+            if estimate_tokens(combined) <= reduce_tokens or len(summaries) == 1:
+                break
+            # Too many summaries for one merge call: summarize the summaries, then try again
+            chunks = split_to_budget(combined, chunk_tokens)
+        
+        reduce_prompt = CLINICAL_SUMMARY_REDUCE.render_within_budget("clinical_summary_reduce", "summaries", combined)
+        return await self._generate_llama_response_async(reduce_prompt, task="clinical_summary_reduce",
+                                                         prompt_version=CLINICAL_SUMMARY_REDUCE.version), complete
+
     def predict_medical_outcomes(self, patient_data: Dict[str, Any]) -> str:
         """
         Advanced medical outcome prediction with actionable insights
         
+        Synchronous wrapper over predict_medical_outcomes_async
+        """
+        return http_transport.run_sync(self.predict_medical_outcomes_async(patient_data))
+
+    async def predict_medical_outcomes_async(self, patient_data: Dict[str, Any]) -> str:
+        """
+        Advanced medical outcome prediction with actionable insights
+        
         Args:
             patient_data (Dict[str, Any]): Detailed patient medical information
         
@@ -611,32 +1700,14 @@ Recommendation:
             str: Medical outcome prediction as plain text
         """
         try:
-            # Comprehensive medical outcome prediction prompt
-            outcome_prediction_prompt = f"""PATIENT OUTCOME PREDICTION
-
-Patient Data Overview:
-{json.dumps(patient_data, indent=2)}
-
-PREDICTION FRAMEWORK:
-1. Risk Stratification
-2. Outcome Probability
-3. Intervention Recommendations
-4. Personalized Care Strategy
-
-ANALYSIS GUIDELINES:
-- Provide precise, data-driven predictions
-- Focus on actionable medical insights
-- Prioritize patient-specific risk factors
-- Recommend targeted interventions
-
-REQUIRED OUTPUT:
-- Comprehensive risk assessment
-- Probability of different outcomes
-- Specific intervention strategies
-- Personalized care recommendations"""
+            # Comprehensive medical outcome prediction prompt, patient data last
+            outcome_prediction_prompt = OUTCOME_PREDICTION.render_within_budget(
+                "outcome_prediction", "patient_data", self._format_patient_data(patient_data)
+            )
             
             # Generate medical outcome prediction
-            prediction_text = self._generate_llama_response(outcome_prediction_prompt)
+            prediction_text = await self._generate_llama_response_async(outcome_prediction_prompt, task="outcome_prediction",
+                                                                        prompt_version=OUTCOME_PREDICTION.version)
             
             return prediction_text
         
@@ -653,6 +1724,21 @@ Recommendations:
 - Consult medical professional
 - Conduct additional diagnostic tests"""
 
+    def _format_patient_data(self, patient_data: Dict[str, Any]) -> str:
+        """
+        Serialize patient data for a prompt, compacting it when it is large
+        
+        Args:
+            patient_data (Dict[str, Any]): Detailed patient medical information
+        
+        Returns:
+            str: Indented JSON, or compact JSON if indentation would exceed the budget
+        """
+        formatted = json.dumps(patient_data, indent=2, default=str)
+        if estimate_tokens(formatted) > get_task_budget("outcome_prediction").prompt_tokens:
+            formatted = json.dumps(patient_data, separators=(',', ':'), default=str)
+        return formatted
+
     def _parse_medical_summary(self, summary_text: str) -> Dict[str, Any]:
         """
         Parse and structure medical summary text
@@ -0,0 +1,362 @@
+import os
+import json
+import atexit
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds for latency histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((str(key), str(value)) for key, value in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram for one label set; memory does not grow with samples
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Cumulative counts per upper bound, Prometheus style"""
+        total, result = 0, []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            result.append(("+Inf" if bound == float('inf') else f"{bound:g}", total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1] if self.buckets else None
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process counters and gauges for LLM client telemetry
+    """
+
+    def __init__(self, max_series: int = 500):
+        """
+        Initialize the registry
+
+        Args:
+            max_series (int): Label sets kept per metric; further label sets are dropped
+        """
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._dropped: Dict[str, int] = {}
+
+    def _has_room(self, name: str, series: Dict[LabelKey, Any], key: LabelKey) -> bool:
+        """
+        Check the per-metric series limit; called with the lock held
+        """
+        if key in series or len(series) < self.max_series:
+            return True
+        if name not in self._dropped:
+            logger.warning(f"Metric {name} reached {self.max_series} label sets; dropping new ones")
+        self._dropped[name] = self._dropped.get(name, 0) + 1
+        return False
+
+    def increment(self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Metric name
+            value (float): Amount to add
+            labels (Dict[str, Any], optional): Metric labels
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            if self._has_room(name, series, key):
+                series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        """
+        Set a gauge to an absolute value
+
+        Args:
+            name (str): Metric name
+            value (float): Current value
+            labels (Dict[str, Any], optional): Metric labels
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            if self._has_room(name, series, key):
+                series[key] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None,
+                buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Record a sample in a histogram
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            labels (Dict[str, Any], optional): Metric labels
+            buckets (Sequence[float]): Bucket upper bounds, used when the series is created
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if self._has_room(name, series, key):
+                if key not in series:
+                    series[key] = Histogram(buckets)
+                series[key].observe(value)
+
+    def histogram(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Summarize one histogram series
+
+        Args:
+            name (str): Metric name
+            labels (Dict[str, Any], optional): Metric labels
+
+        Returns:
+            Optional[Dict[str, Any]]: Count, sum and estimated p50/p95/p99, or None
+        """
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_label_key(labels))
+            return self._summarize(histogram) if histogram else None
+
+    @staticmethod
+    def _summarize(histogram: Histogram) -> Dict[str, Any]:
+        return {
+            "count": histogram.count,
+            "sum": histogram.sum,
+            "p50": histogram.quantile(0.5),
+            "p95": histogram.quantile(0.95),
+            "p99": histogram.quantile(0.99),
+            "buckets": dict(histogram.cumulative())
+        }
+
+    def get(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Read the current value of a counter or gauge
+
+        Args:
+            name (str): Metric name
+            labels (Dict[str, Any], optional): Metric labels
+
+        Returns:
+            float: Current value, 0 if never recorded
+        """
+        key = _label_key(labels)
+        with self._lock:
+            for family in (self._counters, self._gauges):
+                if name in family and key in family[name]:
+                    return family[name][key]
+        return 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy every metric into a JSON-serializable structure
+
+        Returns:
+            Dict[str, Any]: Counters and gauges as lists of label/value entries
+        """
+        def export(family):
+            return {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in family.items()
+            }
+
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "counters": export(self._counters),
+                "gauges": export(self._gauges),
+                "histograms": {
+                    name: [{"labels": dict(key), **self._summarize(histogram)} for key, histogram in series.items()]
+                    for name, series in self._histograms.items()
+                }
+            }
+
+    def export_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text, suitable for a scrape endpoint or textfile collector
+        """
+        lines = []
+        with self._lock:
+            for kind, family in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(family.items()):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        Drop every recorded metric
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._dropped.clear()
+
+
+class SnapshotWriter:
+    """
+    Background thread that periodically writes the registry to disk
+
+    Writes <directory>/llm_metrics[.<suffix>].json and .prom (the latter
+    for a Prometheus node_exporter textfile collector). Files are replaced
+    atomically so readers never see a partial snapshot.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", directory: str, interval: float = 60.0, suffix: str = ""):
+        """
+        Initialize the writer
+
+        Args:
+            registry (MetricsRegistry): Registry to export
+            directory (str): Output directory
+            interval (float): Seconds between snapshots
+            suffix (str): Added to the file names, e.g. the PID, so writers can share a directory
+        """
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        stem = f"llm_metrics.{suffix}" if suffix else "llm_metrics"
+        self.paths = [os.path.join(directory, f"{stem}.json"), os.path.join(directory, f"{stem}.prom")]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="llm-metrics-snapshot", daemon=True)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread.start()
+
+    def stop(self, remove: bool = False):
+        """
+        Stop writing snapshots
+
+        Args:
+            remove (bool): Also delete the snapshot files, so exited processes leave no stale series
+        """
+        self._stop.set()
+        if remove:
+            # Let a snapshot in progress finish so it does not recreate a removed file
+            if self._thread.is_alive():
+                self._thread.join(timeout=5)
+            for path in self.paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def write(self):
+        """
+        Write one snapshot now
+        """
+        contents = (json.dumps(self.registry.snapshot(), indent=2), self.registry.export_prometheus())
+        for path, content in zip(self.paths, contents):
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as f:
+                f.write(content)
+            os.replace(temporary, path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Writing metrics snapshot failed: {e}")
+
+
+_metrics = MetricsRegistry()
+_snapshot_writer: Optional[SnapshotWriter] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry
+
+    Returns:
+        MetricsRegistry: Shared registry
+    """
+    return _metrics
+
+
+def start_snapshot_writer() -> Optional[SnapshotWriter]:
+    """
+    Start the periodic snapshot writer once per process, if configured
+
+    Controlled by LLM_METRICS_SNAPSHOT_INTERVAL (seconds, 0 disables) and
+    LLM_METRICS_DIR. Each process writes llm_metrics.<pid>.json and .prom
+    into that one directory, so several workers on one host do not
+    overwrite each other, and removes its files when it exits.
+
+    Returns:
+        Optional[SnapshotWriter]: Running writer, or None when disabled
+    """
+    global _snapshot_writer
+    with _snapshot_lock:
+        if _snapshot_writer is None:
+            load_dotenv()
+            interval = float(os.getenv('LLM_METRICS_SNAPSHOT_INTERVAL', 0))
+            if interval <= 0:
+                return None
+            data_dir = os.getenv('DATA_DIR', './data')
+            directory = os.getenv('LLM_METRICS_DIR', os.path.join(data_dir, 'metrics'))
+            _snapshot_writer = SnapshotWriter(_metrics, directory, interval, suffix=str(os.getpid()))
+            _snapshot_writer.start()
+            atexit.register(_snapshot_writer.stop, remove=True)
+        return _snapshot_writer
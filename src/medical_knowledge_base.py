@@ -3,6 +3,7 @@ import os
 from typing import Dict, List, Any, Union
 import requests
 import logging
+from .disease_normalizer import normalize_disease_name
 
 class MedicalKnowledgeBase:
     """
@@ -42,10 +43,28 @@ class MedicalKnowledgeBase:
         # Initialize logger
         self.logger = logging.getLogger(__name__)
         
+        # Key every entry by its canonical disease name
+        self.DISEASE_TREATMENTS = self._normalize_keys(self.DISEASE_TREATMENTS)
+        
         # Load custom knowledge if file provided
         if knowledge_file and os.path.exists(knowledge_file):
             self._load_custom_knowledge(knowledge_file)
     
+    def _normalize_keys(self, knowledge: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Re-key a disease mapping by canonical disease name, merging synonyms
+        
+        Args:
+            knowledge (Dict[str, List[Dict[str, Any]]]): Treatments keyed by free-text disease name
+        
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Treatments keyed by canonical disease name
+        """
+        normalized = {}
+        for disease, treatments in knowledge.items():
+            normalized.setdefault(normalize_disease_name(disease), []).extend(treatments)
+        return normalized
+
     def _load_custom_knowledge(self, knowledge_file: str):
         """
         Load custom medical knowledge from a file
@@ -56,7 +75,7 @@ class MedicalKnowledgeBase:
         try:
             with open(knowledge_file, 'r') as f:
                 custom_knowledge = json.load(f)
-                self.DISEASE_TREATMENTS.update(custom_knowledge)
+                self.DISEASE_TREATMENTS.update(self._normalize_keys(custom_knowledge))
         except Exception as e:
             print(f"Error loading custom knowledge: {e}")
     
@@ -184,7 +203,7 @@ As medical science advances, these treatment options continue to be refined and
             disease (str): Target disease
             treatment (Dict[str, Any]): Treatment details
         """
-        disease = disease.lower()
+        disease = normalize_disease_name(disease)
         if disease not in self.DISEASE_TREATMENTS:
             self.DISEASE_TREATMENTS[disease] = []
         
@@ -201,7 +220,11 @@ As medical science advances, these treatment options continue to be refined and
             List[Dict[str, Any]]: Treatment information
         """
         # Normalize disease name
-        disease = disease.lower()
+        disease = normalize_disease_name(disease)
+        
+        # Exact canonical match first, then partial matches such as staged names
+        if disease in self.DISEASE_TREATMENTS:
+            return self.DISEASE_TREATMENTS[disease]
         
         # Check predefined knowledge
         for key, treatments in self.DISEASE_TREATMENTS.items():
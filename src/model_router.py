@@ -0,0 +1,326 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+from .resilience import get_circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """
+    Rolling outcome window for one model in one section
+    """
+
+    def __init__(self, window: int = 50, max_age: float = 600.0):
+        """
+        Initialize the statistics
+
+        Args:
+            window (int): Number of most recent outcomes kept
+            max_age (float): Seconds after which an outcome no longer counts,
+                so a model that degraded earlier gets a fresh chance
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # (timestamp, latency or None, failed)
+        self._outcomes = deque(maxlen=window)
+
+    def record(self, latency: Optional[float], failed: bool):
+        """
+        Add an outcome
+
+        Args:
+            latency (float, optional): Request latency in seconds, if measured
+            failed (bool): True for timeouts, rate limits and server errors
+        """
+        with self._lock:
+            self._outcomes.append((time.monotonic(), latency, failed))
+
+    def summary(self) -> Tuple[int, float, Optional[float]]:
+        """
+        Summarize the recent outcomes
+
+        Returns:
+            Tuple[int, float, Optional[float]]: Sample count, error rate and
+                p90 latency of successful requests (None without samples)
+        """
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            recent = [outcome for outcome in self._outcomes if outcome[0] >= cutoff]
+        if not recent:
+            return 0, 0.0, None
+        errors = sum(1 for _, _, failed in recent if failed)
+        latencies = sorted(latency for _, latency, failed in recent if not failed and latency is not None)
+        p90 = latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))] if latencies else None
+        return len(recent), errors / len(recent), p90
+
+
+class SectionRoute:
+    """
+    Candidate models, weights and latency SLO for one section
+    """
+
+    def __init__(self, section: str, candidates: List[Tuple[str, float]], latency_slo: float = 15.0):
+        """
+        Initialize the route
+
+        Args:
+            section (str): Section name, e.g. "literature_review"
+            candidates (List[Tuple[str, float]]): Models and their relative traffic weights
+            latency_slo (float): Target p90 latency in seconds
+        """
+        self.section = section
+        self.candidates = candidates
+        self.latency_slo = latency_slo
+
+    @classmethod
+    def from_env(cls, section: str, default_model: str) -> "SectionRoute":
+        """
+        Read <SECTION>_MODEL_CANDIDATES and <SECTION>_LATENCY_SLO
+
+        Candidates are comma-separated "model" or "model=weight" entries, e.g.
+        "meta-llama/llama-3.1-8b-instruct=3,google/gemini-2.0-flash-exp:free=1".
+        Without candidates the section routes only to default_model.
+
+        Args:
+            section (str): Section name
+            default_model (str): Model configured for the section
+
+        Returns:
+            SectionRoute: Route for the section
+        """
+        load_dotenv()
+        prefix = section.upper()
+        candidates = []
+        for entry in os.getenv(f'{prefix}_MODEL_CANDIDATES', '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            model, _, weight = entry.partition('=')
+            candidates.append((model.strip(), float(weight) if weight else 1.0))
+        if not candidates:
+            candidates = [(default_model, 1.0)]
+        return cls(section, candidates,
+                   float(os.getenv(f'{prefix}_LATENCY_SLO', os.getenv('LLM_ROUTER_LATENCY_SLO', 15.0))))
+
+    @property
+    def models(self) -> List[str]:
+        return [model for model, _ in self.candidates]
+
+
+class ModelRouter:
+    """
+    Route each request to the healthiest candidate model of its section
+
+    A candidate's score is its configured weight, scaled down by its recent
+    error rate and by how far its p90 latency exceeds the section's SLO.
+    Requests are spread over candidates in proportion to their scores, so
+    traffic drains away from a degrading model within a few requests while
+    a small probe share keeps measuring it until it recovers. Models whose
+    circuit breaker is open are skipped.
+    """
+
+    def __init__(self,
+                 enabled: bool = True,
+                 window: int = 50,
+                 min_samples: int = 5,
+                 max_age: float = 600.0,
+                 probe_share: float = 0.02,
+                 seed: Optional[int] = None):
+        """
+        Initialize the router
+
+        Args:
+            enabled (bool): When False every request uses the section's configured model
+            window (int): Outcomes kept per model and section
+            min_samples (int): Outcomes needed before a model's statistics count
+            max_age (float): Seconds an outcome stays in the statistics
+            probe_share (float): Minimum score, relative to weight, kept by degraded models
+            seed (int, optional): Seed for reproducible routing in tests
+        """
+        self.enabled = enabled
+        self.window = window
+        self.min_samples = min_samples
+        self.max_age = max_age
+        self.probe_share = probe_share
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._routes: Dict[str, SectionRoute] = {}
+        self._stats: Dict[Tuple[str, str], ModelStats] = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """
+        Build the router from LLM_ROUTER_* settings
+
+        Returns:
+            ModelRouter: Configured router
+        """
+        load_dotenv()
+        return cls(
+            enabled=os.getenv('LLM_ROUTER_ENABLED', 'True').lower() in ('1', 'true', 'yes'),
+            window=int(os.getenv('LLM_ROUTER_WINDOW', 50)),
+            min_samples=int(os.getenv('LLM_ROUTER_MIN_SAMPLES', 5)),
+            max_age=float(os.getenv('LLM_ROUTER_MAX_AGE', 600)),
+            probe_share=float(os.getenv('LLM_ROUTER_PROBE_SHARE', 0.02))
+        )
+
+    def register(self, route: SectionRoute):
+        """
+        Set the route for a section, replacing any previous one
+
+        Args:
+            route (SectionRoute): Section route
+        """
+        with self._lock:
+            self._routes[route.section] = route
+
+    def route_for(self, section: str, default_model: str) -> SectionRoute:
+        """
+        Get the section's route, reading it from the environment on first use
+
+        Args:
+            section (str): Section name
+            default_model (str): Model configured for the section
+
+        Returns:
+            SectionRoute: Route for the section
+        """
+        with self._lock:
+            route = self._routes.get(section)
+            if route is None:
+                route = self._routes[section] = SectionRoute.from_env(section, default_model)
+            return route
+
+    def _stats_for(self, section: str, model: str) -> ModelStats:
+        with self._lock:
+            stats = self._stats.get((section, model))
+            if stats is None:
+                stats = self._stats[(section, model)] = ModelStats(self.window, self.max_age)
+            return stats
+
+    def score(self, section: str, model: str, weight: float, latency_slo: float) -> float:
+        """
+        Score a candidate from its weight and recent health
+
+        Args:
+            section (str): Section name
+            model (str): Candidate model
+            weight (float): Configured weight
+            latency_slo (float): Section latency SLO in seconds
+
+        Returns:
+            float: Routing score; 0 when the model's circuit breaker is open
+        """
+        if get_circuit_breaker(model).state == "open":
+            return 0.0
+        samples, error_rate, p90 = self._stats_for(section, model).summary()
+        if samples < self.min_samples:
+            return weight
+        health = (1.0 - error_rate) ** 2
+        if p90 is not None and p90 > latency_slo:
+            # Squared, so a model at twice the SLO keeps a quarter of its share
+            health *= (latency_slo / p90) ** 2
+        return weight * max(health, self.probe_share)
+
+    def ranked(self, section: str, default_model: str) -> List[str]:
+        """
+        Order the section's candidates for one request
+
+        The first model is drawn in proportion to the scores; the rest follow
+        by descending score and serve as the failover order.
+
+        Args:
+            section (str): Section name
+            default_model (str): Model configured for the section
+
+        Returns:
+            List[str]: Candidate models, the one to use first
+        """
+        route = self.route_for(section, default_model)
+        if not self.enabled or len(route.candidates) == 1:
+            return route.models
+
+        metrics = get_metrics()
+        scored = []
+        for model, weight in route.candidates:
+            score = self.score(section, model, weight, route.latency_slo)
+            metrics.set_gauge("llm_route_score", score, {"section": section, "model": model})
+            scored.append((score, model))
+
+        total = sum(score for score, _ in scored)
+        if total <= 0:
+            # Every breaker is open; keep the configured order and let failover decide
+            return route.models
+        with self._lock:
+            pick = self._random.uniform(0, total)
+        chosen = scored[-1][1]
+        for score, model in scored:
+            pick -= score
+            if pick <= 0 and score > 0:
+                chosen = model
+                break
+
+        metrics.increment("llm_route_decisions_total", labels={"section": section, "model": chosen})
+        rest = [model for score, model in sorted(scored, key=lambda item: -item[0]) if model != chosen]
+        return [chosen] + rest
+
+    def record(self, section: str, model: str, latency: Optional[float], failed: bool):
+        """
+        Record the outcome of one request
+
+        Args:
+            section (str): Section name
+            model (str): Model that served the request
+            latency (float, optional): Request latency in seconds, if comparable to the SLO
+            failed (bool): True for timeouts, rate limits and server errors
+        """
+        self._stats_for(section, model).record(latency, failed)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, object]]]:
+        """
+        Report routing statistics per section
+
+        Returns:
+            Dict[str, List[Dict[str, object]]]: Candidates with samples, error rate and p90 latency
+        """
+        with self._lock:
+            routes = list(self._routes.values())
+        report = {}
+        for route in routes:
+            report[route.section] = []
+            for model, weight in route.candidates:
+                samples, error_rate, p90 = self._stats_for(route.section, model).summary()
+                report[route.section].append({
+                    "model": model, "weight": weight, "samples": samples,
+                    "error_rate": round(error_rate, 3), "p90_latency": p90,
+                    "score": self.score(route.section, model, weight, route.latency_slo)
+                })
+        return report
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get the process-wide model router
+
+    Returns:
+        ModelRouter: Shared router configured from the environment
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter.from_env()
+        return _router
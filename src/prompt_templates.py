@@ -0,0 +1,291 @@
+import hashlib
+from typing import Any, Dict
+
+from .token_budget import fit_prompt_content
+
+
+class PromptTemplate:
+    """
+    Prompt with a byte-identical static prefix and its variables at the end
+
+    Keeping everything that changes per request at the end lets provider-side
+    prompt caching reuse the prefix across requests. The version hash covers
+    the whole template, so editing a template invalidates cached responses
+    produced with the old wording.
+    """
+
+    def __init__(self, name: str, static: str, variables: str = ""):
+        """
+        Initialize the template
+
+        Args:
+            name (str): Registry name
+            static (str): Fixed instructions sent verbatim on every request
+            variables (str): str.format template for the per-request part
+        """
+        self.name = name
+        self.static = static
+        self.variables = variables
+        self.version = hashlib.sha256(
+            f"{name}\0{static}\0{variables}".encode('utf-8')
+        ).hexdigest()[:12]
+
+    def render(self, **values: Any) -> str:
+        """
+        Render the prompt
+
+        Args:
+            **values: Values for the variable part
+
+        Returns:
+            str: Static prefix followed by the filled-in variables
+        """
+        return self.static + self.variables.format(**values)
+
+    def render_within_budget(self, task: str, field: str, content: str, reserved_tokens: int = 0,
+                             **values: Any) -> str:
+        """
+        Render the prompt with one large variable trimmed to the task's prompt budget
+
+        Args:
+            task (str): Task name used to look up the budget
+            field (str): Name of the variable holding the large content
+            content (str): Content such as report text or patient data
+            reserved_tokens (int): Budget kept for a prefix added later, such as the structured shape
+            **values: Other variable values
+
+        Returns:
+            str: Rendered prompt within the budget
+        """
+        return fit_prompt_content(lambda text: self.render(**values, **{field: text}), content, task, field,
+                                  reserved_tokens)
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.name!r}, version={self.version})"
+
+
+NARRATIVE_SYSTEM = PromptTemplate("system.narrative", """You are an advanced medical research AI assistant.
+
+ABSOLUTE REQUIREMENTS:
+- Generate ONLY single, flowing narratives
+- NO numbered solutions or lists
+- NO sections starting with "Treatment Name:", "Mechanism:", etc.
+- Professional medical language
+- Integrated treatment descriptions
+- Maximum 500 words""")
+
+STRUCTURED_SYSTEM = PromptTemplate("system.structured", """You are an advanced medical research AI assistant.
+Respond with a single valid JSON object and nothing else: no prose, no code fences.""")
+
+STRUCTURED_SHAPE = PromptTemplate("structured.shape", "Respond with one JSON object in exactly this shape:\n",
+                                  "{shape}\n\n")
+
+LITERATURE_REVIEW = PromptTemplate("literature_review", """ADVANCED MEDICAL LITERATURE REVIEW
+
+Conduct an exhaustive literature review on the research topic given at the end.
+
+MANDATORY REVIEW COMPONENTS:
+1. Current State of Research
+2. Key Breakthrough Findings
+3. Methodological Approaches
+4. Conflicting Research Perspectives
+5. Emerging Research Trends
+6. Future Research Recommendations
+
+REVIEW GUIDELINES:
+- Reference minimum 5 peer-reviewed sources
+- Cover research from last 5-7 years
+- Provide critical analysis
+- Highlight scientific significance
+- Identify research gaps
+
+DETAILED OUTPUT REQUIREMENTS:
+- Comprehensive summary of existing research
+- Critical evaluation of methodologies
+- Identification of potential future research directions
+- Quantitative analysis of research trends
+
+""", "RESEARCH TOPIC: {research_topic}")
+
+LITERATURE_REVIEW_SECTION = PromptTemplate("literature_review.section", """ADVANCED MEDICAL LITERATURE REVIEW: SINGLE SECTION
+
+Write one section of a literature review on the research topic given at the end.
+Cover only the section named there; the other sections are written separately
+and joined afterwards, so do not introduce or conclude the whole review.
+
+SECTION GUIDELINES:
+- Reference peer-reviewed sources by author, journal and year
+- Cover research from last 5-7 years
+- Provide critical analysis
+- Highlight scientific significance
+- Maximum 250 words, no section heading
+
+""", "SECTION: {section}\nSECTION FOCUS: {focus}\nRESEARCH TOPIC: {research_topic}")
+
+# Sections of a sectioned review, in output order: (title, focus)
+LITERATURE_REVIEW_SECTIONS = [
+    ("Current State of Research", "established findings and the current consensus"),
+    ("Key Breakthrough Findings", "the most significant recent discoveries and their evidence"),
+    ("Methodological Approaches", "study designs and methods used, with their strengths and limitations"),
+    ("Conflicting Research Perspectives", "disagreements between studies and their likely causes"),
+    ("Emerging Research Trends", "directions gaining momentum, quantified where possible"),
+    ("Future Research Recommendations", "research gaps and the studies needed to close them"),
+]
+
+TREATMENT_INNOVATION = PromptTemplate("treatment_innovation", """ADVANCED TREATMENT INNOVATION TRACKER
+
+COMPREHENSIVE INNOVATION ANALYSIS FRAMEWORK:
+
+1. EMERGING TREATMENT TECHNOLOGIES
+- Identify breakthrough medical interventions
+- Analyze cutting-edge technological approaches
+- Assess potential paradigm-shifting methodologies
+
+2. RESEARCH LANDSCAPE
+- Map current research ecosystem
+- Highlight leading research institutions
+- Identify key research methodologies
+
+3. TECHNOLOGICAL INNOVATIONS
+- Breakthrough medical technologies
+- Advanced diagnostic techniques
+- Precision medicine approaches
+
+4. CLINICAL IMPACT ASSESSMENT
+- Potential patient outcome improvements
+- Comparative effectiveness analysis
+- Risk-benefit evaluation
+
+5. FUTURE TREND PREDICTIONS
+- Anticipated medical technology developments
+- Potential long-term clinical implications
+- Emerging research directions
+
+MANDATORY REQUIREMENTS:
+- Provide scientifically validated information
+- Reference recent clinical research (last 3-5 years)
+- Quantify potential medical advancements
+- Maintain highest standards of medical research integrity
+- Report the single most significant innovation as a structured record
+
+""", "SPECIFIC FOCUS: {disease}")
+
+VALIDATION = PromptTemplate("validation", """ADVANCED MEDICAL RESPONSE VALIDATION
+
+Analyze the medical treatment description given at the end and STRICTLY STRUCTURE it.
+
+MANDATORY VALIDATION CRITERIA:
+1. Verify scientific accuracy
+2. Confirm research-based claims
+3. Ensure comprehensive medical insights
+4. Validate statistical claims
+5. Check for recent research references
+
+""", "TREATMENT DESCRIPTION:\n{description}")
+
+CLINICAL_SUMMARY = PromptTemplate("clinical_summary", """CLINICAL REPORT SUMMARY
+
+Summarize the clinical report given at the end.
+
+SUMMARY REQUIREMENTS:
+- Extract core medical findings
+- Highlight key patient insights
+- Provide actionable medical recommendations
+- Use clear, concise language
+
+OUTPUT FORMAT:
+1. Key Findings
+2. Critical Observations
+3. Recommended Actions
+4. Potential Implications
+
+""", "Report Context: {report}")
+
+CLINICAL_CHUNK_SUMMARY = PromptTemplate("clinical_summary.chunk", """CLINICAL REPORT EXCERPT SUMMARY
+
+Summarize the clinical report excerpt given at the end. The excerpt is one
+part of a longer report; other parts are summarized separately and merged.
+
+SUMMARY REQUIREMENTS:
+- Keep study design, populations, endpoints and quantitative results
+- Keep adverse events and safety findings
+- Omit boilerplate such as headers, references and page furniture
+- Maximum 150 words; say only "No clinical content" if the excerpt has none
+
+""", "Report Excerpt:\n{excerpt}")
+
+CLINICAL_SUMMARY_REDUCE = PromptTemplate("clinical_summary.reduce", """CLINICAL REPORT SUMMARY
+
+Combine the excerpt summaries of one clinical report, given at the end in
+document order, into a single summary of the whole report.
+
+SUMMARY REQUIREMENTS:
+- Extract core medical findings
+- Highlight key patient insights
+- Provide actionable medical recommendations
+- Resolve repetition between excerpts; keep every distinct result
+- Use clear, concise language
+
+OUTPUT FORMAT:
+1. Key Findings
+2. Critical Observations
+3. Recommended Actions
+4. Potential Implications
+
+""", "Excerpt Summaries:\n{summaries}")
+
+OUTCOME_PREDICTION = PromptTemplate("outcome_prediction", """PATIENT OUTCOME PREDICTION
+
+Predict outcomes for the patient whose data is given at the end.
+
+PREDICTION FRAMEWORK:
+1. Risk Stratification
+2. Outcome Probability
+3. Intervention Recommendations
+4. Personalized Care Strategy
+
+ANALYSIS GUIDELINES:
+- Provide precise, data-driven predictions
+- Focus on actionable medical insights
+- Prioritize patient-specific risk factors
+- Recommend targeted interventions
+
+REQUIRED OUTPUT:
+- Comprehensive risk assessment
+- Probability of different outcomes
+- Specific intervention strategies
+- Personalized care recommendations
+
+""", "Patient Data Overview:\n{patient_data}")
+
+DISEASE_EXTRACTION = PromptTemplate("disease_extraction", """Name the disease or medical condition the question \
+below is about. Answer with the disease name only.
+
+""", "Question: {question}")
+
+# Built once at import; templates are immutable afterwards
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    template.name: template
+    for template in (NARRATIVE_SYSTEM, STRUCTURED_SYSTEM, STRUCTURED_SHAPE, LITERATURE_REVIEW,
+                     LITERATURE_REVIEW_SECTION, TREATMENT_INNOVATION, VALIDATION, CLINICAL_SUMMARY,
+                     CLINICAL_CHUNK_SUMMARY, CLINICAL_SUMMARY_REDUCE, OUTCOME_PREDICTION, DISEASE_EXTRACTION)
+}
+
+
+def get_template(name: str) -> PromptTemplate:
+    """
+    Look up a registered prompt template
+
+    Args:
+        name (str): Template name
+
+    Returns:
+        PromptTemplate: Registered template
+
+    Raises:
+        KeyError: No template has that name
+    """
+    try:
+        return PROMPT_TEMPLATES[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template: {name}") from None
@@ -0,0 +1,288 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit:
+    """
+    Request-rate and token-rate limits for one bucket
+    """
+
+    def __init__(self,
+                 requests_per_second: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 burst: Optional[float] = None):
+        """
+        Initialize the limits
+
+        Args:
+            requests_per_second (float, optional): Sustained request rate; None for no limit
+            tokens_per_minute (float, optional): Sustained prompt+completion token rate; None for no limit
+            burst (float, optional): Requests allowed back to back; defaults to max(1, requests_per_second)
+        """
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.burst = burst if burst is not None else max(1.0, requests_per_second or 0)
+
+    @classmethod
+    def from_env(cls, prefix: str, default: Optional["RateLimit"] = None) -> Optional["RateLimit"]:
+        """
+        Read <prefix>_RPS, <prefix>_TPM and <prefix>_BURST
+
+        Args:
+            prefix (str): Environment variable prefix, e.g. "OPENROUTER_API_KEY"
+            default (RateLimit, optional): Limits used for settings that are not set
+
+        Returns:
+            Optional[RateLimit]: Limits, or None when nothing limits this bucket
+        """
+        load_dotenv()
+
+        def read(name, fallback):
+            value = os.getenv(f'{prefix}_{name}')
+            return float(value) if value not in (None, '') else fallback
+
+        limit = cls(
+            requests_per_second=read('RPS', default.requests_per_second if default else None),
+            tokens_per_minute=read('TPM', default.tokens_per_minute if default else None),
+            burst=read('BURST', None)
+        )
+        if limit.requests_per_second is None and limit.tokens_per_minute is None:
+            return None
+        return limit
+
+    def __repr__(self) -> str:
+        return (f"RateLimit(rps={self.requests_per_second}, tpm={self.tokens_per_minute}, "
+                f"burst={self.burst})")
+
+
+def api_key_bucket(api_key: str) -> str:
+    """
+    Name the bucket for an API key without storing the key itself
+
+    Args:
+        api_key (str): Provider API key
+
+    Returns:
+        str: Bucket name derived from a hash of the key
+    """
+    return "key:" + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+class HostRateLimiter:
+    """
+    Token-bucket rate limiter shared by every process on the host
+
+    Bucket levels live in a SQLite database and are refilled and debited in
+    one IMMEDIATE transaction, so Streamlit and gunicorn workers that use the
+    same API key draw from the same buckets. Callers over the limit wait for
+    capacity instead of sending requests the provider would reject with 429.
+    """
+
+    def __init__(self, path: str, max_wait: float = 10.0, enabled: bool = True):
+        """
+        Initialize the rate limiter
+
+        Args:
+            path (str): SQLite database file path
+            max_wait (float): Longest a request queues before it is sent anyway
+            enabled (bool): When False acquire returns immediately
+        """
+        self.path = path
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    @classmethod
+    def from_env(cls) -> "HostRateLimiter":
+        """
+        Build the rate limiter from LLM_RATE_LIMIT_* settings
+
+        Returns:
+            HostRateLimiter: Configured limiter
+        """
+        load_dotenv()
+        data_dir = os.getenv('DATA_DIR', './data')
+        return cls(
+            path=os.getenv('LLM_RATE_LIMIT_PATH', os.path.join(data_dir, 'cache', 'rate_limits.sqlite3')),
+            max_wait=float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT', 10.0)),
+            enabled=os.getenv('LLM_RATE_LIMIT_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _refill(row, limit: RateLimit, now: float) -> Tuple[float, float]:
+        """
+        Compute bucket levels at time now from the stored row
+        """
+        token_capacity = limit.tokens_per_minute or 0
+        if row is None:
+            return limit.burst, token_capacity
+        requests, tokens, updated_at = row
+        elapsed = max(0.0, now - updated_at)
+        if limit.requests_per_second:
+            requests = min(limit.burst, requests + elapsed * limit.requests_per_second)
+        if limit.tokens_per_minute:
+            tokens = min(token_capacity, tokens + elapsed * limit.tokens_per_minute / 60)
+        return requests, tokens
+
+    def try_acquire(self, buckets: List[Tuple[str, RateLimit]], tokens: int) -> float:
+        """
+        Take one request and the given tokens from every bucket, if all have capacity
+
+        Args:
+            buckets (List[Tuple[str, RateLimit]]): Bucket names and their limits
+            tokens (int): Estimated prompt plus completion tokens for the request
+
+        Returns:
+            float: 0 when granted, otherwise seconds until the buckets can grant it
+        """
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            levels = []
+            wait = 0.0
+            for name, limit in buckets:
+                row = connection.execute(
+                    "SELECT requests, tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                requests, available_tokens = self._refill(row, limit, now)
+                # A request larger than the whole bucket waits for a full bucket
+                needed_tokens = min(tokens, limit.tokens_per_minute or 0)
+                if limit.requests_per_second and requests < 1:
+                    wait = max(wait, (1 - requests) / limit.requests_per_second)
+                if limit.tokens_per_minute and available_tokens < needed_tokens:
+                    wait = max(wait, (needed_tokens - available_tokens) * 60 / limit.tokens_per_minute)
+                levels.append((name, limit, requests, available_tokens, needed_tokens))
+
+            if wait == 0.0:
+                for name, limit, requests, available_tokens, needed_tokens in levels:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                        (name,
+                         requests - 1 if limit.requests_per_second else requests,
+                         available_tokens - needed_tokens,
+                         now)
+                    )
+            connection.execute("COMMIT")
+            return wait
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def acquire(self, buckets: List[Tuple[str, RateLimit]], tokens: int, label: str = "default") -> float:
+        """
+        Wait until every bucket grants the request, for at most max_wait seconds
+
+        Args:
+            buckets (List[Tuple[str, RateLimit]]): Bucket names and their limits
+            tokens (int): Estimated prompt plus completion tokens for the request
+            label (str): Section name for metrics
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if not self.enabled or not buckets:
+            return 0.0
+
+        started = time.monotonic()
+        queued = False
+        while True:
+            try:
+                wait = await asyncio.to_thread(self.try_acquire, buckets, tokens)
+            except sqlite3.Error as e:
+                logger.warning(f"Rate limiter unavailable, sending request unthrottled: {e}")
+                return time.monotonic() - started
+
+            waited = time.monotonic() - started
+            if wait == 0.0:
+                if queued:
+                    metrics = get_metrics()
+                    metrics.increment("llm_rate_limit_waits_total", labels={"section": label})
+                    metrics.increment("llm_rate_limit_wait_seconds_total", waited, labels={"section": label})
+                return waited
+            if waited + wait > self.max_wait:
+                logger.warning(f"Rate limit queue exceeded {self.max_wait}s for {label}; sending anyway")
+                get_metrics().increment("llm_rate_limit_overflow_total", labels={"section": label})
+                return waited
+            queued = True
+            await asyncio.sleep(wait)
+
+    def refund(self, buckets: List[Tuple[str, RateLimit]], tokens: int):
+        """
+        Return over-estimated tokens once the provider reports actual usage
+
+        Args:
+            buckets (List[Tuple[str, RateLimit]]): Buckets debited for the request
+            tokens (int): Estimated minus actual tokens; negative values debit more
+        """
+        if not self.enabled or not tokens:
+            return
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for name, limit in buckets:
+                if not limit.tokens_per_minute:
+                    continue
+                row = connection.execute(
+                    "SELECT requests, tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                requests, available_tokens = self._refill(row, limit, now)
+                available_tokens = min(limit.tokens_per_minute, available_tokens + tokens)
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                    (name, requests, available_tokens, now)
+                )
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            logger.warning(f"Rate limiter refund failed: {e}")
+
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """
+    Get the process-wide handle on the host rate limiter
+
+    Returns:
+        HostRateLimiter: Shared limiter configured from the environment
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter.from_env()
+        return _limiter
@@ -0,0 +1,265 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+import concurrent.futures
+from collections import deque
+from typing import Any, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+from .token_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str, float]]:
+    """
+    Extract pages [start, stop) of a PDF file; runs in a pool worker process
+
+    Args:
+        path (str): PDF file path
+        start (int): First page index (from 0)
+        stop (int): Page index after the last one
+
+    Returns:
+        List[Tuple[int, str, float]]: Page number (from 1), text and extraction seconds per page
+    """
+    import PyPDF2
+
+    pages = []
+    with open(path, 'rb') as handle:
+        reader = PyPDF2.PdfReader(handle)
+        for index in range(start, stop):
+            started = time.perf_counter()
+            text = reader.pages[index].extract_text() or ""
+            pages.append((index + 1, text, time.perf_counter() - started))
+    return pages
+
+
+class PageExtractionPool:
+    """
+    Worker processes for extracting text from large PDFs
+
+    PyPDF2 holds the GIL while it parses, so extracting a long report on a
+    server thread slows every other session in the process. Reports with at
+    least min_pages pages are split into page ranges that worker processes
+    extract, and the pages are yielded in page order. Each page is
+    extracted by the same PyPDF2 call as in-process, so the text is
+    identical either way. Ranges are submitted a few at a time, so a
+    caller that stops early leaves the rest of the document unparsed.
+    """
+
+    def __init__(self, processes: int = 2, min_pages: int = 40, pages_per_task: int = 16):
+        """
+        Initialize the pool; worker processes start on first use
+
+        Args:
+            processes (int): Worker processes; 0 extracts every report in-process
+            min_pages (int): Smallest report, in pages, sent to the workers
+            pages_per_task (int): Pages extracted per worker task
+        """
+        self.processes = processes
+        self.min_pages = min_pages
+        self.pages_per_task = pages_per_task
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "PageExtractionPool":
+        """
+        Build the pool from PDF_EXTRACT_* settings
+
+        Returns:
+            PageExtractionPool: Configured pool
+        """
+        load_dotenv()
+        return cls(
+            processes=int(os.getenv('PDF_EXTRACT_PROCESSES', min(2, os.cpu_count() or 1))),
+            min_pages=int(os.getenv('PDF_EXTRACT_MIN_PAGES', 40)),
+            pages_per_task=int(os.getenv('PDF_EXTRACT_PAGES_PER_TASK', 16))
+        )
+
+    def should_use(self, page_count: int) -> bool:
+        return self.processes > 0 and page_count >= self.min_pages
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers: forking a process with live server threads can deadlock
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def iter_pages(self, path: str, page_count: int) -> Iterator[Tuple[int, str, float]]:
+        """
+        Extract a PDF file's pages in the worker processes
+
+        Args:
+            path (str): PDF file path readable by the workers
+            page_count (int): Number of pages in the file
+
+        Returns:
+            Iterator[Tuple[int, str, float]]: Page number, text and seconds, in page order
+        """
+        executor = self._get_executor()
+        starts = iter(range(0, page_count, self.pages_per_task))
+        pending: deque = deque()
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                pending.append(executor.submit(_extract_page_range, path, start,
+                                               min(start + self.pages_per_task, page_count)))
+
+        try:
+            for _ in range(2 * self.processes):
+                submit_next()
+            while pending:
+                pages = pending.popleft().result()
+                submit_next()
+                yield from pages
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool: Optional[PageExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_page_extraction_pool() -> PageExtractionPool:
+    """
+    Get the process-wide PDF extraction pool
+
+    Returns:
+        PageExtractionPool: Shared pool configured from the environment
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PageExtractionPool.from_env()
+        return _pool
+
+
+def _iter_local_pages(reader: Any) -> Iterator[Tuple[int, str, float]]:
+    for number, page in enumerate(reader.pages, start=1):
+        started = time.perf_counter()
+        text = page.extract_text() or ""
+        yield number, text, time.perf_counter() - started
+
+
+def _iter_pooled_pages(pool: PageExtractionPool, report_file: Any,
+                       page_count: int) -> Iterator[Tuple[int, str, float]]:
+    # Workers open the file by path; uploads that only exist in memory are spooled first
+    name = getattr(report_file, 'name', '')
+    if isinstance(name, str) and os.path.isfile(name):
+        yield from pool.iter_pages(name, page_count)
+        return
+    handle, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(handle, 'wb') as spool:
+            report_file.seek(0)
+            spool.write(report_file.read())
+        yield from pool.iter_pages(path, page_count)
+    finally:
+        os.remove(path)
+
+
+def iter_pdf_pages(report_file: Any, pool: Optional[PageExtractionPool] = None) -> Iterator[Tuple[int, str, float]]:
+    """
+    Extract PDF pages one at a time
+
+    The reader parses the file's cross-reference table up front but each
+    page's content only when that page is reached, so a caller that stops
+    early never pays for the remaining pages. The upload is read in place
+    rather than copied into memory. Reports of pool.min_pages pages or more
+    are extracted in the pool's worker processes instead of this one.
+
+    Args:
+        report_file (Any): Seekable binary file object, such as a Streamlit upload
+        pool (PageExtractionPool, optional): Worker pool; defaults to the shared pool
+
+    Returns:
+        Iterator[Tuple[int, str, float]]: Page number (from 1), page text and
+            seconds spent extracting the page
+    """
+    import PyPDF2
+
+    pool = pool or get_page_extraction_pool()
+    report_file.seek(0)
+    reader = PyPDF2.PdfReader(report_file)
+    page_count = len(reader.pages)
+    if pool.should_use(page_count):
+        mode, pages = "pool", _iter_pooled_pages(pool, report_file, page_count)
+    else:
+        mode, pages = "local", _iter_local_pages(reader)
+
+    metrics = get_metrics()
+    try:
+        for number, text, elapsed in pages:
+            metrics.observe("report_page_extract_seconds", elapsed, {"mode": mode})
+            yield number, text, elapsed
+    finally:
+        pages.close()
+
+
+def extract_report_text(report_file: Any,
+                        max_chars: Optional[int] = None,
+                        max_tokens: Optional[int] = None,
+                        page_timings: Optional[List[Tuple[int, float]]] = None,
+                        pool: Optional[PageExtractionPool] = None) -> str:
+    """
+    Extract the text of an uploaded clinical report up to a budget
+
+    PDF pages are extracted lazily and extraction stops at the first page
+    that meets the character or token budget, so a long protocol is not
+    parsed past the part that will be used. Page texts are collected in a
+    list and joined once.
+
+    Args:
+        report_file (Any): Uploaded file with a name; .pdf files are parsed, others decoded as UTF-8
+        max_chars (int, optional): Longest text returned
+        max_tokens (int, optional): Stop once this many estimated tokens are extracted
+        page_timings (List[Tuple[int, float]], optional): Receives (page number, seconds) per extracted page
+        pool (PageExtractionPool, optional): Worker pool for large PDFs; defaults to the shared pool
+
+    Returns:
+        str: Report text, cut to max_chars
+    """
+    if not report_file.name.lower().endswith('.pdf'):
+        data = report_file.read(max_chars * 4 if max_chars else -1)
+        return data.decode('utf-8', errors='ignore')[:max_chars]
+
+    pages: List[str] = []
+    chars = tokens = 0
+    started = time.perf_counter()
+    slowest = (0, 0.0)
+    pages_iter = iter_pdf_pages(report_file, pool)
+    for number, text, elapsed in pages_iter:
+        pages.append(text)
+        chars += len(text) + 1
+        if page_timings is not None:
+            page_timings.append((number, elapsed))
+        if elapsed > slowest[1]:
+            slowest = (number, elapsed)
+        if max_tokens is not None:
+            tokens += estimate_tokens(text)
+        if (max_chars is not None and chars >= max_chars) or (max_tokens is not None and tokens >= max_tokens):
+            # Closing the generator cancels page ranges not yet extracted
+            pages_iter.close()
+            break
+
+    logger.info(f"Extracted {len(pages)} PDF pages ({chars} chars) from {report_file.name} in "
+                f"{time.perf_counter() - started:.2f}s; slowest page {slowest[0]} took {slowest[1]:.2f}s")
+    return "\n".join(pages)[:max_chars]
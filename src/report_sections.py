@@ -0,0 +1,167 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .token_budget import TRUNCATION_MARKER, estimate_tokens, trim_to_budget
+
+# Canonical sections and the headings that open them
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "abstract": ["abstract", "summary", "synopsis", "executive summary", "plain language summary"],
+    "results": ["results", "findings", "efficacy", "efficacy results", "outcomes", "primary endpoint",
+                "primary outcome", "secondary endpoints", "secondary outcomes"],
+    "adverse_events": ["adverse events", "serious adverse events", "adverse reactions", "safety",
+                       "safety results", "safety and tolerability", "tolerability"],
+    "conclusions": ["conclusions", "conclusion", "discussion", "interpretation"],
+    "methods": ["methods", "methodology", "materials and methods", "patients and methods", "study design",
+                "study population", "participants", "interventions", "eligibility criteria",
+                "statistical analysis"],
+    "introduction": ["introduction", "background", "objectives", "rationale"],
+    "excluded": ["references", "bibliography", "acknowledgements", "acknowledgments", "funding",
+                 "conflicts of interest", "disclosures", "appendix", "supplementary material",
+                 "author contributions", "abbreviations", "table of contents"],
+}
+
+# Most valuable first; "front_matter" is the text before the first heading.
+# Excluded sections are never sent to the model.
+SECTION_PRIORITY = ["abstract", "results", "adverse_events", "conclusions", "methods", "introduction",
+                    "front_matter"]
+
+# Bump when indexing or selection changes, so cached summaries built from
+# the old selection are not reused
+SECTION_INDEX_VERSION = "sections-v1"
+
+_HEADING_NAMES = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# Optional numbering ("3.", "2.1", "IV."), then a known heading, then either
+# the end of the line or a colon followed by inline text. Longest aliases
+# first so "safety results" wins over "safety".
+_HEADING_PATTERN = re.compile(
+    r"(?:(?:\d+(?:\.\d+)*|[IVX]+)[.)]?\s+)?(?P<title>"
+    + "|".join(re.escape(alias) for alias in sorted(_HEADING_NAMES, key=len, reverse=True))
+    + r")\s*(?:(?P<colon>:)\s*(?P<inline>.*)|[.]?\s*)$",
+    re.IGNORECASE
+)
+
+# A heading line without a colon must be short, so sentences that merely
+# start with "Results show..." are not taken for headings
+_MAX_HEADING_CHARS = 60
+
+# Smallest remainder of the budget worth filling with a trimmed section
+_MIN_TRIMMED_TOKENS = 80
+
+_SECTION_SEPARATOR = "\n\n"
+
+
+class ReportSection:
+    """
+    One section of a report: its canonical name, heading line and body text
+    """
+
+    def __init__(self, name: str, heading: str, body: str):
+        """
+        Initialize the section
+
+        Args:
+            name (str): Canonical name from SECTION_HEADINGS, or "front_matter"
+            heading (str): Heading as written in the report; empty for front matter
+            body (str): Text up to the next heading
+        """
+        self.name = name
+        self.heading = heading
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        return f"{self.heading}\n{self.body}" if self.heading else self.body
+
+    def __repr__(self) -> str:
+        return f"ReportSection({self.name!r}, heading={self.heading!r}, chars={len(self.body)})"
+
+
+def index_report_sections(text: str) -> List[ReportSection]:
+    """
+    Split report text into sections at recognised headings
+
+    Each line is matched once against one compiled pattern of literal
+    headings, so indexing is linear in the length of the report. Headings
+    stand on their own line, or open a line followed by a colon; the
+    colon form inside an abstract is its structure, not a new section.
+
+    Args:
+        text (str): Extracted report text
+
+    Returns:
+        List[ReportSection]: Sections in document order; text before the first
+            heading, if any, is a "front_matter" section
+    """
+    sections: List[ReportSection] = []
+    name, heading, body = "front_matter", "", []
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = _HEADING_PATTERN.match(stripped) if stripped else None
+        # "Background: ..." lines of a structured abstract belong to the abstract
+        if match and match.group("colon") and name == "abstract":
+            match = None
+        if match and (match.group("colon") or len(stripped) <= _MAX_HEADING_CHARS):
+            if heading or any(part.strip() for part in body):
+                sections.append(ReportSection(name, heading, "\n".join(body).strip()))
+            name = _HEADING_NAMES[match.group("title").lower()]
+            heading = stripped[:match.end("title")].rstrip()
+            body = [match.group("inline")] if match.group("inline") else []
+            continue
+        body.append(line)
+
+    if heading or any(part.strip() for part in body):
+        sections.append(ReportSection(name, heading, "\n".join(body).strip()))
+    return sections
+
+
+def select_report_sections(text: str, max_tokens: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Fill a token budget with the most valuable sections of a report
+
+    Sections are taken in SECTION_PRIORITY order (ties in document order);
+    the first one that does not fit is trimmed to the remaining budget and
+    the rest are skipped. The chosen sections are returned in document
+    order. A report without recognised headings is treated as a single
+    section, which amounts to its leading text. Without a budget every
+    section except the excluded ones (references, funding, ...) is kept.
+
+    Args:
+        text (str): Extracted report text
+        max_tokens (int, optional): Token budget for the selected text
+
+    Returns:
+        Tuple[str, List[Dict[str, Any]]]: Selected text, and one entry per
+            section with its name, heading, estimated tokens and status
+            ("included", "trimmed", "skipped" or "excluded")
+    """
+    sections = index_report_sections(text)
+    costs = [estimate_tokens(section.text) for section in sections]
+    # Separators and the truncation marker count against the budget too, so
+    # the prompt is not trimmed again after selection
+    separator_cost = estimate_tokens(_SECTION_SEPARATOR)
+    marker_cost = estimate_tokens(TRUNCATION_MARKER)
+    rank = {name: index for index, name in enumerate(SECTION_PRIORITY)}
+    order = sorted((index for index, section in enumerate(sections) if section.name in rank),
+                   key=lambda index: (rank[sections[index].name], index))
+
+    chosen: Dict[int, str] = {}
+    statuses = ["excluded" if section.name not in rank else "skipped" for section in sections]
+    remaining = sum(costs) if max_tokens is None else max_tokens
+    for index in order:
+        cost = costs[index] + (separator_cost if chosen else 0)
+        if cost <= remaining:
+            chosen[index] = sections[index].text
+            statuses[index] = "included"
+            remaining -= cost
+        elif remaining - separator_cost - marker_cost >= _MIN_TRIMMED_TOKENS:
+            chosen[index], _ = trim_to_budget(sections[index].text, remaining - separator_cost - marker_cost)
+            statuses[index] = "trimmed"
+            remaining = 0
+
+    selected = _SECTION_SEPARATOR.join(chosen[index] for index in sorted(chosen))
+    report = [{"section": section.name, "heading": section.heading or "(start of document)",
+               "tokens": cost, "status": status}
+              for section, cost, status in zip(sections, costs, statuses)]
+    return selected, report
@@ -0,0 +1,285 @@
+import os
+import time
+import random
+import logging
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from .http_transport import TransportStatusError
+from .llm_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limiting and transient provider faults
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when every candidate model has an open circuit breaker
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether a failed request is transient and worth retrying
+
+    Args:
+        error (BaseException): Error raised by the request
+
+    Returns:
+        bool: True for rate limits, 5xx responses, timeouts and connection errors
+    """
+    if isinstance(error, TransportStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+def parse_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header from a failed response
+
+    Args:
+        error (BaseException): Error raised by the request
+
+    Returns:
+        Optional[float]: Seconds to wait, or None when the header is absent
+    """
+    if not isinstance(error, TransportStatusError):
+        return None
+    value = next((v for k, v in error.headers.items() if k.lower() == 'retry-after'), None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff settings for provider requests
+    """
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 8.0,
+                 max_retry_after: float = 30.0):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts (int): Attempts per model, including the first one
+            base_delay (float): Backoff for the first retry in seconds
+            max_delay (float): Upper bound for a computed backoff
+            max_retry_after (float): Longest Retry-After honored before failing over instead
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """
+        Build a retry policy from LLM_RETRY_* environment variables
+
+        Returns:
+            RetryPolicy: Configured policy
+        """
+        load_dotenv()
+        return cls(
+            max_attempts=int(os.getenv('LLM_RETRY_MAX_ATTEMPTS', 3)),
+            base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', 0.5)),
+            max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', 8.0)),
+            max_retry_after=float(os.getenv('LLM_RETRY_MAX_RETRY_AFTER', 30.0))
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Compute the delay before the next attempt
+
+        Args:
+            attempt (int): Number of the attempt that just failed, starting at 1
+            retry_after (float, optional): Server-provided Retry-After in seconds
+
+        Returns:
+            Optional[float]: Seconds to sleep, or None if retrying is pointless
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # Full jitter keeps workers that failed together from retrying together
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker
+
+    The breaker opens after a run of consecutive failures and rejects
+    requests until the reset timeout passes. It then lets a single probe
+    through (half-open) and closes again once a request succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            name (str): Model the breaker protects
+            failure_threshold (int): Consecutive failures that open the breaker
+            reset_timeout (float): Seconds to stay open before allowing a probe
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state, promoting open to half-open once the timeout passes"""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+            self._publish()
+
+    def _publish(self):
+        get_metrics().set_gauge("llm_circuit_breaker_state", self._STATE_VALUES[self._state],
+                                {"model": self.name})
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent to this model now
+
+        Returns:
+            bool: False while open, or while a half-open probe is outstanding
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """
+        Give back a half-open probe slot without judging the model's health
+
+        Used when a request is cancelled or rejected for reasons unrelated to
+        the provider (for example a malformed request).
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        """
+        Record a successful request and close the breaker
+        """
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit breaker for {self.name} closed")
+                self._state = self.CLOSED
+                self._publish()
+
+    def record_failure(self):
+        """
+        Record a failed request, opening the breaker past the threshold
+        """
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit breaker for {self.name} opened after "
+                                   f"{self._consecutive_failures} consecutive failures")
+                    get_metrics().increment("llm_circuit_breaker_opened_total", labels={"model": self.name})
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._publish()
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Describe the breaker for diagnostics
+
+        Returns:
+            Dict[str, object]: State and failure count
+        """
+        with self._lock:
+            self._refresh()
+            return {
+                "model": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for a model
+
+    Args:
+        model (str): Model identifier
+
+    Returns:
+        CircuitBreaker: Breaker shared by every assistant using the model
+    """
+    with _breakers_lock:
+        if model not in _breakers:
+            load_dotenv()
+            _breakers[model] = CircuitBreaker(
+                model,
+                failure_threshold=int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('LLM_BREAKER_RESET_TIMEOUT', 30.0))
+            )
+        return _breakers[model]
+
+
+def circuit_breaker_snapshot() -> Dict[str, Dict[str, object]]:
+    """
+    Describe every circuit breaker created in this process
+
+    Returns:
+        Dict[str, Dict[str, object]]: Breaker snapshots keyed by model
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
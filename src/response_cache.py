@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, system_prompt: str, params: Dict[str, Any], prompt: str) -> str:
+    """
+    Build a stable cache key for an LLM request
+
+    Args:
+        model (str): Model identifier
+        system_prompt (str): System prompt sent with the request
+        params (Dict[str, Any]): Sampling parameters (temperature, max_tokens, ...)
+        prompt (str): User prompt text
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request
+    """
+    material = json.dumps(
+        {"model": model, "system": system_prompt, "params": params, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent LLM response cache backed by a local SQLite database
+
+    Values are zlib-compressed, expire after a TTL and are evicted in least
+    recently used order once the entry limit is exceeded. The database runs
+    in WAL mode so several worker processes on one host can share it.
+    """
+
+    def __init__(self,
+                 path: str,
+                 ttl_seconds: float = 86400,
+                 max_entries: int = 5000,
+                 enabled: bool = True):
+        """
+        Initialize the response cache
+
+        Args:
+            path (str): SQLite database file path
+            ttl_seconds (float): Seconds an entry stays valid after it is stored
+            max_entries (int): Maximum number of entries kept before LRU eviction
+            enabled (bool): When False every lookup misses and nothing is stored
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Build a cache from environment variables
+
+        Returns:
+            ResponseCache: Cache configured from LLM_CACHE_* settings
+        """
+        load_dotenv()
+        data_dir = os.getenv('DATA_DIR', './data')
+        return cls(
+            path=os.getenv('LLM_CACHE_PATH', os.path.join(data_dir, 'cache', 'llm_responses.sqlite3')),
+            ttl_seconds=float(os.getenv('LLM_CACHE_TTL', 86400)),
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 5000)),
+            enabled=os.getenv('LLM_CACHE_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use
+
+        Returns:
+            sqlite3.Connection: Thread-local database connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _initialize_schema(self):
+        connection = self._connect()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            Optional[str]: Cached text, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        try:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(hit=False)
+                return None
+
+            connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._count(hit=True)
+            return zlib.decompress(row[0]).decode('utf-8')
+
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            self._count(hit=False)
+            return None
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None):
+        """
+        Store a response and evict least recently used entries over the limit
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value (str): Response text to store
+            ttl_seconds (float, optional): Override for the default TTL
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, zlib.compress(value.encode('utf-8')), now, now + ttl, now)
+            )
+            self._evict(connection, now)
+
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def delete(self, key: str):
+        """
+        Drop one entry so the next lookup regenerates it
+
+        Args:
+            key (str): Cache key from make_cache_key
+        """
+        try:
+            self._connect().execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache delete failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """
+        Drop expired entries, then the least recently used beyond max_entries
+        """
+        connection.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        overflow = connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self):
+        """
+        Remove every cached entry
+        """
+        self._connect().execute("DELETE FROM responses")
+
+    def _count(self, hit: bool):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and size
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate and stored entry count
+        """
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        try:
+            entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache
+
+    Returns:
+        ResponseCache: Shared cache configured from the environment
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache.from_env()
+        return _cache
@@ -0,0 +1,195 @@
+import re
+from typing import Optional, Tuple
+
+# Lines dropped entirely: solution/treatment labels the system prompt forbids
+_REMOVED_LINE = re.compile(
+    r'Solution \d+:|Solution:|Treatment Name:|Mechanism of Action:|'
+    r'Potential Effectiveness:|Research Status:|Potential Side Effects:'
+)
+_REMOVED_PREFIXES = ('Solution:', 'Treatment Name:', 'Mechanism of Action:',
+                     'Potential Effectiveness:', 'Research Status:', 'Potential Side Effects:')
+# List numbering stripped from the start of a line
+_NUMBERING = re.compile(r'\d+\.\s*')
+# "Step 2:"-style labels that drop the line once numbering is removed
+_LABEL = re.compile(r'[A-Za-z]+\s*\d+:')
+
+# Prefixes of the patterns above, used to hold back a streamed partial line
+_PARTIAL_SOLUTION = re.compile(r'Solution(?: \d*)?')
+_PARTIAL_LABEL = re.compile(r'[A-Za-z]+\s*\d*')
+
+# Extra clean-up for narratives rendered as one block: "Header:" prefixes
+# and any numbering left after the first pass
+_HEADER_PREFIX = re.compile(r'[A-Za-z \t]+:')
+_BARE_NUMBERING = re.compile(r'\d+\.')
+
+
+def _classify_line(line: str, complete: bool) -> Tuple[str, str]:
+    """
+    Decide the fate of a (possibly partial) line
+
+    Args:
+        line (str): Raw line text without the newline
+        complete (bool): False while the line may still grow during streaming
+
+    Returns:
+        Tuple[str, str]: ("drop" | "pending" | "keep", cleaned text so far)
+    """
+    if _REMOVED_LINE.match(line):
+        return "drop", ""
+    if not complete and (_PARTIAL_SOLUTION.fullmatch(line) or
+                         any(prefix.startswith(line) for prefix in _REMOVED_PREFIXES)):
+        return "pending", ""
+
+    rest = line
+    numbering = _NUMBERING.match(line)
+    if numbering:
+        rest = line[numbering.end():]
+        if not complete and not rest:
+            return "pending", ""
+    elif not complete and line.isdigit():
+        return "pending", ""
+
+    if _LABEL.match(rest):
+        return "drop", ""
+    if not complete and _PARTIAL_LABEL.fullmatch(rest):
+        return "pending", ""
+    return "keep", rest
+
+
+def clean_line(line: str, strip_labels: bool = False) -> Optional[str]:
+    """
+    Clean one complete line of model output
+
+    Args:
+        line (str): Raw line text without the newline
+        strip_labels (bool): Also remove "Header:" prefixes and bare numbering
+
+    Returns:
+        Optional[str]: Stripped line, or None when the line is dropped or empty
+    """
+    state, cleaned = _classify_line(line, complete=True)
+    if state == "drop":
+        return None
+    if strip_labels:
+        header = _HEADER_PREFIX.match(cleaned)
+        if header:
+            cleaned = cleaned[header.end():]
+        numbering = _BARE_NUMBERING.match(cleaned)
+        if numbering:
+            cleaned = cleaned[numbering.end():]
+    cleaned = cleaned.strip()
+    return cleaned or None
+
+
+def clean_response(text: str, strip_labels: bool = False) -> str:
+    """
+    Remove list and label artifacts from a generated response in one pass
+
+    Args:
+        text (str): Raw model output
+        strip_labels (bool): Also remove "Header:" prefixes and bare numbering
+
+    Returns:
+        str: Kept lines, stripped and separated by blank lines
+    """
+    kept = []
+    for line in text.strip().split('\n'):
+        cleaned = clean_line(line, strip_labels)
+        if cleaned is not None:
+            kept.append(cleaned)
+    return '\n\n'.join(kept)
+
+
+class StreamingResponseCleaner:
+    """
+    Incremental version of clean_response
+
+    Text is fed in as it streams. Each line is emitted as soon as it is clear
+    that none of the removal patterns can match it, so the reader sees the
+    narrative while it is generated rather than one full line later. Kept
+    lines are stripped and joined with blank lines, like clean_response.
+    """
+
+    def __init__(self):
+        self._line = ""
+        self._state = "pending"  # pending, keep or drop for the current line
+        self._held_whitespace = ""
+        self._emitted_lines = 0
+        self._started = False
+
+    def _emit(self, text: str) -> str:
+        text = self._held_whitespace + text
+        kept = text.rstrip()
+        self._held_whitespace = text[len(kept):]
+        return kept
+
+    def _open_line(self, cleaned: str) -> str:
+        cleaned = cleaned.lstrip()
+        if not cleaned:
+            return ""
+        self._state = "keep"
+        separator = "\n\n" if self._emitted_lines else ""
+        self._emitted_lines += 1
+        return separator + self._emit(cleaned)
+
+    def _append(self, text: str) -> str:
+        if self._state == "drop":
+            return ""
+        if self._state == "keep":
+            return self._emit(text)
+
+        self._line += text
+        state, cleaned = _classify_line(self._line, complete=False)
+        if state == "drop":
+            self._state = "drop"
+            return ""
+        if state == "keep":
+            return self._open_line(cleaned)
+        return ""
+
+    def _end_line(self) -> str:
+        output = ""
+        if self._state == "pending":
+            state, cleaned = _classify_line(self._line, complete=True)
+            if state == "keep":
+                output = self._open_line(cleaned)
+        self._line = ""
+        self._state = "pending"
+        self._held_whitespace = ""
+        return output
+
+    def feed(self, text: str) -> str:
+        """
+        Feed a streamed chunk and get the cleaned text that can be shown now
+
+        Args:
+            text (str): Raw chunk from the model
+
+        Returns:
+            str: Cleaned text ready for display (may be empty)
+        """
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+
+        # Fast path: mid-line chunk of a line already known to be kept or dropped
+        if '\n' not in text and self._state != "pending":
+            return self._emit(text) if self._state == "keep" else ""
+
+        output = []
+        for index, part in enumerate(text.split('\n')):
+            if index:
+                output.append(self._end_line())
+            output.append(self._append(part))
+        return ''.join(output)
+
+    def finish(self) -> str:
+        """
+        Flush the final line once the stream has ended
+
+        Returns:
+            str: Any remaining cleaned text
+        """
+        return self._end_line()
@@ -0,0 +1,252 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HostLeaseTable:
+    """
+    Host-wide request leases stored in a local SQLite database
+
+    A process that is about to call the provider for a key takes a lease;
+    other processes on the host see the lease and wait for the result to
+    show up in the shared response cache instead of calling the provider.
+    Leases expire, so a crashed leader only delays its followers.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 120.0):
+        """
+        Initialize the lease table
+
+        Args:
+            path (str): SQLite database file path
+            lease_seconds (float): How long a lease is honored without being released
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def acquire(self, key: str) -> bool:
+        """
+        Try to take the lease for a key
+
+        Args:
+            key (str): Request cache key
+
+        Returns:
+            bool: True if this process now holds the lease
+        """
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, self.owner, now + self.lease_seconds)
+            )
+            connection.execute("COMMIT")
+            return cursor.rowcount == 1
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def release(self, key: str):
+        """
+        Give up this process's lease for a key
+
+        Args:
+            key (str): Request cache key
+        """
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight requests
+
+    Concurrent calls with the same key share one execution: the first caller
+    runs it and every other caller awaits its result. Coalescing works across
+    threads and event loops in one process. With a HostLeaseTable it also
+    spans processes on one host, using the response cache to hand results over.
+    """
+
+    def __init__(self,
+                 enabled: bool = True,
+                 leases: Optional[HostLeaseTable] = None,
+                 poll_interval: float = 0.25):
+        """
+        Initialize the coalescing layer
+
+        Args:
+            enabled (bool): When False every call runs independently
+            leases (HostLeaseTable, optional): Enables cross-process coalescing
+            poll_interval (float): Seconds between cache checks while another
+                process holds the lease
+        """
+        self.enabled = enabled
+        self.leases = leases
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        """
+        Build the coalescing layer from LLM_SINGLE_FLIGHT_* settings
+
+        Returns:
+            SingleFlight: Configured instance
+        """
+        load_dotenv()
+        leases = None
+        if os.getenv('LLM_SINGLE_FLIGHT_CROSS_PROCESS', 'False').lower() in ('1', 'true', 'yes'):
+            data_dir = os.getenv('DATA_DIR', './data')
+            leases = HostLeaseTable(
+                os.getenv('LLM_SINGLE_FLIGHT_PATH', os.path.join(data_dir, 'cache', 'inflight.sqlite3')),
+                lease_seconds=float(os.getenv('LLM_SINGLE_FLIGHT_LEASE', 120))
+            )
+        return cls(
+            enabled=os.getenv('LLM_SINGLE_FLIGHT_ENABLED', 'True').lower() in ('1', 'true', 'yes'),
+            leases=leases,
+            poll_interval=float(os.getenv('LLM_SINGLE_FLIGHT_POLL', 0.25))
+        )
+
+    async def do(self,
+                 key: str,
+                 func: Callable[[], Awaitable[Any]],
+                 lookup: Optional[Callable[[], Awaitable[Optional[Any]]]] = None) -> Any:
+        """
+        Run func once for all concurrent callers with the same key
+
+        Args:
+            key (str): Identity of the request, normally its cache key
+            func (Callable[[], Awaitable[Any]]): Performs the request
+            lookup (Callable, optional): Reads a finished result from the shared
+                cache; required for cross-process coalescing
+
+        Returns:
+            Any: Result of func, possibly produced for another caller
+        """
+        if not self.enabled:
+            return await func()
+
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+
+            if leader:
+                break
+
+            get_metrics().increment("llm_coalesced_requests_total", labels={"scope": "process"})
+            try:
+                # Shield the shared future so one waiter's cancellation does not reach the others
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; take over the request
+
+        try:
+            result = await self._lead(key, func, lookup)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    async def _lead(self,
+                    key: str,
+                    func: Callable[[], Awaitable[Any]],
+                    lookup: Optional[Callable[[], Awaitable[Optional[Any]]]]) -> Any:
+        """
+        Run func for this process, deferring to another process's lease if present
+        """
+        if self.leases is None or lookup is None:
+            return await func()
+
+        waited = False
+        while True:
+            try:
+                if await asyncio.to_thread(self.leases.acquire, key):
+                    break
+            except sqlite3.Error as e:
+                logger.warning(f"Single-flight lease unavailable, calling directly: {e}")
+                return await func()
+            if not waited:
+                waited = True
+                get_metrics().increment("llm_coalesced_requests_total", labels={"scope": "host"})
+            await asyncio.sleep(self.poll_interval)
+            result = await lookup()
+            if result is not None:
+                return result
+
+        try:
+            # The previous holder may have finished between our checks
+            result = await lookup() if waited else None
+            return result if result is not None else await func()
+        finally:
+            try:
+                await asyncio.to_thread(self.leases.release, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Releasing single-flight lease failed: {e}")
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Get the process-wide coalescing layer
+
+    Returns:
+        SingleFlight: Shared instance configured from the environment
+    """
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight.from_env()
+        return _single_flight
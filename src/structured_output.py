@@ -0,0 +1,329 @@
+import json
+import copy
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when model output cannot be turned into the requested structure
+    """
+
+
+# Structured treatment record; defaults stand in for fields the model left out
+TREATMENT_INNOVATION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["treatment_name"],
+    "properties": {
+        "treatment_name": {
+            "type": "string",
+            "description": "Precise Medical Intervention Name"
+        },
+        "mechanism_of_action": {
+            "type": "string",
+            "description": "Detailed Molecular/Physiological Explanation",
+            "default": "Advanced research-based medical evaluation"
+        },
+        "research_status": {
+            "type": "object",
+            "properties": {
+                "clinical_phase": {"type": "string", "description": "Exact Trial Phase",
+                                   "default": "Preliminary"},
+                "publication_details": {"type": "string", "description": "Journal Name, Year, DOI",
+                                        "default": "Ongoing research"},
+                "current_research_stage": {"type": "string", "description": "Ongoing/Completed/Approved",
+                                           "default": "Investigation"}
+            }
+        },
+        "potential_effectiveness": {
+            "type": "object",
+            "properties": {
+                "statistical_evidence": {"type": "string", "description": "Percentage Improvement",
+                                         "default": "Requires further investigation"},
+                "comparative_analysis": {"type": "string", "description": "Comparison with Standard Treatments",
+                                         "default": "Insufficient current data"},
+                "patient_response_rate": {"type": "string", "description": "Quantitative Success Rate",
+                                          "default": "Not yet determined"}
+            }
+        },
+        "patient_populations": {
+            "type": "object",
+            "properties": {
+                "target_demographics": {"type": "string",
+                                        "description": "Specific Age, Gender, Condition Criteria",
+                                        "default": "Broad medical research context"},
+                "inclusion_criteria": {"type": "string", "description": "Detailed Patient Selection Parameters",
+                                       "default": "Comprehensive medical assessment needed"},
+                "exclusion_criteria": {"type": "string", "description": "Conditions Preventing Treatment",
+                                       "default": "To be defined through further research"}
+            }
+        },
+        "clinical_evidence": {
+            "type": "array",
+            "default": [],
+            "items": {
+                "type": "object",
+                "properties": {
+                    "research_paper": {"type": "string", "description": "Full Citation", "default": ""},
+                    "key_findings": {"type": "string", "description": "Summarized Research Outcomes",
+                                     "default": ""}
+                }
+            }
+        },
+        "emerging_innovations": {
+            "type": "string",
+            "description": "Cutting-Edge Technological Advancements",
+            "default": "Continuous medical research exploration"
+        },
+        "safety_profile": {
+            "type": "object",
+            "properties": {
+                "common_side_effects": {"type": "string", "description": "Documented Adverse Reactions",
+                                        "default": "Not yet comprehensively documented"},
+                "rare_side_effects": {"type": "string", "description": "Uncommon but Potential Risks",
+                                      "default": "Requires extensive clinical trials"},
+                "long_term_implications": {"type": "string", "description": "Projected Health Impacts",
+                                           "default": "Ongoing medical investigation"}
+            }
+        }
+    }
+}
+
+
+def schema_template(schema: Dict[str, Any]) -> Any:
+    """
+    Build an example document from a schema's field descriptions
+
+    Used in prompts so models without native schema support see the shape.
+
+    Args:
+        schema (Dict[str, Any]): JSON schema
+
+    Returns:
+        Any: Example value with descriptions in place of string values
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: schema_template(field) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [schema_template(schema.get("items", {}))]
+    return schema.get("description", kind or "")
+
+
+def _strip_defaults(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a schema without "default" keys, which strict providers reject
+    """
+    stripped = {key: value for key, value in schema.items() if key != "default"}
+    if "properties" in stripped:
+        stripped["properties"] = {name: _strip_defaults(field) for name, field in stripped["properties"].items()}
+    if "items" in stripped:
+        stripped["items"] = _strip_defaults(stripped["items"])
+    return stripped
+
+
+def response_format_for(schema: Dict[str, Any], name: str, mode: str = "json_schema") -> Dict[str, Any]:
+    """
+    Build the chat completion response_format for a schema
+
+    Args:
+        schema (Dict[str, Any]): JSON schema for the reply
+        name (str): Schema name reported to the provider
+        mode (str): "json_schema", "json_object" or "prompt"
+
+    Returns:
+        Dict[str, Any]: response_format value; plain text in "prompt" mode, where
+            the schema is only described in the prompt
+    """
+    if mode == "json_schema":
+        return {"type": "json_schema",
+                "json_schema": {"name": name, "strict": False, "schema": _strip_defaults(schema)}}
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return {"type": "text"}
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parse JSON from model output, repairing common damage in one pass
+
+    Handles prose or code fences around the document, raw newlines inside
+    strings, trailing commas, and output cut off by the token limit: an
+    unfinished string value is closed, an unfinished key or literal is
+    dropped, and open containers are closed.
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        Tuple[Any, bool]: Parsed document and whether it needed repair
+
+    Raises:
+        StructuredOutputError: No JSON document could be recovered
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    starts = [index for index in (text.find('{'), text.find('[')) if index != -1]
+    if not starts:
+        raise StructuredOutputError("No JSON object found in model output")
+
+    out: List[str] = []
+    # Each open container: [closing character, expecting an object key]
+    stack: List[List[Any]] = []
+    in_string = escape = string_is_key = False
+    # Length of out at the last point where closing the containers gives valid JSON
+    safe = 0
+
+    for char in text[min(starts):]:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+                out.append(char)
+                if not string_is_key:
+                    safe = len(out)
+                continue
+            elif char == '\n':
+                char = '\\n'
+            elif char in '\r\t':
+                char = '\\r' if char == '\r' else '\\t'
+            out.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1][0] == '}' and stack[-1][1]
+        elif char in '{[':
+            stack.append(['}' if char == '{' else ']', char == '{'])
+            out.append(char)
+            safe = len(out)
+            continue
+        elif char in '}]':
+            if not stack or stack[-1][0] != char:
+                continue
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            stack.pop()
+            out.append(char)
+            safe = len(out)
+            if not stack:
+                break
+            continue
+        elif char == ':' and stack:
+            stack[-1][1] = False
+        elif char == ',' and stack:
+            safe = len(out)
+            stack[-1][1] = stack[-1][0] == '}'
+        out.append(char)
+
+    closers = ''.join(closer for closer, _ in reversed(stack))
+    candidates = []
+    if in_string:
+        body = ''.join(out[:-1] if escape else out)
+        candidates.append(body + '"' + closers)
+    else:
+        candidates.append(''.join(out) + closers)
+    candidates.append(''.join(out[:safe]).rstrip().rstrip(',') + closers)
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+    raise StructuredOutputError("Model output is not recoverable JSON")
+
+
+def conform(value: Any, schema: Dict[str, Any], path: str = "$") -> Tuple[Any, List[str]]:
+    """
+    Validate a document against a schema, filling defaults and coercing scalars
+
+    Supports the subset of JSON schema used here: object properties and
+    required, array items, string/number/boolean types and default.
+
+    Args:
+        value (Any): Parsed document
+        schema (Dict[str, Any]): JSON schema
+        path (str): Location used in problem messages
+
+    Returns:
+        Tuple[Any, List[str]]: Conformed document and the problems found
+    """
+    problems: List[str] = []
+    kind = schema.get("type")
+
+    if kind == "object":
+        if not isinstance(value, dict):
+            problems.append(f"{path}: expected object")
+            value = {}
+        result = dict(value)
+        for name, field in schema.get("properties", {}).items():
+            if result.get(name) is None:
+                if "default" in field:
+                    result[name] = copy.deepcopy(field["default"])
+                elif field.get("type") == "object":
+                    result[name], _ = conform({}, field, f"{path}.{name}")
+                if name in schema.get("required", ()) and "default" not in field:
+                    problems.append(f"{path}.{name}: required")
+                continue
+            result[name], field_problems = conform(result[name], field, f"{path}.{name}")
+            problems.extend(field_problems)
+        return result, problems
+
+    if kind == "array":
+        if not isinstance(value, list):
+            problems.append(f"{path}: expected array")
+            return copy.deepcopy(schema.get("default", [])), problems
+        result = []
+        for index, item in enumerate(value):
+            item, item_problems = conform(item, schema.get("items", {}), f"{path}[{index}]")
+            result.append(item)
+            problems.extend(item_problems)
+        return result, problems
+
+    if kind == "string" and not isinstance(value, str):
+        if isinstance(value, (int, float, bool)):
+            return str(value), problems
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            return "; ".join(value), problems
+        problems.append(f"{path}: expected string")
+        return schema.get("default", ""), problems
+
+    return value, problems
+
+
+def parse_structured(text: str, schema: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Turn model output into a document that satisfies the schema
+
+    Args:
+        text (str): Raw model output
+        schema (Dict[str, Any]): JSON schema
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: Conformed document and non-fatal problems,
+            including a note when the JSON had to be repaired
+
+    Raises:
+        StructuredOutputError: The output is not JSON or misses a required field
+    """
+    document, repaired = repair_json(text)
+    if isinstance(document, list) and schema.get("type") == "object" and document:
+        # Some models wrap the single requested object in a list
+        document = document[0]
+    result, problems = conform(document, schema)
+    fatal = [problem for problem in problems if problem.endswith(": required") or problem == "$: expected object"]
+    if fatal:
+        raise StructuredOutputError(f"Structured output invalid: {', '.join(fatal)}")
+    if repaired:
+        problems.insert(0, "$: repaired malformed or truncated JSON")
+    return result, problems
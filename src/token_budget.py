@@ -0,0 +1,243 @@
+import os
+import re
+import zlib
+import functools
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_metrics import get_metrics
+
+# Words, numbers and single punctuation marks; long words count as several
+# tokens, roughly matching BPE tokenizers on English medical text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_SUBWORD = 5
+
+TRUNCATION_MARKER = "\n[... truncated to fit the token budget ...]\n"
+
+# Budget overrides are read from the environment once, not per request
+load_dotenv()
+
+# (prompt tokens, completion tokens) per task
+TASK_BUDGETS: Dict[str, Tuple[int, int]] = {
+    "default": (4000, 2000),
+    "literature_review": (800, 1000),
+    "literature_review_section": (600, 350),
+    "treatment_innovations": (800, 1000),
+    "disease_overview": (400, 600),
+    "drug_candidates": (600, 1000),
+    "molecular_analysis": (3000, 1000),
+    "validation": (2500, 1000),
+    "clinical_summary": (1200, 700),
+    "clinical_chunk_summary": (1400, 300),
+    "clinical_summary_reduce": (2500, 700),
+    "outcome_prediction": (1500, 800),
+}
+
+
+def _token_cost(word: str) -> int:
+    return 1 + (len(word) - 1) // _CHARS_PER_SUBWORD
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens a text uses without calling a tokenizer
+
+    Args:
+        text (str): Prompt or completion text
+
+    Returns:
+        int: Approximate token count
+    """
+    if not text:
+        return 0
+    return sum(_token_cost(match.group()) for match in _TOKEN_PATTERN.finditer(text))
+
+
+class TokenBudget:
+    """
+    Prompt and completion token limits for one task
+    """
+
+    def __init__(self, task: str, prompt_tokens: int, completion_tokens: int):
+        """
+        Initialize the budget
+
+        Args:
+            task (str): Task name, used as a metrics label
+            prompt_tokens (int): Largest prompt sent for the task
+            completion_tokens (int): max_tokens requested from the provider
+        """
+        self.task = task
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def __repr__(self) -> str:
+        return f"TokenBudget(task={self.task!r}, prompt={self.prompt_tokens}, completion={self.completion_tokens})"
+
+
+@functools.lru_cache(maxsize=None)
+def get_task_budget(task: str) -> TokenBudget:
+    """
+    Look up the token budget for a task
+
+    Defaults come from TASK_BUDGETS and can be overridden with
+    LLM_PROMPT_BUDGET_<TASK> and LLM_COMPLETION_BUDGET_<TASK>. Budgets are
+    read once per task, since they are looked up on every request; call
+    get_task_budget.cache_clear() after changing the overrides.
+
+    Args:
+        task (str): Task name such as "literature_review"
+
+    Returns:
+        TokenBudget: Budget for the task, or the default budget for unknown tasks
+    """
+    prompt_tokens, completion_tokens = TASK_BUDGETS.get(task, TASK_BUDGETS["default"])
+    suffix = task.upper()
+    return TokenBudget(
+        task,
+        int(os.getenv(f'LLM_PROMPT_BUDGET_{suffix}', prompt_tokens)),
+        int(os.getenv(f'LLM_COMPLETION_BUDGET_{suffix}', completion_tokens))
+    )
+
+
+def _cut_index(text: str, max_tokens: int, from_end: bool = False) -> int:
+    """
+    Find where to cut text so the kept side fits max_tokens
+    """
+    matches = list(_TOKEN_PATTERN.finditer(text))
+    if from_end:
+        matches.reverse()
+    used = 0
+    for match in matches:
+        used += _token_cost(match.group())
+        if used > max_tokens:
+            return match.end() if from_end else match.start()
+    return 0 if from_end else len(text)
+
+
+def trim_to_budget(text: str, max_tokens: int, tail_fraction: float = 0.0) -> Tuple[str, int]:
+    """
+    Trim text to a token budget
+
+    Args:
+        text (str): Text to trim
+        max_tokens (int): Tokens the result may use, excluding the marker
+        tail_fraction (float): Share of the budget kept from the end of the
+            text; the middle is dropped so trailing instructions survive
+
+    Returns:
+        Tuple[str, int]: Trimmed text and the estimated number of tokens removed
+    """
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text, 0
+
+    tail_tokens = int(max_tokens * tail_fraction)
+    head = text[:_cut_index(text, max_tokens - tail_tokens)].rstrip()
+    tail = text[_cut_index(text, tail_tokens, from_end=True):].lstrip() if tail_tokens else ""
+    trimmed = head + TRUNCATION_MARKER + tail
+    return trimmed, total - estimate_tokens(head) - estimate_tokens(tail)
+
+
+def fit_to_budget(text: str, max_tokens: int, task: str, part: str = "prompt",
+                  tail_fraction: float = 0.0) -> str:
+    """
+    Trim text to a token budget and report any trim in metrics
+
+    Args:
+        text (str): Text to fit
+        max_tokens (int): Token budget for the text
+        task (str): Task name for metrics
+        part (str): Which part of the prompt was trimmed, for metrics
+        tail_fraction (float): See trim_to_budget
+
+    Returns:
+        str: Text within the budget
+    """
+    trimmed, removed = trim_to_budget(text, max_tokens, tail_fraction)
+    if removed:
+        metrics = get_metrics()
+        metrics.increment("llm_prompt_trimmed_total", labels={"task": task, "part": part})
+        metrics.increment("llm_prompt_trimmed_tokens_total", removed, labels={"task": task, "part": part})
+    return trimmed
+
+
+def fit_prompt_content(build: Callable[[str], str], content: str, task: str, part: str,
+                       reserved_tokens: int = 0) -> str:
+    """
+    Build a prompt whose variable content is trimmed to the task budget
+
+    The template's own tokens are measured first, so the content gets
+    whatever is left of the prompt budget, including the truncation marker
+    when it is trimmed; the whole prompt then passes the request-time budget
+    check without being cut a second time.
+
+    Args:
+        build (Callable[[str], str]): Renders the prompt around the content
+        content (str): Variable part such as report text or patient data
+        task (str): Task name used to look up the budget
+        part (str): Name of the content, for metrics
+        reserved_tokens (int): Budget kept for text added around the prompt later
+
+    Returns:
+        str: Rendered prompt within the task's prompt budget less reserved_tokens
+    """
+    budget = get_task_budget(task)
+    remaining = max(0, budget.prompt_tokens - reserved_tokens - estimate_tokens(build("")))
+    if estimate_tokens(content) > remaining:
+        remaining = max(0, remaining - estimate_tokens(TRUNCATION_MARKER))
+    return build(fit_to_budget(content, remaining, task, part))
+
+
+def split_to_budget(text: str, max_tokens: int, boundary_modulus: int = 8) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, cutting between lines
+
+    Chunk boundaries depend on content rather than position: once a chunk
+    holds half the budget it ends after the first line whose checksum is
+    divisible by boundary_modulus (or when the next line would not fit).
+    An edit therefore moves only the boundaries near it, and the chunks
+    before and after come out identical, which keeps their cached
+    summaries valid. Lines longer than the budget are cut at token
+    boundaries.
+
+    Args:
+        text (str): Document text
+        max_tokens (int): Token budget per chunk
+        boundary_modulus (int): Average number of lines between eligible boundaries
+
+    Returns:
+        List[str]: Chunks in document order; empty for blank text
+    """
+    chunks: List[str] = []
+    lines: List[str] = []
+    used = 0
+
+    def flush():
+        nonlocal lines, used
+        if lines:
+            chunks.append("\n".join(lines))
+        lines, used = [], 0
+
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        cost = estimate_tokens(line)
+        while cost > max_tokens:
+            flush()
+            cut = _cut_index(line, max_tokens)
+            chunks.append(line[:cut].rstrip())
+            line = line[cut:].lstrip()
+            cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            flush()
+        if not line:
+            continue
+        lines.append(line)
+        used += cost
+        if used >= max_tokens // 2 and zlib.crc32(line.encode('utf-8')) % boundary_modulus == 0:
+            flush()
+    flush()
+    return chunks
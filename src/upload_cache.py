@@ -0,0 +1,269 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Key of the entry holding the upload itself
+FILE_KEY = "file"
+
+
+def content_digest(report_file: Any, block_size: int = 1 << 20) -> str:
+    """
+    Hash a file object's contents without loading it all at once
+
+    Args:
+        report_file (Any): Seekable binary file object
+        block_size (int): Bytes read per step
+
+    Returns:
+        str: Hex SHA-256 digest; the file is rewound afterwards
+    """
+    digest = hashlib.sha256()
+    report_file.seek(0)
+    for block in iter(lambda: report_file.read(block_size), b""):
+        digest.update(block)
+    report_file.seek(0)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    Uploaded reports and results derived from them, keyed by content hash
+
+    Identical files share one entry whoever uploads them, so a rerun or a
+    second upload of the same report reuses its stored file, extracted text
+    and summary. Each derived value is stored under a key naming how it was
+    produced (extraction budget, prompt versions, model), so changing those
+    misses instead of returning stale results. Entries older than max_age
+    are dropped, then the least recently used until the files and values
+    together fit in max_bytes. A file is pinned for pin_seconds each time
+    it is stored, so it is not evicted while a queued job still reads it.
+    """
+
+    def __init__(self,
+                 path: str,
+                 directory: str,
+                 max_bytes: int = 500 * 1024 * 1024,
+                 max_age: float = 7 * 86400,
+                 pin_seconds: float = 3600):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite index file path
+            directory (str): Directory holding the uploaded files
+            max_bytes (int): Total size of files and stored values kept
+            max_age (float): Seconds an entry is kept after it was last stored
+            pin_seconds (float): Seconds a stored file is exempt from eviction
+        """
+        self.path = path
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.pin_seconds = pin_seconds
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    @classmethod
+    def from_env(cls) -> "UploadCache":
+        """
+        Build the cache from UPLOAD_CACHE_* settings
+
+        Returns:
+            UploadCache: Configured cache
+        """
+        load_dotenv()
+        data_dir = os.getenv('DATA_DIR', './data')
+        return cls(
+            path=os.getenv('UPLOAD_CACHE_PATH', os.path.join(data_dir, 'cache', 'uploads.sqlite3')),
+            directory=os.getenv('UPLOAD_CACHE_DIR', os.path.join(data_dir, 'uploads')),
+            max_bytes=int(os.getenv('UPLOAD_CACHE_MAX_BYTES', 500 * 1024 * 1024)),
+            max_age=float(os.getenv('UPLOAD_CACHE_MAX_AGE', 7 * 86400)),
+            pin_seconds=float(os.getenv('UPLOAD_CACHE_PIN_SECONDS', 3600))
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _initialize_schema(self):
+        connection = self._connect()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                digest TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                pinned_until REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (digest, key)
+            )
+        """)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(uploads)")}
+        if "pinned_until" not in columns:
+            connection.execute("ALTER TABLE uploads ADD COLUMN pinned_until REAL NOT NULL DEFAULT 0")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_uploads_last_access ON uploads(last_access)")
+
+    def store_file(self, name: str, data: bytes) -> str:
+        """
+        Keep an uploaded file on disk under its content hash
+
+        Storing a file again renews its age and pin, and the row is written
+        before the file, so a concurrent eviction never removes the file
+        this call returns.
+
+        Args:
+            name (str): Original file name; its extension is kept
+            data (bytes): File contents
+
+        Returns:
+            str: Path of the stored file, readable by background jobs and worker processes
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, digest + os.path.splitext(name)[1].lower())
+        now = time.time()
+        connection = None
+        try:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO uploads (digest, key, value, size, created_at, last_access, pinned_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, FILE_KEY, path.encode('utf-8'), len(data), now, now, now + self.pin_seconds)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Upload cache write failed: {e}")
+        if not os.path.exists(path):
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as handle:
+                handle.write(data)
+            os.replace(temporary, path)
+        if connection is not None:
+            try:
+                self._evict(connection, now, keep=digest)
+            except sqlite3.Error as e:
+                logger.warning(f"Upload cache eviction failed: {e}")
+        return path
+
+    def get(self, digest: str, key: str) -> Optional[str]:
+        """
+        Look up a value derived from an upload
+
+        Args:
+            digest (str): Content digest from content_digest
+            key (str): What the value is, e.g. "text:15000:1200"
+
+        Returns:
+            Optional[str]: Stored text, or None
+        """
+        now = time.time()
+        try:
+            connection = self._connect()
+            row = connection.execute("SELECT value, created_at FROM uploads WHERE digest = ? AND key = ?",
+                                     (digest, key)).fetchone()
+            if row is None or row[1] < now - self.max_age:
+                return None
+            connection.execute("UPDATE uploads SET last_access = ? WHERE digest = ? AND key = ?",
+                               (now, digest, key))
+            return zlib.decompress(row[0]).decode('utf-8')
+        except sqlite3.Error as e:
+            logger.warning(f"Upload cache read failed: {e}")
+            return None
+
+    def set(self, digest: str, key: str, value: str):
+        """
+        Store a value derived from an upload
+
+        Args:
+            digest (str): Content digest from content_digest
+            key (str): What the value is
+            value (str): Text to store
+        """
+        now = time.time()
+        compressed = zlib.compress(value.encode('utf-8'))
+        try:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO uploads (digest, key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, key, compressed, len(compressed), now, now)
+            )
+            self._evict(connection, now, keep=digest)
+        except sqlite3.Error as e:
+            logger.warning(f"Upload cache write failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float, keep: Optional[str] = None):
+        """
+        Drop entries past max_age, then least recently used ones over max_bytes
+
+        Pinned files are never evicted, and entries of the upload being
+        stored (keep) are not evicted for size.
+        """
+        doomed = connection.execute(
+            "SELECT digest, key, value FROM uploads WHERE created_at < ? AND pinned_until < ?",
+            (now - self.max_age, now)
+        ).fetchall()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM uploads WHERE created_at >= ?",
+                                   (now - self.max_age,)).fetchone()[0]
+        if total > self.max_bytes:
+            for digest, key, value, size in connection.execute(
+                    "SELECT digest, key, value, size FROM uploads WHERE created_at >= ? AND digest != ? "
+                    "AND pinned_until < ? ORDER BY last_access ASC", (now - self.max_age, keep or "", now)):
+                doomed.append((digest, key, value))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        for digest, key, value in doomed:
+            connection.execute("DELETE FROM uploads WHERE digest = ? AND key = ?", (digest, key))
+            if key == FILE_KEY:
+                try:
+                    os.remove(value.decode('utf-8'))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache size
+
+        Returns:
+            Dict[str, Any]: Stored uploads, entries, bytes and limits
+        """
+        row = self._connect().execute(
+            "SELECT COUNT(DISTINCT digest), COUNT(*), COALESCE(SUM(size), 0) FROM uploads"
+        ).fetchone()
+        return {"uploads": row[0], "entries": row[1], "bytes": row[2],
+                "max_bytes": self.max_bytes, "max_age": self.max_age}
+
+
+_cache: Optional[UploadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache() -> UploadCache:
+    """
+    Get the process-wide upload cache
+
+    Returns:
+        UploadCache: Shared cache configured from the environment
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UploadCache.from_env()
+        return _cache
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_data_dir(tmp_path_factory):
+    """Keep caches, rate-limit state and metrics snapshots written during the tests out of the repository"""
+    data_dir = tmp_path_factory.mktemp('data')
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('DATA_DIR', str(data_dir))
+        monkeypatch.setenv('LLM_METRICS_DIR', str(data_dir / 'metrics'))
+        yield data_dir
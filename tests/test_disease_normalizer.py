@@ -0,0 +1,38 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.disease_normalizer import normalize_disease_name, canonical_disease_name, disease_slug
+from src.medical_knowledge_base import MedicalKnowledgeBase
+
+@pytest.mark.parametrize('variant', ["Alzheimer's", 'alzheimers disease', 'Alzheimer Disease', 'ALZHEIMER’S DISEASE'])
+def test_spelling_variants_share_one_key(variant):
+    """Test that case, apostrophes, plurals and suffixes fold to one key"""
+    assert normalize_disease_name(variant) == "alzheimer's disease"
+    assert canonical_disease_name(variant) == "Alzheimer's disease"
+
+def test_synonyms_resolve_to_canonical_name():
+    """Test synonym table lookups"""
+    assert normalize_disease_name('CKD') == 'chronic kidney disease'
+    assert normalize_disease_name('Type II Diabetes') == 'type 2 diabetes'
+    assert normalize_disease_name('diabetes') == 'diabetes'
+
+@pytest.mark.parametrize('name, prompt_form', [("  Graves'   disease ", "Graves' disease"),
+                                               ('Chagas disease', 'Chagas disease'),
+                                               ('Hives', 'Hives')])
+def test_unknown_names_keep_user_wording(name, prompt_form):
+    """Test that unknown diseases are only whitespace-normalized for prompts"""
+    assert canonical_disease_name(name) == prompt_form
+    assert disease_slug("Crohn's Disease") == 'crohn_disease'
+
+def test_case_and_plural_variants_share_one_lookup_key():
+    """Test that unknown names still fold to one key for caches and lookups"""
+    assert {normalize_disease_name(name) for name in ['Lung cancer', 'lung cancers', 'LUNG CANCER']} == {'lung cancer'}
+
+def test_knowledge_base_lookup_uses_normalizer():
+    """Test that knowledge base lookups accept synonyms"""
+    knowledge_base = MedicalKnowledgeBase()
+
+    assert knowledge_base.query_medical_database('CKD') == knowledge_base.query_medical_database('Chronic Kidney Diseases')
+    assert knowledge_base.query_medical_database('CKD')[0]['Treatment Name'] == 'ACE Inhibitors'
@@ -0,0 +1,66 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.generation_backends import BackendPolicy, LocalTransformersBackend
+from src.llama_model import LlamaResearchAssistant
+from src.response_cache import ResponseCache
+
+
+class EchoBackend(LocalTransformersBackend):
+    """Local backend whose model echoes prompts, to exercise queueing and batching"""
+
+    def __init__(self, **kwargs):
+        super().__init__(model_name="echo", **kwargs)
+        self.batches = []
+
+    def available(self):
+        return True
+
+    def _load(self):
+        pass
+
+    def _infer(self, prompts, max_new_tokens):
+        self.batches.append(len(prompts))
+        return [prompt.upper() for prompt in prompts]
+
+
+def test_concurrent_prompts_are_batched_in_order():
+    """Prompts submitted together share one inference call and keep their results"""
+    backend = EchoBackend(max_batch_size=8, batch_wait=0.2)
+    futures = {}
+
+    def submit(index):
+        futures[index] = backend.submit(f"prompt {index}", 16)
+
+    threads = [threading.Thread(target=submit, args=(index,)) for index in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [futures[index].result(timeout=5) for index in range(6)] == [f"PROMPT {index}" for index in range(6)]
+    assert sum(backend.batches) == 6 and len(backend.batches) <= 2
+
+
+def test_policy_sends_only_configured_tasks_to_the_local_backend(tmp_path):
+    """Local tasks never reach the network; other tasks and unavailable backends stay remote"""
+    class Unavailable(EchoBackend):
+        def available(self):
+            return False
+
+    assert BackendPolicy({"disease_overview"}, Unavailable()).backend_for("disease_overview") is None
+
+    assistant = LlamaResearchAssistant(api_key='test-key',
+                                       response_cache=ResponseCache(str(tmp_path / 'c.sqlite3')))
+    assistant.api_base_url = "http://127.0.0.1:9/unreachable"
+    backend = EchoBackend()
+    assistant.backend_policy = BackendPolicy({"disease_overview"}, backend)
+
+    assert assistant.backend_policy.backend_for("literature_review") is None
+    assert assistant._generate_llama_response("asthma overview", task="disease_overview") == "ASTHMA OVERVIEW"
+    # The second call is answered from the response cache
+    assert assistant._generate_llama_response("asthma overview", task="disease_overview") == "ASTHMA OVERVIEW"
+    assert backend.batches == [1]
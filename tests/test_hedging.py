@@ -0,0 +1,136 @@
+import pytest
+import sys
+import os
+import time
+import asyncio
+import httpx
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import http_transport
+from src.hedging import HedgePolicy, LatencyHistory, get_latency_history
+from src.llama_model import LlamaResearchAssistant
+from src.resilience import get_circuit_breaker
+from src.response_cache import ResponseCache
+from src.upload_cache import UploadCache
+
+def test_latency_percentile_uses_rolling_window():
+    """Test nearest-rank percentiles over the most recent samples only"""
+    history = LatencyHistory(window=10)
+    for seconds in [100.0] + [float(i) for i in range(1, 11)]:
+        history.record(seconds)
+
+    assert len(history) == 10
+    assert history.percentile(50) == 5.0
+    assert history.percentile(95) == 10.0
+
+def test_hedge_delay_adapts_to_history():
+    """Test the hedge delay waits for enough samples and is clamped"""
+    policy = HedgePolicy(enabled=True, percentile=90, min_samples=5, min_delay=0.5, max_delay=3.0)
+    history = get_latency_history('hedge-test-model')
+
+    for _ in range(4):
+        history.record(2.0)
+    assert policy.hedge_delay('hedge-test-model') is None
+
+    history.record(9.0)
+    assert policy.hedge_delay('hedge-test-model') == 3.0
+    assert HedgePolicy(enabled=False).hedge_delay('hedge-test-model') is None
+
+@pytest.fixture
+def hedged_assistant(tmp_path):
+    """Assistant that hedges its primary model after a fixed 0.05s delay"""
+    assistant = LlamaResearchAssistant(api_key='test-key',
+                                       response_cache=ResponseCache(str(tmp_path / 'responses.sqlite3')),
+                                       upload_cache=UploadCache(str(tmp_path / 'uploads.sqlite3'),
+                                                                str(tmp_path / 'uploads')))
+    assistant.hedge_policy = HedgePolicy(enabled=True, min_samples=1, min_delay=0.05, max_delay=0.05)
+    primary = assistant.current_model
+    fallback = assistant._select_fallback_model(primary)
+    for model in (primary, fallback):
+        get_circuit_breaker(model).record_success()
+        get_latency_history(model).record(1.0)
+    return assistant, primary, fallback
+
+@pytest.mark.parametrize('primary_outcome, fallback_outcome, winner', [
+    ((1.0, None), (0.05, None), 'fallback'),              # slow primary loses to the hedge
+    ((0.15, 'primary down'), (0.3, None), 'fallback'),    # a failed primary still waits for the hedge
+    ((0.3, None), (0.01, 'fallback down'), 'primary'),    # a failed hedge still waits for the primary
+    ((0.01, None), (0.01, None), 'primary'),              # fast primary: no hedge is sent
+])
+def test_post_hedged_first_success_wins(hedged_assistant, primary_outcome, fallback_outcome, winner):
+    """Test the hedge fires after the policy delay, the first success wins and the loser is cancelled"""
+    assistant, primary, fallback = hedged_assistant
+    outcomes = {primary: primary_outcome, fallback: fallback_outcome}
+    started, cancelled = {}, set()
+    begin = time.monotonic()
+
+    async def fake_post(model, headers, payload, task="default"):
+        started[model] = time.monotonic() - begin
+        delay, error = outcomes[model]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.add(model)
+            raise
+        if error:
+            raise RuntimeError(error)
+        return {"answered_by": model}
+
+    assistant._post_with_retries = fake_post
+    expected = primary if winner == 'primary' else fallback
+    model, response = http_transport.run_sync(assistant._post_hedged(primary, {}, {"model": primary}))
+
+    assert model == expected and response == {"answered_by": expected}
+    if primary_outcome[0] < 0.05:
+        assert fallback not in started
+        return
+    assert started[fallback] >= 0.05
+    loser = fallback if winner == 'primary' else primary
+    if outcomes[loser][1] is None:
+        deadline = time.monotonic() + 1
+        while loser not in cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cancelled == {loser}
+
+def test_post_hedged_raises_when_both_fail(hedged_assistant):
+    """Test the last error is raised once neither request succeeds"""
+    assistant, primary, fallback = hedged_assistant
+    errors = {primary: (0.1, 'primary down'), fallback: (0.15, 'fallback down')}
+
+    async def fake_post(model, headers, payload, task="default"):
+        await asyncio.sleep(errors[model][0])
+        raise RuntimeError(errors[model][1])
+
+    assistant._post_with_retries = fake_post
+    with pytest.raises(RuntimeError, match='fallback down'):
+        http_transport.run_sync(assistant._post_hedged(primary, {}, {"model": primary}))
+
+def test_cancelled_hedge_loser_releases_breaker_probe_and_semaphore(hedged_assistant, monkeypatch):
+    """Test a cancelled loser gives back its half-open probe and its transport concurrency slot"""
+    assistant, primary, fallback = hedged_assistant
+    semaphore = asyncio.Semaphore(4)
+    delays = {primary: 1.0, fallback: 0.05}
+
+    class FakeClient:
+        async def post(self, url, json=None, **kwargs):
+            await asyncio.sleep(delays[json['model']])
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}],
+                                             "usage": {"total_tokens": 10}})
+
+    monkeypatch.setattr(http_transport, '_get_async_resources', lambda: (FakeClient(), semaphore))
+    breaker = get_circuit_breaker(primary)
+    # Half-open with the probe free: the primary request takes the only probe slot
+    breaker._state, breaker._probe_in_flight = breaker.HALF_OPEN, False
+
+    try:
+        payload = {"model": primary, "messages": [{"role": "user", "content": "Summarize"}], "max_tokens": 16}
+        model, _ = http_transport.run_sync(assistant._post_hedged(primary, {}, payload))
+        assert model == fallback
+
+        deadline = time.monotonic() + 1
+        while semaphore._value != 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert semaphore._value == 4
+        assert breaker.allow_request()
+    finally:
+        breaker.record_success()
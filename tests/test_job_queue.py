@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in (QUEUED, RUNNING):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_run_in_background_and_identical_jobs_are_joined(tmp_path):
+    """Results and progress are persisted; a duplicate submit returns the active job"""
+    release = threading.Event()
+
+    def review(params, report_progress):
+        report_progress(f"partial {params['topic']}")
+        release.wait(5)
+        return {"summary": f"review of {params['topic']}"}
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), max_workers=2, progress_interval=0)
+    queue.register("review", review)
+    first = queue.submit("review", {"topic": "asthma"})
+    assert queue.submit("review", {"topic": "asthma"}) == first
+    assert queue.submit("review", {"topic": "gout"}) != first
+
+    release.set()
+    job = wait_for(queue, first)
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"summary": "review of asthma"}
+    assert job["progress"] == "partial asthma"
+
+    # A new process reading the same database sees the finished result
+    assert JobStore(str(tmp_path / "jobs.sqlite3")).get(first)["result"] == job["result"]
+    queue.shutdown()
+
+
+def test_failed_jobs_keep_their_error(tmp_path):
+    """Handler exceptions mark the job failed with the message"""
+    def broken(params, report_progress):
+        raise RuntimeError("provider down")
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), max_workers=1)
+    queue.register("broken", broken)
+    job = wait_for(queue, queue.submit("broken", {}))
+    assert job["status"] == FAILED
+    assert job["error"] == "provider down"
+    queue.shutdown()
+
+
+def test_jobs_with_expired_leases_are_taken_over(tmp_path):
+    """Active jobs of a crashed instance run again, even if the new process reuses its pid"""
+    crashed = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=30)
+    orphan = crashed.create("review", {"topic": "asthma"})
+    crashed.mark_running(orphan)
+    live = crashed.create("review", {"topic": "gout"})
+    stale = crashed.create("review", {"topic": "lupus"})
+    # The crashed instance stopped renewing: expire its leases, except one still live
+    crashed._connect().execute("UPDATE jobs SET lease_expires = 0 WHERE id != ?", (live,))
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), max_workers=1)
+    queue.register("review", lambda params, report_progress: {"summary": params["topic"]})
+    assert queue.recover() == 2
+    assert queue.recover() == 0
+    assert wait_for(queue, orphan)["result"] == {"summary": "asthma"}
+    assert wait_for(queue, stale)["result"] == {"summary": "lupus"}
+    assert queue.get(live)["status"] == QUEUED
+    assert queue.submit("review", {"topic": "gout"}) == live
+
+    # An identical submit takes over an expired job instead of joining it
+    expired = crashed.create("review", {"topic": "eczema"})
+    crashed._connect().execute("UPDATE jobs SET lease_expires = 0 WHERE id = ?", (expired,))
+    assert queue.submit("review", {"topic": "eczema"}) == expired
+    assert wait_for(queue, expired)["result"] == {"summary": "eczema"}
+    queue.shutdown()
+
+
+def test_concurrent_identical_submits_create_one_job(tmp_path):
+    """Submits racing from several threads and stores all get the same job"""
+    release = threading.Event()
+    queues = [JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), max_workers=1) for _ in range(2)]
+    for queue in queues:
+        queue.register("review", lambda params, report_progress: release.wait(5) and {"summary": "done"})
+
+    ids = []
+    threads = [threading.Thread(target=lambda queue=queue: ids.append(queue.submit("review", {"topic": "asthma"})))
+               for queue in queues for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+
+    assert len(set(ids)) == 1
+    assert len(queues[0].store.list_jobs("review")) == 1
+    for queue in queues:
+        queue.shutdown()
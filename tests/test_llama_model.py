@@ -0,0 +1,184 @@
+import pytest
+import sys
+import os
+import io
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llama_model import LlamaResearchAssistant, StreamingResponseCleaner
+from src.response_cache import ResponseCache
+from src.upload_cache import UploadCache
+from src.token_budget import TRUNCATION_MARKER, estimate_tokens, get_task_budget
+from src.prompt_templates import LITERATURE_REVIEW_SECTIONS, OUTCOME_PREDICTION
+
+@pytest.fixture
+def research_assistant(tmp_path):
+    """Fixture to create a Llama Research Assistant with a dummy key and private cache"""
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite3'))
+    uploads = UploadCache(str(tmp_path / 'uploads.sqlite3'), str(tmp_path / 'uploads'))
+    return LlamaResearchAssistant(api_key='test-key', response_cache=cache, upload_cache=uploads)
+
+def test_generate_many_keeps_order_and_isolates_failures(research_assistant, monkeypatch):
+    """Test batch generation returns per-item results in input order"""
+    async def fake_generate(prompt):
+        if prompt == 'bad':
+            raise RuntimeError('provider error')
+        return prompt.upper()
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+
+    results = research_assistant.generate_many(['a', 'bad', 'c'], max_concurrency=2)
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].text == 'A' and results[2].text == 'C'
+    assert isinstance(results[1].error, RuntimeError)
+
+def test_streaming_cleaner_matches_batch_cleanup():
+    """Test incremental clean-up of a response split into small chunks"""
+    raw = "  1. Alzheimer disease is progressive.\nTreatment Name: Drug X\nStep 2: skip\n\nResearch continues.  "
+    cleaner = StreamingResponseCleaner()
+
+    chunks = [cleaner.feed(raw[i:i + 3]) for i in range(0, len(raw), 3)]
+    chunks.append(cleaner.finish())
+
+    assert ''.join(chunks) == "Alzheimer disease is progressive.\n\nResearch continues."
+    assert chunks.index(next(chunk for chunk in chunks if chunk)) < len(raw) // 6
+
+def test_outcome_prediction_prompt_respects_budget(research_assistant, monkeypatch):
+    """Test oversized patient data is trimmed and the completion cap follows the task"""
+    captured = {}
+
+    async def fake_generate(prompt, task="default", prompt_version=None):
+        captured['prompt'], captured['task'] = prompt, task
+        return "prediction"
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+    patient_data = {'patient_id': 'P1', 'notes': ['blood pressure reading elevated'] * 2000}
+
+    assert research_assistant.predict_medical_outcomes(patient_data) == "prediction"
+    assert captured['task'] == 'outcome_prediction'
+    assert estimate_tokens(captured['prompt']) < 1600
+    assert captured['prompt'].startswith(OUTCOME_PREDICTION.static)
+
+def test_treatment_tracking_makes_one_structured_call(research_assistant, monkeypatch):
+    """Test innovation tracking requests JSON directly and repairs a truncated reply"""
+    calls = []
+
+    async def fake_generate(prompt, task="default", response_format=None, prompt_version=None):
+        calls.append((task, response_format))
+        return '```json\n{"treatment_name": "Lecanemab", "mechanism_of_action": "Binds amyloid prot'
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+
+    result = research_assistant.track_treatment_innovations('alzheimers')[0]
+
+    assert len(calls) == 1
+    assert calls[0][0] == 'treatment_innovations' and calls[0][1] is not None
+    assert result['treatment_name'] == 'Lecanemab'
+    assert result['mechanism_of_action'] == 'Binds amyloid prot'
+    assert result['safety_profile']['rare_side_effects'] == 'Requires extensive clinical trials'
+
+def test_validation_of_long_description_is_trimmed_once(research_assistant, monkeypatch):
+    """Test the description leaves room for the structured shape, so the request-time check does not cut again"""
+    captured = {}
+
+    async def fake_generate(prompt, task="default", response_format=None, prompt_version=None):
+        captured['prompt'] = prompt
+        return '{"treatment_name": "Lecanemab"}'
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+    description = "Lecanemab slowed cognitive decline in early Alzheimer disease. " * 800
+
+    assert research_assistant.validate_medical_response(description)['treatment_name'] == 'Lecanemab'
+    prompt = captured['prompt']
+    assert estimate_tokens(prompt) <= get_task_budget('validation').prompt_tokens
+    assert research_assistant._fit_prompt(prompt, 'validation') == prompt
+    assert prompt.count(TRUNCATION_MARKER) == 1
+
+def test_sectioned_review_runs_sections_concurrently(research_assistant, monkeypatch):
+    """Test sections are generated in parallel, merged in order, and a failed section stays isolated"""
+    async def fake_generate(prompt, task="default", prompt_version=None):
+        await asyncio.sleep(0.2)
+        if "SECTION: Methodological Approaches" in prompt:
+            raise TimeoutError("provider timed out")
+        return prompt.split("SECTION: ")[1].split("\n")[0] + " text"
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+
+    started = time.perf_counter()
+    review = research_assistant.generate_sectioned_literature_review('alzheimers')
+    assert time.perf_counter() - started < 0.2 * len(LITERATURE_REVIEW_SECTIONS) / 2
+
+    positions = [review.index(f"{index}. {title}") for index, (title, _) in
+                 enumerate(LITERATURE_REVIEW_SECTIONS, start=1)]
+    assert positions == sorted(positions)
+    assert "Key Breakthrough Findings text" in review
+    assert "could not be generated (provider timed out)" in review
+
+def test_map_reduce_summary_covers_whole_report(research_assistant, monkeypatch):
+    """Test long reports are summarized chunk by chunk and merged in one reduce call"""
+    calls = []
+
+    async def fake_generate(prompt, task="default", prompt_version=None):
+        calls.append((task, prompt))
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+    research_assistant.clinical_summary_mode = "map_reduce"
+    lines = [f"Visit {i}: systolic pressure fell by {i % 11} mmHg on treatment arm" for i in range(1500)]
+    report = io.BytesIO("\n".join(lines).encode('utf-8'))
+    report.name = "trial.txt"
+
+    assert research_assistant.summarize_clinical_report(report) == f"summary {len(calls)}"
+    tasks = [task for task, _ in calls]
+    assert tasks[-1] == "clinical_summary_reduce"
+    assert tasks.count("clinical_chunk_summary") == len(calls) - 1 > 1
+    assert any("Visit 1499:" in prompt for _, prompt in calls[:-1])
+
+def test_identical_report_is_summarized_once(research_assistant, monkeypatch):
+    """Test a second upload with the same content is served from the upload cache"""
+    calls = []
+
+    async def fake_generate(prompt, task="default", prompt_version=None):
+        calls.append(task)
+        return "summary"
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+    research_assistant.clinical_summary_mode = "single"
+
+    def upload(name):
+        report = io.BytesIO(b"Primary endpoint met; HbA1c fell 1.2% versus placebo.")
+        report.name = name
+        return report
+
+    assert research_assistant.cached_clinical_summary(upload("a.txt")) is None
+    assert research_assistant.summarize_clinical_report(upload("a.txt")) == "summary"
+    assert research_assistant.summarize_clinical_report(upload("copy-of-a.txt")) == "summary"
+    assert research_assistant.cached_clinical_summary(upload("b.txt")) == "summary"
+    assert calls == ["clinical_summary"]
+
+def test_single_summary_sends_key_sections_of_long_report(research_assistant, monkeypatch):
+    """Test a late Results section is sent ahead of a long introduction, and reported back"""
+    prompts = []
+
+    async def fake_generate(prompt, task="default", prompt_version=None):
+        prompts.append(prompt)
+        return "summary"
+
+    monkeypatch.setattr(research_assistant, '_generate_llama_response_async', fake_generate)
+    research_assistant.clinical_summary_mode = "single"
+    introduction = "\n".join(f"Prior study {i} examined glucose control in adults." for i in range(600))
+    report = io.BytesIO(f"Introduction\n{introduction}\nResults\nHbA1c fell 1.2% versus placebo.\n".encode('utf-8'))
+    report.name = "trial.txt"
+
+    sections = []
+    assert research_assistant.summarize_clinical_report(report, sections) == "summary"
+    assert "HbA1c fell 1.2%" in prompts[0]
+    assert {entry["section"]: entry["status"] for entry in sections} == {"introduction": "trimmed",
+                                                                          "results": "included"}
+
+    cached_sections = []
+    assert research_assistant.cached_clinical_summary(report, cached_sections) == "summary"
+    assert cached_sections == sections and len(prompts) == 1
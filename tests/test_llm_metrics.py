@@ -0,0 +1,57 @@
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_metrics import MetricsRegistry, SnapshotWriter
+
+
+def test_histogram_export_is_cumulative():
+    """Prometheus export renders cumulative buckets, sum and count"""
+    registry = MetricsRegistry()
+    for value in (0.04, 0.3, 0.3, 7.0):
+        registry.observe("llm_request_duration_seconds", value, {"model": "m"})
+
+    text = registry.export_prometheus()
+    assert 'llm_request_duration_seconds_bucket{model="m",le="0.05"} 1' in text
+    assert 'llm_request_duration_seconds_bucket{model="m",le="0.5"} 3' in text
+    assert 'llm_request_duration_seconds_bucket{model="m",le="+Inf"} 4' in text
+    assert 'llm_request_duration_seconds_count{model="m"} 4' in text
+
+    summary = registry.histogram("llm_request_duration_seconds", {"model": "m"})
+    assert summary["count"] == 4
+    assert 0.25 <= summary["p50"] <= 0.5
+
+
+def test_series_per_metric_are_bounded():
+    """Label sets beyond max_series are dropped instead of growing memory"""
+    registry = MetricsRegistry(max_series=3)
+    for index in range(10):
+        registry.increment("llm_requests_total", labels={"model": f"m{index}"})
+        registry.observe("llm_request_ttfb_seconds", 0.1, {"model": f"m{index}"})
+
+    snapshot = registry.snapshot()
+    assert len(snapshot["counters"]["llm_requests_total"]) == 3
+    assert len(snapshot["histograms"]["llm_request_ttfb_seconds"]) == 3
+
+
+def test_snapshot_writer_writes_json_and_prometheus(tmp_path):
+    """A snapshot produces both the JSON and the textfile-collector output"""
+    registry = MetricsRegistry()
+    registry.increment("llm_prompt_tokens_total", 120, {"task": "validation"})
+    writer = SnapshotWriter(registry, str(tmp_path), interval=60)
+    writer.write()
+
+    with open(tmp_path / "llm_metrics.json") as f:
+        data = json.load(f)
+    assert data["counters"]["llm_prompt_tokens_total"][0]["value"] == 120
+    assert "llm_prompt_tokens_total" in (tmp_path / "llm_metrics.prom").read_text()
+
+    # Per-process files share one directory and are removed on stop
+    worker = SnapshotWriter(registry, str(tmp_path), interval=60, suffix="4242")
+    worker.write()
+    assert (tmp_path / "llm_metrics.4242.prom").exists()
+    worker.stop(remove=True)
+    assert not (tmp_path / "llm_metrics.4242.prom").exists()
+    assert not (tmp_path / "llm_metrics.4242.json").exists()
@@ -0,0 +1,48 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.model_router import ModelRouter, SectionRoute
+from src.resilience import get_circuit_breaker
+
+
+def make_router():
+    router = ModelRouter(min_samples=3, seed=7)
+    router.register(SectionRoute("literature_review",
+                                 [("router-test/slow", 3.0), ("router-test/fast", 1.0)], latency_slo=1.0))
+    return router
+
+
+def test_traffic_follows_weights_until_a_model_misses_its_slo():
+    """Healthy candidates share traffic by weight; a slow one loses most of it"""
+    router = make_router()
+    first = Counter(router.ranked("literature_review", "unused")[0] for _ in range(400))
+    assert first["router-test/slow"] > 2 * first["router-test/fast"]
+
+    for _ in range(10):
+        router.record("literature_review", "router-test/slow", 4.0, failed=False)
+        router.record("literature_review", "router-test/fast", 0.2, failed=False)
+
+    after = Counter(router.ranked("literature_review", "unused")[0] for _ in range(400))
+    assert after["router-test/fast"] > 4 * after["router-test/slow"]
+    assert after["router-test/slow"] > 0
+
+
+def test_errors_and_open_breakers_move_traffic():
+    """A failing model is demoted; one with an open breaker gets no traffic"""
+    router = make_router()
+    for _ in range(10):
+        router.record("literature_review", "router-test/slow", None, failed=True)
+    first = Counter(router.ranked("literature_review", "unused")[0] for _ in range(200))
+    assert first["router-test/fast"] > 150
+
+    breaker = get_circuit_breaker("router-test/fast")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        for _ in range(20):
+            assert router.ranked("literature_review", "unused")[0] == "router-test/slow"
+    finally:
+        breaker.record_success()
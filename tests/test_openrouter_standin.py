@@ -0,0 +1,37 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.llama_model import LlamaResearchAssistant
+from src.response_cache import ResponseCache
+from tools.openrouter_standin import StandInConfig, find_topic, make_server
+
+@pytest.fixture
+def standin_assistant(tmp_path, monkeypatch):
+    """Fixture running the stand-in server and an assistant pointed at it"""
+    server = make_server(StandInConfig(latency="none", tokens_per_second=0, seed=1), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('OPENROUTER_BASE_URL', f"http://127.0.0.1:{server.server_port}/api/v1")
+    monkeypatch.setenv('LLM_RATE_LIMIT_ENABLED', 'False')
+
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite3'))
+    yield LlamaResearchAssistant(api_key='test-key', response_cache=cache)
+    server.shutdown()
+    server.server_close()
+
+def test_find_topic_prefers_longest_disease_name():
+    """Test narrative templating picks the canonical disease from a prompt"""
+    assert find_topic("Review treatments for Type 2 Diabetes Mellitus") == "type 2 diabetes"
+    assert find_topic("Latest on alzheimers research") == "Alzheimer's disease"
+    assert find_topic("Something unrelated") == "this condition"
+
+def test_generate_and_stream_against_standin(standin_assistant):
+    """Test the client contract end to end: JSON completions and SSE streaming"""
+    text = standin_assistant._generate_llama_response("Overview of COPD treatment", use_cache=False)
+    streamed = ''.join(standin_assistant.stream_llama_response("Overview of COPD treatment", use_cache=False))
+
+    assert "chronic obstructive pulmonary disease" in text
+    assert streamed == text
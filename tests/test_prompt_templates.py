@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.prompt_templates import LITERATURE_REVIEW, PROMPT_TEMPLATES, PromptTemplate, get_template
+from src.llama_model import LlamaResearchAssistant
+from src.response_cache import ResponseCache
+
+
+def test_variables_follow_a_shared_static_prefix():
+    """Prompts for different topics share the byte-identical static prefix"""
+    first = LITERATURE_REVIEW.render(research_topic="Asthma")
+    second = LITERATURE_REVIEW.render(research_topic="Type 2 Diabetes")
+
+    assert first.startswith(LITERATURE_REVIEW.static) and second.startswith(LITERATURE_REVIEW.static)
+    assert "{" not in LITERATURE_REVIEW.static
+    assert get_template("literature_review") is LITERATURE_REVIEW
+    assert len({template.version for template in PROMPT_TEMPLATES.values()}) == len(PROMPT_TEMPLATES)
+
+
+def test_template_version_changes_the_cache_key(tmp_path):
+    """Editing a template invalidates responses cached under the old version"""
+    assistant = LlamaResearchAssistant(api_key='test-key', response_cache=ResponseCache(str(tmp_path / 'c.sqlite3')))
+    edited = PromptTemplate("literature_review", LITERATURE_REVIEW.static + "- Be brief\n", LITERATURE_REVIEW.variables)
+    prompt = LITERATURE_REVIEW.render(research_topic="Asthma")
+    _, payload = assistant._build_request(prompt, assistant.current_model)
+
+    assert edited.version != LITERATURE_REVIEW.version
+    assert (assistant._request_cache_key(prompt, payload, LITERATURE_REVIEW.version) !=
+            assistant._request_cache_key(prompt, payload, edited.version))
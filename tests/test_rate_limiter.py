@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rate_limiter import HostRateLimiter, RateLimit, api_key_bucket
+
+def test_request_bucket_is_shared_across_limiters(tmp_path):
+    """Test two limiters on one database draw from the same request bucket"""
+    path = str(tmp_path / 'limits.sqlite3')
+    buckets = [(api_key_bucket('test-key'), RateLimit(requests_per_second=1, burst=2))]
+    first, second = HostRateLimiter(path), HostRateLimiter(path)
+
+    assert first.try_acquire(buckets, 0) == 0.0
+    assert second.try_acquire(buckets, 0) == 0.0
+    wait = first.try_acquire(buckets, 0)
+    assert 0.9 < wait <= 1.0
+
+def test_token_bucket_waits_and_refunds(tmp_path):
+    """Test tokens per minute are enforced and unused tokens can be returned"""
+    limiter = HostRateLimiter(str(tmp_path / 'limits.sqlite3'))
+    buckets = [("section:test", RateLimit(tokens_per_minute=600))]
+
+    assert limiter.try_acquire(buckets, 500) == 0.0
+    assert 39 < limiter.try_acquire(buckets, 500) <= 40
+    limiter.refund(buckets, 400)
+    assert limiter.try_acquire(buckets, 500) == 0.0
+
+def test_rate_limit_from_env(monkeypatch):
+    """Test per-key settings override the defaults and empty config means no bucket"""
+    monkeypatch.setenv('TEST_KEY_TPM', '1000')
+    limit = RateLimit.from_env('TEST_KEY', RateLimit(requests_per_second=3, tokens_per_minute=50))
+
+    assert (limit.requests_per_second, limit.tokens_per_minute, limit.burst) == (3, 1000, 3)
+    assert RateLimit.from_env('UNCONFIGURED_SECTION') is None
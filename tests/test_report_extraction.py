@@ -0,0 +1,74 @@
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.report_extraction import PageExtractionPool, extract_report_text
+
+
+def make_pdf(page_texts):
+    """Build a minimal PDF with one line of Helvetica text per page"""
+    count = len(page_texts)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [" + b" ".join(f"{4 + 2 * i} 0 R".encode() for i in range(count)) +
+               f"] /Count {count} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for index, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode())
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    out.seek(0)
+    out.name = "protocol.pdf"
+    return out
+
+
+def test_extraction_stops_at_the_budget():
+    """Only the pages needed for the character budget are extracted"""
+    report = make_pdf([f"Page {number} enrolment and dosing schedule" for number in range(1, 61)])
+    timings = []
+
+    text = extract_report_text(report, max_chars=100, page_timings=timings)
+
+    assert len(text) == 100
+    assert text.startswith("Page 1 enrolment")
+    assert [number for number, _ in timings] == [1, 2, 3]
+
+
+def test_full_extraction_keeps_page_order():
+    """Without a budget every page is returned in order"""
+    report = make_pdf([f"Page {number}" for number in range(1, 6)])
+    timings = []
+
+    assert extract_report_text(report, page_timings=timings).split("\n") == [f"Page {n}" for n in range(1, 6)]
+    assert len(timings) == 5 and all(seconds >= 0 for _, seconds in timings)
+
+
+def test_pooled_extraction_matches_in_process():
+    """Worker-process extraction returns the same text in page order and honours the budget"""
+    pages = [f"Page {number} adverse event table" for number in range(1, 41)]
+    pool = PageExtractionPool(processes=2, min_pages=10, pages_per_task=4)
+    try:
+        local = extract_report_text(make_pdf(pages), pool=PageExtractionPool(processes=0))
+        pooled = extract_report_text(make_pdf(pages), pool=pool)
+        assert pooled == local
+
+        timings = []
+        assert extract_report_text(make_pdf(pages), max_chars=200, page_timings=timings, pool=pool) == local[:200]
+        assert [number for number, _ in timings] == list(range(1, len(timings) + 1))
+        assert len(timings) < len(pages)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.report_sections import index_report_sections, select_report_sections
+
+
+REPORT = """Phase III Trial of Drug X in Type 2 Diabetes
+Abstract
+Background: Drug X lowers glucose in animal models.
+Results: HbA1c fell 1.2% versus placebo.
+1. Introduction
+Type 2 diabetes affects millions of adults worldwide.
+2. Methods
+Patients were randomised 1:1 to drug X or placebo for 52 weeks.
+3. Results
+HbA1c fell 1.2% at week 52; fasting glucose fell 30 mg/dL.
+Adverse Events
+Nausea occurred in 12% of patients on drug X.
+References
+1. Smith J. Diabetes Care. 2021.
+"""
+
+
+def test_index_finds_sections_and_keeps_structured_abstract():
+    """Numbered and plain headings open sections; colon subheadings stay in the abstract"""
+    sections = index_report_sections(REPORT)
+
+    assert [section.name for section in sections] == [
+        "front_matter", "abstract", "introduction", "methods", "results", "adverse_events", "excluded"
+    ]
+    assert "HbA1c fell 1.2% versus placebo." in sections[1].body
+    assert sections[3].heading == "2. Methods"
+
+
+def test_selection_fills_budget_by_priority_in_document_order():
+    """High-value sections are chosen first, returned in document order, and references never sent"""
+    selected, report = select_report_sections(REPORT + "\n".join(["Background filler sentence."] * 200), 60)
+    statuses = {entry["section"]: entry["status"] for entry in report}
+
+    assert statuses["abstract"] == "included"
+    assert statuses["results"] == "included"
+    assert statuses["excluded"] == "excluded"
+    assert statuses["introduction"] == "skipped"
+    assert "Smith J." not in selected
+    assert selected.index("Abstract") < selected.index("3. Results")
+
+    everything, _ = select_report_sections(REPORT)
+    assert "Patients were randomised" in everything and "Smith J." not in everything
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.http_transport import TransportStatusError
+from src.resilience import CircuitBreaker, RetryPolicy, is_retryable, parse_retry_after
+
+def test_retryable_status_codes():
+    """Test rate limits and 5xx responses are retried but client errors are not"""
+    assert is_retryable(TransportStatusError(429, {}, ''))
+    assert is_retryable(TransportStatusError(503, {}, ''))
+    assert not is_retryable(TransportStatusError(401, {}, ''))
+    assert not is_retryable(ValueError('bad json'))
+
+def test_backoff_honors_retry_after_and_attempt_limit():
+    """Test Retry-After overrides jitter and the attempt limit stops retries"""
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_retry_after=10.0)
+    error = TransportStatusError(429, {'Retry-After': '2'}, '')
+
+    assert parse_retry_after(error) == 2.0
+    assert policy.backoff(1, parse_retry_after(error)) == 2.0
+    assert policy.backoff(1, 60.0) is None
+    assert 0 <= policy.backoff(2) <= 2.0
+    assert policy.backoff(3) is None
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test the breaker opens at the threshold and closes after a successful probe"""
+    breaker = CircuitBreaker('test-model', failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    # Zero reset timeout moves straight to half-open, allowing one probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,52 @@
+import pytest
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.response_cache import ResponseCache, make_cache_key
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture to create a small response cache in a temporary directory"""
+    return ResponseCache(str(tmp_path / 'responses.sqlite3'), ttl_seconds=60, max_entries=2)
+
+def test_cache_key_covers_sampling_parameters():
+    """Test that different sampling parameters produce different keys"""
+    key_a = make_cache_key('model', 'system', {'temperature': 0.1}, 'prompt')
+    key_b = make_cache_key('model', 'system', {'temperature': 0.2}, 'prompt')
+
+    assert key_a != key_b
+    assert key_a == make_cache_key('model', 'system', {'temperature': 0.1}, 'prompt')
+
+def test_cache_round_trip_and_counters(cache):
+    """Test storing, reading and hit/miss accounting"""
+    assert cache.get('missing') is None
+    cache.set('key', 'cached narrative')
+
+    assert cache.get('key') == 'cached narrative'
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+def test_cache_expires_and_evicts_least_recently_used(cache):
+    """Test TTL expiry and LRU eviction"""
+    cache.set('expired', 'old', ttl_seconds=-1)
+    assert cache.get('expired') is None
+
+    cache.set('a', 'first')
+    time.sleep(0.01)
+    cache.set('b', 'second')
+    time.sleep(0.01)
+    cache.get('a')
+    time.sleep(0.01)
+    cache.set('c', 'third')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'first' and cache.get('c') == 'third'
+
+def test_cache_survives_reopen(tmp_path):
+    """Test that entries persist across cache instances"""
+    path = str(tmp_path / 'responses.sqlite3')
+    ResponseCache(path).set('key', 'persisted')
+
+    assert ResponseCache(path).get('key') == 'persisted'
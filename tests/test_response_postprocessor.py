@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.response_postprocessor import StreamingResponseCleaner, clean_response
+
+RAW_RESPONSE = """  Solution 1: Drug X
+1. Alzheimer disease is progressive.
+Treatment Name: Drug Y
+   Step 2: monitor
+Step 3: skip
+
+12.   Research continues with promising results.
+Phase 2 trials are ongoing.  """
+
+def test_clean_response_drops_labels_and_numbering():
+    """Test the single-pass clean-up on a response with every artifact type"""
+    assert clean_response(RAW_RESPONSE) == (
+        "Alzheimer disease is progressive.\n\n"
+        "Step 2: monitor\n\n"
+        "Research continues with promising results.\n\n"
+        "Phase 2 trials are ongoing."
+    )
+
+def test_streaming_and_batch_clean_up_agree():
+    """Test chunked streaming output equals the whole-response clean-up"""
+    for chunk_size in (1, 4, 17):
+        cleaner = StreamingResponseCleaner()
+        chunks = [cleaner.feed(RAW_RESPONSE[i:i + chunk_size]) for i in range(0, len(RAW_RESPONSE), chunk_size)]
+        chunks.append(cleaner.finish())
+        assert ''.join(chunks) == clean_response(RAW_RESPONSE)
+
+def test_strip_labels_removes_header_prefixes():
+    """Test the narrative mode also strips "Header:" prefixes and stray numbering"""
+    text = "Innovation Overview: Gene therapy is advancing.\n1. 2. Antibodies help.\nSummary:\nHope remains."
+    assert clean_response(text, strip_labels=True) == (
+        "Gene therapy is advancing.\n\nAntibodies help.\n\nHope remains."
+    )
@@ -0,0 +1,48 @@
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.single_flight import HostLeaseTable, SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    """Test identical concurrent keys run once and all callers get the result"""
+    single_flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", work) for _ in range(5)),
+                                    single_flight.do("other", work))
+
+    assert asyncio.run(main()) == ["answer"] * 6
+    assert len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    """Test a failing leader raises in all coalesced callers and is not cached"""
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert asyncio.run(single_flight.do("key", lambda: asyncio.sleep(0, result="retry"))) == "retry"
+
+def test_host_lease_is_exclusive_until_released(tmp_path):
+    """Test only one lease holder per key across lease tables on one file"""
+    first = HostLeaseTable(str(tmp_path / 'leases.sqlite3'))
+    second = HostLeaseTable(str(tmp_path / 'leases.sqlite3'))
+
+    assert first.acquire("key")
+    assert not second.acquire("key")
+    first.release("key")
+    assert second.acquire("key")
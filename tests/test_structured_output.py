@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.structured_output import (TREATMENT_INNOVATION_SCHEMA, StructuredOutputError, parse_structured,
+                                   repair_json, response_format_for)
+
+
+def test_repair_handles_fences_trailing_commas_and_newlines():
+    """Common formatting damage is repaired without losing content"""
+    document, repaired = repair_json('Sure:\n```json\n{"a": [1, 2,], "b": "two\nlines",}\n```')
+    assert repaired
+    assert document == {"a": [1, 2], "b": "two\nlines"}
+
+
+def test_every_truncation_point_recovers_a_valid_document():
+    """Output cut off anywhere after the required field still parses"""
+    full = json.dumps({
+        "treatment_name": "Lecanemab",
+        "clinical_evidence": [{"research_paper": "van Dyck 2023", "key_findings": "Slowed decline"}],
+        "safety_profile": {"common_side_effects": "ARIA", "rare_side_effects": "Hemorrhage"}
+    }, indent=2)
+    first_usable = full.index('Lecanemab') + 1
+
+    for cut in range(first_usable, len(full) + 1):
+        document, _ = parse_structured(full[:cut], TREATMENT_INNOVATION_SCHEMA)
+        assert document["treatment_name"].startswith("L")
+        assert isinstance(document["clinical_evidence"], list)
+        assert set(document["safety_profile"]) == {"common_side_effects", "rare_side_effects",
+                                                   "long_term_implications"}
+
+
+def test_missing_required_field_and_schema_request():
+    """A reply without the required field is rejected; the request strips defaults"""
+    with pytest.raises(StructuredOutputError):
+        parse_structured('{"mechanism_of_action": "unknown"}', TREATMENT_INNOVATION_SCHEMA)
+
+    response_format = response_format_for(TREATMENT_INNOVATION_SCHEMA, "treatment_innovation", mode="json_schema")
+    assert response_format["type"] == "json_schema"
+    assert "default" not in json.dumps(response_format)
+    assert response_format_for(TREATMENT_INNOVATION_SCHEMA, "x", mode="prompt") == {"type": "text"}
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_metrics import get_metrics
+from src.token_budget import (TRUNCATION_MARKER, estimate_tokens, fit_prompt_content,
+                              get_task_budget, split_to_budget, trim_to_budget)
+
+def test_estimate_tokens_counts_words_punctuation_and_long_words():
+    """Test the local estimator on short and long words"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Type 2 diabetes.") == 5
+    assert estimate_tokens("neurodegenerative") == 4
+
+def test_trim_keeps_head_and_tail():
+    """Test trimming drops the middle and reports removed tokens"""
+    text = ' '.join(f"w{i}" for i in range(100))
+    trimmed, removed = trim_to_budget(text, 20, tail_fraction=0.5)
+
+    assert trimmed.startswith("w0 ") and trimmed.endswith("w99")
+    assert TRUNCATION_MARKER in trimmed
+    assert removed == 80
+    assert trim_to_budget("short text", 20) == ("short text", 0)
+
+def test_task_budget_env_override(monkeypatch):
+    """Test per-task budgets can be overridden from the environment"""
+    monkeypatch.setenv('LLM_COMPLETION_BUDGET_DISEASE_OVERVIEW', '321')
+    get_task_budget.cache_clear()
+    assert get_task_budget('disease_overview').completion_tokens == 321
+    assert get_task_budget('unknown_task').completion_tokens == get_task_budget('default').completion_tokens
+    monkeypatch.delenv('LLM_COMPLETION_BUDGET_DISEASE_OVERVIEW')
+    get_task_budget.cache_clear()
+
+def test_fit_prompt_content_trims_content_and_records_metric():
+    """Test only the variable content is trimmed, within the prompt budget"""
+    before = get_metrics().get("llm_prompt_trimmed_total", {"task": "clinical_summary", "part": "report"})
+    prompt = fit_prompt_content(lambda report: f"REPORT: {report}\nSUMMARIZE", "finding " * 5000,
+                                "clinical_summary", "report")
+
+    assert prompt.startswith("REPORT: finding") and prompt.endswith("SUMMARIZE")
+    assert estimate_tokens(prompt) <= get_task_budget("clinical_summary").prompt_tokens
+    assert get_metrics().get("llm_prompt_trimmed_total", {"task": "clinical_summary", "part": "report"}) == before + 1
+
+def test_split_keeps_unchanged_chunks_after_an_edit():
+    """Test chunks fit the budget, cover every line and resynchronize after an edit"""
+    lines = [f"Line {i}: cohort {i % 7} reported endpoint change of {i * 3} percent" for i in range(400)]
+    chunks = split_to_budget("\n".join(lines), 300)
+
+    assert len(chunks) > 5
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+    assert "\n".join(chunks) == "\n".join(lines)
+
+    lines[200] = "Line 200: amended after data lock"
+    edited = split_to_budget("\n".join(lines), 300)
+    assert len(set(chunks) - set(edited)) <= 2
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.upload_cache import UploadCache
+
+
+def test_files_are_content_addressed_and_size_bounded(tmp_path):
+    """Identical uploads share one file; least recently used uploads go first when over size"""
+    cache = UploadCache(str(tmp_path / "uploads.sqlite3"), str(tmp_path / "files"), max_bytes=2500, pin_seconds=0)
+    first = cache.store_file("trial.pdf", b"a" * 1000)
+    assert cache.store_file("renamed.pdf", b"a" * 1000) == first
+    second = cache.store_file("other.pdf", b"b" * 1000)
+    cache.set("digest-x", "text", "x")
+
+    # Touch the first upload so the second is the least recently used
+    time.sleep(0.01)
+    cache.store_file("trial.pdf", b"a" * 1000)
+    cache.store_file("third.pdf", b"c" * 1000)
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert cache.stats()["bytes"] <= 2500
+
+
+def test_values_expire_by_age(tmp_path):
+    """Derived values older than max_age are not returned and are evicted"""
+    cache = UploadCache(str(tmp_path / "uploads.sqlite3"), str(tmp_path / "files"), max_age=0.05)
+    cache.set("digest", "summary:single", "Key Findings")
+    assert cache.get("digest", "summary:single") == "Key Findings"
+
+    time.sleep(0.1)
+    assert cache.get("digest", "summary:single") is None
+    cache.set("other", "summary:single", "new")
+    assert cache.stats()["entries"] == 1
+
+
+def test_restored_and_pinned_files_are_not_evicted(tmp_path):
+    """Storing an upload again renews its age; a pinned file survives other sessions' evictions"""
+    cache = UploadCache(str(tmp_path / "uploads.sqlite3"), str(tmp_path / "files"), max_age=0.05, pin_seconds=0)
+    path = cache.store_file("trial.pdf", b"a" * 1000)
+    time.sleep(0.1)
+    assert cache.store_file("trial.pdf", b"a" * 1000) == path
+    cache.set("other", "summary:single", "unrelated")
+    assert os.path.exists(path)
+
+    pinned = UploadCache(str(tmp_path / "uploads.sqlite3"), str(tmp_path / "files"), max_bytes=1500)
+    queued = pinned.store_file("queued.pdf", b"q" * 1000)
+    time.sleep(0.1)
+    cache.store_file("newer.pdf", b"n" * 1000)
+    cache.set("other", "summary:single", "x" * 100)
+    assert os.path.exists(queued)
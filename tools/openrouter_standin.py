@@ -0,0 +1,400 @@
+"""
+Local stand-in for the OpenRouter chat completions API.
+
+Implements the POST /api/v1/chat/completions contract used by
+LlamaResearchAssistant, including server-sent-event streaming and JSON
+response_format requests, so the app
+and its caches can be load-tested offline. Point the app at it with:
+
+    python tools/openrouter_standin.py --port 8800 --latency lognormal:0.8:0.6 --rate-429 0.05
+    OPENROUTER_BASE_URL=http://127.0.0.1:8800/api/v1 streamlit run app.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.disease_normalizer import DISEASE_SYNONYMS
+from src.token_budget import estimate_tokens
+
+DEFAULT_NARRATIVES = [
+    "{topic} research is advancing on several fronts, with recent studies refining how the condition is "
+    "diagnosed, staged and treated. Large observational cohorts have clarified which patients progress "
+    "fastest, and this has sharpened the design of randomized trials now under way.\n"
+    "Among emerging therapies, targeted biologics and repurposed small molecules show the most consistent "
+    "signals in phase 2 data, while combination regimens are being evaluated to extend durable responses. "
+    "Digital monitoring and biomarker-guided dosing are helping clinicians personalize care.\n"
+    "Important gaps remain, including long-term safety, access for under-represented populations and "
+    "real-world effectiveness, and these define the priorities for the next generation of studies in {topic}.",
+
+    "Current standard care for {topic} focuses on symptom control and slowing progression, but the treatment "
+    "landscape is changing quickly. Mechanistic studies have identified new molecular targets, and several "
+    "candidates that modulate these pathways have entered clinical evaluation.\n"
+    "Early results suggest meaningful benefit for selected patients, particularly when therapy starts early "
+    "and is paired with lifestyle and rehabilitation programs. Safety profiles so far are manageable, although "
+    "rare adverse events require continued surveillance.\n"
+    "Taken together, the evidence points to a more personalized approach to {topic}, where biomarkers guide "
+    "therapy selection and outcomes are tracked continuously to adjust care.",
+]
+
+# Longest names first so "type 2 diabetes" wins over "diabetes"
+_TOPICS = sorted(
+    ((name.lower(), canonical) for canonical, aliases in DISEASE_SYNONYMS.items() for name in [canonical] + aliases),
+    key=lambda item: -len(item[0])
+)
+
+
+class LatencyDistribution:
+    """
+    Time to first byte, sampled from a configurable distribution
+
+    Specs: "fixed:SECONDS", "uniform:LOW:HIGH", "lognormal:MEDIAN:SIGMA"
+    (heavy tail, like real providers) or "none".
+    """
+
+    def __init__(self, spec: str):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(value) for value in parts[1:]]
+        expected = {"none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * rng.lognormvariate(0, sigma)
+        return 0.0
+
+
+class StandInConfig:
+    """
+    Behaviour of the stand-in server
+    """
+
+    def __init__(self,
+                 latency: str = "lognormal:0.8:0.5",
+                 tokens_per_second: float = 80.0,
+                 rate_429: float = 0.0,
+                 rate_5xx: float = 0.0,
+                 retry_after: Optional[float] = 1.0,
+                 narratives: Optional[List[str]] = None,
+                 seed: Optional[int] = None):
+        """
+        Initialize the server configuration
+
+        Args:
+            latency (str): Time-to-first-byte distribution spec
+            tokens_per_second (float): Generation speed; 0 sends the completion at once
+            rate_429 (float): Fraction of requests rejected with 429
+            rate_5xx (float): Fraction of requests failing with 500/502/503
+            retry_after (float, optional): Retry-After header on 429 responses
+            narratives (List[str], optional): Templates with a {topic} placeholder
+            seed (int, optional): Seed for reproducible latency and fault injection
+        """
+        self.latency = LatencyDistribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.narratives = narratives or DEFAULT_NARRATIVES
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"requests": 0, "streams": 0, "429": 0, "5xx": 0}
+
+    def count(self, name: str):
+        """Increment a request counter under a lock"""
+        with self.rng_lock:
+            self.stats[name] += 1
+
+    def roll(self) -> Dict[str, float]:
+        """Draw the random outcome of one request under a lock"""
+        with self.rng_lock:
+            return {"fault": self.rng.random(), "latency": self.latency.sample(self.rng), "status": self.rng.random()}
+
+
+def find_topic(text: str) -> str:
+    """
+    Pick the disease a prompt is about, for templating the narrative
+
+    Args:
+        text (str): Prompt text
+
+    Returns:
+        str: Canonical disease name, or a generic phrase
+    """
+    lowered = text.lower()
+    for name, canonical in _TOPICS:
+        if re.search(r'\b' + re.escape(name) + r'\b', lowered):
+            return canonical
+    return "this condition"
+
+
+def build_completion(config: StandInConfig, prompt: str, max_tokens: int) -> str:
+    """
+    Render a narrative for a prompt, capped at max_tokens
+
+    The template is chosen from a hash of the prompt, so identical prompts
+    get identical answers, as a cache in front of the server would expect.
+    """
+    index = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16) % len(config.narratives)
+    topic = find_topic(prompt)
+    text = config.narratives[index].replace("{topic}", topic)
+    text = text[0].upper() + text[1:]
+
+    words = text.split(' ')
+    kept, used = [], 0
+    for word in words:
+        used += estimate_tokens(word)
+        if used > max_tokens:
+            break
+        kept.append(word)
+    return ' '.join(kept)
+
+
+def _fill_schema(schema: Dict[str, Any], sentences: List[str], position: List[int]) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _fill_schema(field, sentences, position) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_fill_schema(schema.get("items", {}), sentences, position)]
+    if kind in ("number", "integer"):
+        return 0
+    if kind == "boolean":
+        return False
+    sentence = sentences[position[0] % len(sentences)]
+    position[0] += 1
+    return sentence
+
+
+def build_structured_completion(config: StandInConfig, prompt: str, response_format: Dict[str, Any],
+                                max_tokens: int) -> str:
+    """
+    Render a JSON reply for a response_format request, capped at max_tokens
+
+    json_schema requests get a document of the requested shape filled with
+    narrative sentences; json_object requests get {"response": narrative}.
+    Like a real model, a reply over the cap is cut off mid-document.
+    """
+    narrative = build_completion(config, prompt, 10 ** 6)
+    if response_format.get("type") == "json_schema":
+        sentences = [sentence.strip() for sentence in re.split(r'(?<=\.)\s+', narrative) if sentence.strip()]
+        schema = (response_format.get("json_schema") or {}).get("schema") or {}
+        document = _fill_schema(schema, sentences, [0])
+    else:
+        document = {"response": narrative}
+
+    text = json.dumps(document, indent=2)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for piece in re.findall(r'\S+\s*|\s+', text):
+        used += estimate_tokens(piece)
+        if used > max_tokens:
+            break
+        kept.append(piece)
+    return ''.join(kept)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Request handler implementing the chat completions contract
+    """
+
+    protocol_version = "HTTP/1.1"
+    config: StandInConfig = None
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._send_json(200, {"status": "ok", "stats": self.config.stats})
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/api/v1/chat/completions':
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            messages = request['messages']
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": {"message": "Invalid request body", "code": 400}})
+            return
+
+        config = self.config
+        outcome = config.roll()
+        config.count("requests")
+
+        # Fault injection happens before any latency, like an overloaded gateway
+        if outcome["fault"] < config.rate_429:
+            config.count("429")
+            headers = {"Retry-After": f"{config.retry_after:g}"} if config.retry_after is not None else {}
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "code": 429}}, headers)
+            return
+        if outcome["fault"] < config.rate_429 + config.rate_5xx:
+            config.count("5xx")
+            status = (500, 502, 503)[int(outcome["status"] * 3)]
+            self._send_json(status, {"error": {"message": "Upstream provider error", "code": status}})
+            return
+
+        prompt = '\n'.join(str(message.get('content', '')) for message in messages if message.get('role') == 'user')
+        prompt_tokens = sum(estimate_tokens(str(message.get('content', ''))) for message in messages)
+        max_tokens = int(request.get('max_tokens') or 2000)
+        response_format = request.get('response_format') or {}
+        if response_format.get('type') in ('json_schema', 'json_object'):
+            completion = build_structured_completion(config, prompt, response_format, max_tokens)
+        else:
+            completion = build_completion(config, prompt, max_tokens)
+        completion_tokens = estimate_tokens(completion)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"gen-standin-{hashlib.sha1(os.urandom(8)).hexdigest()[:12]}"
+        model = request.get('model', 'standin')
+
+        time.sleep(outcome["latency"])
+
+        if request.get('stream'):
+            config.count("streams")
+            self._stream(completion, completion_id, model, usage)
+            return
+
+        if config.tokens_per_second:
+            time.sleep(completion_tokens / config.tokens_per_second)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": completion},
+                         "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    def _stream(self, completion: str, completion_id: str, model: str, usage: Dict[str, int]):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write(data: str):
+            encoded = data.encode('utf-8')
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(encoded), encoded))
+            self.wfile.flush()
+
+        def event(payload: Dict[str, Any]) -> str:
+            return "data: " + json.dumps(payload) + "\n\n"
+
+        write(": OPENROUTER PROCESSING\n\n")
+        delay = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for piece in re.findall(r'\S+\s*|\s+', completion):
+            write(event({"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}))
+            if delay:
+                time.sleep(delay * estimate_tokens(piece))
+        write(event({"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}))
+        write("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Threading server with a listen backlog deep enough for load tests
+    """
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def make_server(config: StandInConfig, host: str = "127.0.0.1", port: int = 8800,
+                verbose: bool = False) -> StandInServer:
+    """
+    Create the stand-in server without starting it
+
+    Args:
+        config (StandInConfig): Server behaviour
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free port
+        verbose (bool): Log every request
+
+    Returns:
+        StandInServer: Server ready for serve_forever()
+    """
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {"config": config})
+    server = StandInServer((host, port), handler)
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter chat completions stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', default='lognormal:0.8:0.5',
+                        help='Time to first byte: none, fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA')
+    parser.add_argument('--tokens-per-second', type=float, default=80.0,
+                        help='Generation speed; 0 returns the completion immediately')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Fraction of requests answered with 5xx')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429')
+    parser.add_argument('--narratives', help='JSON file with a list of narrative templates using {topic}')
+    parser.add_argument('--seed', type=int, help='Seed for reproducible latency and faults')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    narratives = None
+    if args.narratives:
+        with open(args.narratives, 'r') as f:
+            narratives = json.load(f)
+
+    config = StandInConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        narratives=narratives,
+        seed=args.seed
+    )
+    server = make_server(config, args.host, args.port, args.verbose)
+    print(f"OpenRouter stand-in listening on http://{args.host}:{server.server_port}/api/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()